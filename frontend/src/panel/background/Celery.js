@@ -1,7 +1,7 @@
 import React from 'react';
 import { useEffect, useState } from 'react';
 import axios from 'axios';
-import { getCSRFToken } from './Torrent';
+import { getCSRFToken, getPanelEvents } from './Torrent';
 import ErrorPanel from '../common/ErrorPanel';
 import InfoPanel from '../common/InfoPanel';
 import Modal from '../../stream/index/Modal';
@@ -43,6 +43,18 @@ const Celery = () => {
 
   useEffect(() => {
     getCeleryTasks();
+    const events = getPanelEvents();
+    if (events === null) return;
+
+    // Inspecting the workers is slow, a burst of task events refreshes the list once.
+    let timeout = null;
+    events.addEventListener('task', () => {
+      if (timeout !== null) return;
+      timeout = setTimeout(() => {
+        timeout = null;
+        getCeleryTasks();
+      }, 2000);
+    });
   }, []);
 
   const renderInfoMessage = () => {
@@ -131,9 +143,8 @@ const Celery = () => {
       <table className="table table-dark">
         <tbody>
           {reserved.map((res) => {
-            if (res.request === undefined) return;
-            res.request.eta = 'Running...';
-            return renderRow(res.request);
+            res.eta = 'Waiting...';
+            return renderRow(res);
           })}
         </tbody>
       </table>
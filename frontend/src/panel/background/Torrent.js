@@ -1,5 +1,5 @@
 import * as React from 'react';
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import axios from 'axios';
 import ErrorPanel from '../common/ErrorPanel';
 import InfoPanel from '../common/InfoPanel';
@@ -10,6 +10,33 @@ const getCSRFToken = () => {
   return document.querySelector('[name=csrfmiddlewaretoken]').value;
 };
 
+let panelEvents = null;
+
+// One connection to the panel event stream, shared by the panels on the page.
+const getPanelEvents = () => {
+  if (panelEvents === null && typeof EventSource !== 'undefined')
+    panelEvents = new EventSource('/panel/events/');
+  return panelEvents;
+};
+
+// Applies a t_status response or a torrents event. Responses to a request with a rid only carry the
+// fields that changed since that rid, keyed by the torrent hash.
+const mergeTorrents = (current, data) => {
+  if (Array.isArray(data.torrents)) return data.torrents;
+
+  const torrents = {};
+  if (!data.full_update)
+    current.forEach((torrent) => (torrents[torrent.hash] = torrent));
+  Object.entries(data.torrents).forEach(([hash, fields]) => {
+    torrents[hash] = { ...torrents[hash], ...fields, hash: hash };
+  });
+  (data.torrents_removed || []).forEach((hash) => delete torrents[hash]);
+
+  return Object.values(torrents).sort(
+    (a, b) => (a.added_on || 0) - (b.added_on || 0)
+  );
+};
+
 const Torrent = () => {
   const [torrents, setTorrents] = useState([]);
   const [fetched, setFetched] = useState(false);
@@ -18,24 +45,52 @@ const Torrent = () => {
   let refresh = null;
   let refreshInterval = 5000;
   let errorCount = 0;
+  const rid = useRef(null);
 
   useEffect(() => {
-    getTorrents();
-    refresh = setInterval(function () {
-      getTorrents();
-    }, refreshInterval);
+    const events = getPanelEvents();
+    if (events === null) {
+      startPolling();
+      return;
+    }
+
+    events.addEventListener('torrents', (event) => {
+      const data = JSON.parse(event.data);
+      setTorrents((current) => mergeTorrents(current, data));
+      rid.current = data.rid;
+      setErrorMessage('');
+      setFetched(true);
+    });
+    events.addEventListener('failure', (event) => {
+      const data = JSON.parse(event.data);
+      // Failed tasks are shown by the task panels.
+      if (data.task_id === undefined) setErrorMessage(data.message);
+    });
+    events.addEventListener('error', () => {
+      // The browser reconnects by itself unless the stream was refused.
+      if (events.readyState === EventSource.CLOSED && refresh === null)
+        startPolling();
+    });
   }, []);
 
+  const startPolling = () => {
+    getTorrents();
+    refresh = setInterval(getTorrents, refreshInterval);
+  };
+
   const getTorrents = () => {
     axios
-      .get('/panel/api/t_status')
+      .get('/panel/api/t_status', {
+        params: rid.current === null ? {} : { rid: rid.current },
+      })
       .then((response) => {
-        response.data &&
-          response.data.torrents &&
-          setTorrents(response.data.torrents);
-        if (response.data === undefined || response.data.torrents === undefined)
+        if (response.data === undefined || response.data.rid === undefined)
           setErrorMessage('There was a problem getting the list');
-        else setErrorMessage('');
+        else {
+          setTorrents((current) => mergeTorrents(current, response.data));
+          rid.current = response.data.rid;
+          setErrorMessage('');
+        }
         setFetched(true);
       })
       .catch((err) => {
@@ -124,7 +179,9 @@ const Torrent = () => {
       {renderInfoMessage()}
       {renderErrorMessage()}
       <div className={'d-flex justify-content-end'}>
-        Table refreshes every {refreshInterval / 1000} seconds.
+        {getPanelEvents() === null
+          ? `Table refreshes every ${refreshInterval / 1000} seconds.`
+          : 'Table updates as the torrents change.'}
       </div>
       <table className="table table-dark">
         <thead>
@@ -142,4 +199,4 @@ const Torrent = () => {
 };
 
 export default Torrent;
-export { getCSRFToken };
+export { getCSRFToken, getPanelEvents };
@@ -0,0 +1,21 @@
+import multiprocessing
+import os
+
+# Gunicorn reads this file from the working directory. Settings given on the command
+# line override the values below.
+bind: str = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers: int = int(
+    os.environ.get("GUNICORN_WORKERS", min(multiprocessing.cpu_count() + 1, 8))
+)
+# Open panel event streams hold a thread each, see EVENT_STREAMS_PER_PROCESS.
+threads: int = int(os.environ.get("GUNICORN_THREADS", 8))
+worker_class: str = "gthread" if threads > 1 else "sync"
+# Preloading shares the imported app between workers. A HUP only restarts the
+# workers, so new code needs a restart unless GUNICORN_PRELOAD=0.
+preload_app: bool = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+max_requests: int = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter: int = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 100))
+timeout: int = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout: int = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive: int = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+accesslog: str = os.environ.get("GUNICORN_ACCESS_LOG", "-")
@@ -1,6 +1,30 @@
 from django.contrib import admin
 
-from panel.models import MovieTorrent, MudSource
+from panel.models import (
+    MovieTorrent,
+    MudSource,
+    MediaFile,
+    MovieContentTask,
+    PipelineStage,
+    TaskRun,
+)
 
 admin.site.register(MovieTorrent)
 admin.site.register(MudSource)
+admin.site.register(MediaFile)
+admin.site.register(MovieContentTask)
+admin.site.register(PipelineStage)
+
+
+@admin.register(TaskRun)
+class TaskRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "name",
+        "state",
+        "attempt",
+        "duration",
+        "wait_seconds",
+        "started_at",
+    )
+    list_filter = ("state", "name")
+    search_fields = ("correlation_id", "task_id", "name")
@@ -5,10 +5,11 @@ import shutil
 from dataclasses import asdict, dataclass
 from datetime import datetime
 from pathlib import PosixPath, Path
+from stat import S_ISREG
 from typing import Dict, Optional, Set, List, Any, Union
 
-from celery.app.control import Inspect
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.db.models import QuerySet
 from qbittorrent import Client
 from requests.exceptions import ConnectionError
@@ -20,13 +21,35 @@ from panel.api.serializers import (
     MovieCommands,
     FilesData,
     FileCommands,
+    PipelineData,
+    TaskRunsData,
+    MovieAdd,
+    DownloadPriority,
 )
-from panel.api.utils import get_celery_nodes, is_qbittorrent_running, is_redis_online
-from panel.models import MovieTorrent
-from panel.tasks.torrent import get_qbittorrent_client, _get_media_folder
+from panel.api.utils import is_qbittorrent_running, is_redis_online
+from panel.models import MovieTorrent, MediaFile
+from panel.tasks.file_index import (
+    get_indexed_files,
+    index_folder,
+    remove_from_index,
+    remove_folders,
+)
+from panel.tasks.downloads import get_download_queue, set_download_priority
+from panel.tasks.images import IMAGES_FOLDER
+from panel.tasks.movie_import import ImportResult, enqueue_downloads, import_movies
+from panel.tasks.pipeline import get_stage_dict, get_stage_statistics, get_stages
+from panel.tasks.task_registry import revoke_tasks
+from panel.tasks.torrent import (
+    admit_downloads,
+    get_qbittorrent_client,
+    release_downloads,
+    _get_media_folder,
+)
+from panel.tasks.torrent_sync import get_info_hashes, sync_torrents
+from panel.tasks.tracing import correlation, get_task_run_dict, get_task_runs
 from stream.api.serializers import MoviesEndpointData, MoviesEndpointCommands
+from stream.cache import bump_catalog_version
 from stream.models import Movie, MovieContent, UserMovieHistory, MovieSubtitle, MyList
-from watch.celery import app
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +64,7 @@ class FilesResult:
 class TorrentProcessHandler:
     def __init__(self):
         self._client: Optional[Client] = None
+        self._snapshot: Dict[str, Any] = {}
 
     def handle(self, torrent_process: TorrentProcess) -> Dict[str, str]:
         self._check_hashes(info_hashes=torrent_process.info_hashes)
@@ -55,16 +79,32 @@ class TorrentProcessHandler:
             )
         elif torrent_process.command == "delete":
             self.client.delete(infohash_list=torrent_process.info_hashes)
+            self._release_downloads(info_hashes=torrent_process.info_hashes)
         elif torrent_process.command == "delete_permanent":
             self.client.delete_permanently(infohash_list=torrent_process.info_hashes)
+            self._release_downloads(info_hashes=torrent_process.info_hashes)
 
         return {"status": "success"}
 
+    def _release_downloads(self, info_hashes: List[str]) -> None:
+        # The qBittorrent category of a torrent is the id of its MovieTorrent.
+        categories: List[str] = [
+            str(self._snapshot["torrents"].get(info_hash, {}).get("category", ""))
+            for info_hash in info_hashes
+        ]
+        torrent_ids: List[int] = [
+            int(category) for category in categories if category.isdigit()
+        ]
+        if release_downloads(torrent_ids=torrent_ids, error="Torrent was deleted."):
+            admit_downloads.delay()
+
     def _check_hashes(self, info_hashes: List[str]) -> None:
         _hashes: Set[str] = set(info_hashes)
-        _torrents: Set[str] = {
-            torrent.get("hash") for torrent in self.client.torrents()
-        }
+        try:
+            self._snapshot = sync_torrents()
+            _torrents: Set[str] = set(get_info_hashes(self._snapshot))
+        except Exception:
+            raise APIException("Qbittorrent connection failed.")
         if not _torrents.issuperset(_hashes):
             raise NotFound("Given hash list could not be found.")
 
@@ -79,6 +119,26 @@ class TorrentProcessHandler:
         return self._client
 
 
+class DownloadQueueHandler:
+    def get(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {"downloads": get_download_queue()}
+
+    def post(
+        self, download_priority: DownloadPriority
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        try:
+            set_download_priority(
+                movie_torrent_id=download_priority.movie_torrent_id,
+                priority=download_priority.priority,
+            )
+        except MovieTorrent.DoesNotExist:
+            raise NotFound("Download could not be found.")
+        # A higher priority may move the torrent ahead of the others in the queue.
+        admit_downloads.delay()
+
+        return self.get()
+
+
 class FilesHandler:
     def __init__(self) -> None:
         self.db_files: Set[str] = set()
@@ -103,7 +163,9 @@ class FilesHandler:
 
         for movie_content in movie.movie_content.all():
             _files: Dict[str, Any] = self.get_files(
-                movie_content=movie_content, media_folder=media_folder
+                movie_content=movie_content,
+                media_folder=media_folder,
+                verify=files_data.verify,
             )
             if _files:
                 files.get("files").append(_files)
@@ -134,10 +196,12 @@ class FilesHandler:
                 logger.info(f"{str(path)} removing the file.")
                 os.remove(str(path))
 
+            remove_from_index(str(path))
+
         return "Files have been removed."
 
     def get_files(
-        self, movie_content: MovieContent, media_folder: PosixPath
+        self, movie_content: MovieContent, media_folder: PosixPath, verify: bool = False
     ) -> Dict[str, Any]:
         try:
             main_folder: PosixPath = self._get_main_folder(
@@ -149,7 +213,11 @@ class FilesHandler:
             )
             return {}
 
-        return self.get_hierarchy_of_folder(
+        indexed: "QuerySet[MediaFile]" = get_indexed_files(str(main_folder))
+        if verify or not indexed.exists():
+            index_folder(folder=str(main_folder), movie_content=movie_content)
+
+        return self.get_hierarchy_from_index(
             main_folder=main_folder, relative_folder=media_folder
         )
 
@@ -178,13 +246,14 @@ class FilesHandler:
     def get_item_dict(
         self, item: PosixPath, relative: Optional[PosixPath] = None
     ) -> Dict[str, Any]:
-        is_file: bool = item.is_file()
+        stat: os.stat_result = item.stat()
+        is_file: bool = S_ISREG(stat.st_mode)
         _dict: Dict[str, Any] = {
             "name": item.name,
             "full_path": str(item),
             "type": "file" if is_file else "folder",
-            "size": item.stat().st_size,
-            "date": datetime.fromtimestamp(item.stat().st_ctime).date(),
+            "size": stat.st_size,
+            "date": datetime.fromtimestamp(stat.st_ctime).date(),
         }
         if is_file:
             _dict["suffix"] = item.suffix
@@ -199,33 +268,53 @@ class FilesHandler:
 
         return _dict
 
-    def get_hierarchy_of_folder(
-        self, main_folder: PosixPath, relative_folder: PosixPath
+    def get_index_dict(
+        self, media_file: MediaFile, relative: PosixPath
     ) -> Dict[str, Any]:
-        files: Dict[str, Any] = self.get_item_dict(
-            item=main_folder, relative=relative_folder
-        )
+        item: PosixPath = Path(media_file.full_path)
+        _dict: Dict[str, Any] = {
+            "name": media_file.name,
+            "full_path": media_file.full_path,
+            "type": "folder" if media_file.is_dir else "file",
+            "size": media_file.size,
+            "date": datetime.fromtimestamp(media_file.ctime).date(),
+            "relative_path": str(item.relative_to(Path(relative.parent))),
+        }
+        if media_file.is_dir:
+            _dict["files"] = []
+        else:
+            _dict["suffix"] = item.suffix
+            _dict["used"] = media_file.full_path in self.db_files
 
-        self.iter_dir(folder=main_folder, parent=files, relative=relative_folder)
+        self.found_files.add(media_file.full_path)
 
-        return files
+        return _dict
 
-    def iter_dir(
-        self, folder: PosixPath, parent: Dict[str, Any], relative: PosixPath
-    ) -> None:
-        _folders: Set = set()
-        for _f in folder.iterdir():
-            if _f.is_dir():
-                _folders.add(_f)
-                continue
+    def get_hierarchy_from_index(
+        self, main_folder: PosixPath, relative_folder: PosixPath
+    ) -> Dict[str, Any]:
+        folders: Dict[str, Dict[str, Any]] = {}
+        root: Dict[str, Any] = {}
+        for media_file in get_indexed_files(str(main_folder)).order_by("full_path"):
+            _dict: Dict[str, Any] = self.get_index_dict(
+                media_file=media_file, relative=relative_folder
+            )
+            if media_file.full_path == str(main_folder):
+                root = _dict
+            else:
+                parent: Optional[Dict[str, Any]] = folders.get(
+                    os.path.dirname(media_file.full_path)
+                )
+                if parent is not None:
+                    parent["files"].append(_dict)
 
-            if _f.is_file():
-                parent["files"].append(self.get_item_dict(item=_f, relative=relative))
+            if media_file.is_dir:
+                folders[media_file.full_path] = _dict
 
-        for _f in _folders:
-            _folder = self.get_item_dict(item=_f, relative=relative)
-            parent["files"].append(_folder)
-            self.iter_dir(folder=_f, parent=_folder, relative=relative)
+        for folder in folders.values():
+            folder["files"].sort(key=lambda f: (f["type"] == "folder", f["name"]))
+
+        return root
 
     def _get_db_files(self, movie: Movie) -> Set[str]:
         db_files: Set = set()
@@ -239,6 +328,48 @@ class FilesHandler:
         return db_files
 
 
+class PipelineHandler:
+    def handle(self, pipeline_data: PipelineData) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"statistics": get_stage_statistics()}
+        if pipeline_data.movie_id is not None:
+            result["stages"] = [
+                get_stage_dict(stage)
+                for stage in get_stages(movie_id=pipeline_data.movie_id)
+            ]
+
+        return result
+
+
+class TaskRunsHandler:
+    def handle(self, task_runs_data: TaskRunsData) -> List[Dict[str, Any]]:
+        return [
+            get_task_run_dict(run)
+            for run in get_task_runs(
+                correlation_id=task_runs_data.correlation_id,
+                name=task_runs_data.name,
+                state=task_runs_data.state,
+            )[: task_runs_data.limit]
+        ]
+
+
+class MovieImportHandler:
+    def handle(self, movies: List[MovieAdd]) -> Dict[str, Any]:
+        with correlation() as correlation_id:
+            result: ImportResult = import_movies(
+                [(movie.imdb_id, movie.source) for movie in movies]
+            )
+            if result.added:
+                enqueue_downloads.delay(
+                    [movie["movie_content_id"] for movie in result.added]
+                )
+
+        return {
+            "added": result.added,
+            "skipped": result.skipped,
+            "correlation_id": correlation_id,
+        }
+
+
 class MovieManagementHandler:
     def handle(self, management: MovieManagement, user: User) -> str:
         if management.command == MovieCommands.delete_continue.value:
@@ -260,85 +391,75 @@ class MovieManagementHandler:
 
     def _delete_everything(self, movie_id: int) -> str:
         movie: Movie = Movie.objects.get(id=movie_id)
-        movie_contents: "QuerySet[MovieContent]" = movie.movie_content.all()
-        torrent_objs: "QuerySet[MovieTorrent]" = MovieTorrent.objects.filter(
-            movie_content__in=movie_contents
-        ).all()
-        subtitles: List[MovieSubtitle] = self._get_subtitles(
-            movie_contents=movie_contents
+        content_ids: List[int] = list(movie.movie_content.values_list("id", flat=True))
+        torrent_ids: List[int] = list(
+            MovieTorrent.objects.filter(movie_content_id__in=content_ids).values_list(
+                "id", flat=True
+            )
+        )
+        folders: List[str] = self._get_content_folders(content_ids=content_ids)
+        images_folder: PosixPath = (
+            Path(_get_media_folder()).resolve() / IMAGES_FOLDER / str(movie.id)
         )
+        if images_folder.is_dir():
+            folders.append(str(images_folder))
 
-        self._remove_torrents_and_files(torrent_objs=torrent_objs)
+        self._remove_torrents_and_files(torrent_ids=torrent_ids)
         try:
-            self._cancel_celery_processes(torrents=torrent_objs)
+            self._cancel_celery_processes(movie_content_ids=content_ids)
         except Exception:
             logger.exception(f"Could not stop celery processes for movie id {movie_id}")
 
-        for content in movie_contents:
-            if content.main_folder:
-                shutil.rmtree(content.main_folder, ignore_errors=True)
+        with transaction.atomic():
+            MovieSubtitle.objects.filter(moviecontent__id__in=content_ids).delete()
+            MovieTorrent.objects.filter(id__in=torrent_ids).delete()
+            MovieContent.objects.filter(id__in=content_ids).delete()
+            movie.delete()
+        bump_catalog_version()
+        if torrent_ids:
+            admit_downloads.delay()
 
-        for obj in [*subtitles, *torrent_objs, *movie_contents, movie]:
-            obj.delete()
+        if folders:
+            remove_folders.delay(paths=folders)
 
         return "Everything has been deleted."
 
-    def _remove_torrents_and_files(
-        self, torrent_objs: "QuerySet[MovieTorrent]"
-    ) -> None:
-        if not is_qbittorrent_running():
-            return
-
-        client: Client = get_qbittorrent_client()
-        for torrent in torrent_objs:
-            _res: List[Dict[str, Any]] = client.torrents(category=str(torrent.id))
-            client.delete_permanently(
-                infohash_list=self._get_hash_from_client_result(torrent=_res)
-            )
+    @staticmethod
+    def _get_content_folders(content_ids: List[int]) -> List[str]:
+        media_folder: PosixPath = Path(_get_media_folder()).resolve()
+        folders: List[str] = []
+        for main_folder in MovieContent.objects.filter(id__in=content_ids).values_list(
+            "main_folder", flat=True
+        ):
+            if not main_folder:
+                continue
 
-    def _get_hash_from_client_result(self, torrent: List[Dict[str, Any]]) -> List[str]:
-        hashes: List[str] = []
-        for _t in torrent:
-            if _t.get("hash", False):
-                hashes.append(_t.get("hash"))
+            folder: PosixPath = (media_folder / main_folder).resolve()
+            if media_folder in folder.parents:
+                folders.append(str(folder))
 
-        return hashes
+        return folders
 
-    def _cancel_celery_processes(self, torrents: "QuerySet[MovieTorrent]") -> None:
-        torrents = [torrent.id for torrent in torrents]
-        if not torrents:
+    def _remove_torrents_and_files(self, torrent_ids: List[int]) -> None:
+        if not torrent_ids or not is_qbittorrent_running():
             return
 
-        if not is_redis_online():
-            return
-
-        processes: List[Any] = []
-        try:
-            nodes: List[str] = get_celery_nodes()
-        except Exception:
+        client: Client = get_qbittorrent_client()
+        categories: Set[str] = {str(torrent_id) for torrent_id in torrent_ids}
+        hashes: List[str] = [
+            torrent.get("hash")
+            for torrent in client.torrents()
+            if torrent.get("category") in categories and torrent.get("hash")
+        ]
+        if hashes:
+            client.delete_permanently(infohash_list=hashes)
+
+    def _cancel_celery_processes(self, movie_content_ids: List[int]) -> None:
+        if not movie_content_ids or not is_redis_online():
             return
 
-        inspect: Inspect = app.control.inspect(nodes)
-        [processes.extend(process) for process in inspect.active().values()]
-        [processes.extend(process) for process in inspect.reserved().values()]
-        [processes.extend(process) for process in inspect.scheduled().values()]
-
-        for process in processes:
-            if process.get("id"):
-                app.control.revoke(process.get("id"))
-
-            if process.get("request") and process.get("request", {}).get("id"):
-                app.control.revoke(process.get("request", {}).get("id"))
-
-    def _get_subtitles(
-        self, movie_contents: "QuerySet[MovieContent]"
-    ) -> List[MovieSubtitle]:
-        subtitles: List[MovieSubtitle] = []
-        for content in movie_contents:
-            subs: List[MovieSubtitle] = list(content.movie_subtitle.all())
-            subtitles.extend(subs)
-
-        return subtitles
+        revoked: List[str] = revoke_tasks(movie_content_ids=movie_content_ids)
+        logger.info(f"{len(revoked)} tasks are revoked for {movie_content_ids}")
 
 
 class MoviesEndpointHandler:
@@ -348,24 +469,16 @@ class MoviesEndpointHandler:
         except Movie.DoesNotExist:
             raise NotFound(f"Movie {movies_data.movie_id} could not be found.")
 
-        existing: QuerySet[MyList] = MyList.objects.filter(
-            movie=movies_data.movie_id
-        ).filter(user=user)
-
         if movies_data.command == MoviesEndpointCommands.add_to_my_list.value:
-            if existing.exists():
-                if len(existing) == 1:
-                    return f"{movie.title} is already on your list."
-                else:
-                    existing.delete()
-
-            MyList.objects.create(movie=movie, user=user)
+            _, created = MyList.objects.get_or_create(movie=movie, user=user)
+            if not created:
+                return f"{movie.title} is already on your list."
 
             return f"{movie.title} has been added to your list."
 
         elif movies_data.command == MoviesEndpointCommands.remove_from_my_list.value:
-            if existing.exists():
-                existing.delete()
+            deleted, _ = MyList.objects.filter(movie=movie, user=user).delete()
+            if deleted:
                 return f"{movie.title} has been removed form your list."
 
             return f"{movie.title} could not be found on your list."
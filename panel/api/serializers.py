@@ -1,14 +1,16 @@
+import csv
 from dataclasses import dataclass
 from enum import Enum
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Set, Optional
 
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from panel.api.utils import DotenvFilter
-from panel.models import MudSource
+from panel.models import MudSource, TaskState
 from stream.models import Movie
 
+MAX_IMPORTED_MOVIES: int = 1000
 TORRENT_COMMANDS: List[str] = [
     "pause",
     "force_start",
@@ -32,6 +34,26 @@ class FilesData:
     movie_id: int
     command: str
     files: List[Dict[str, Any]]
+    verify: bool = False
+
+
+@dataclass
+class PipelineData:
+    movie_id: Optional[int] = None
+
+
+@dataclass
+class TaskRunsData:
+    correlation_id: Optional[str] = None
+    name: Optional[str] = None
+    state: Optional[str] = None
+    limit: int = 100
+
+
+@dataclass
+class DownloadPriority:
+    movie_torrent_id: int
+    priority: int
 
 
 @dataclass
@@ -76,6 +98,26 @@ class TorrentSerializer(serializers.Serializer):
         )
 
 
+class DownloadPrioritySerializer(serializers.Serializer):
+    movieTorrentId = serializers.IntegerField(required=True)
+    priority = serializers.IntegerField(required=True, min_value=-100, max_value=100)
+
+    @property
+    def object(self) -> DownloadPriority:
+        return DownloadPriority(
+            movie_torrent_id=self.validated_data["movieTorrentId"],
+            priority=self.validated_data["priority"],
+        )
+
+
+class TorrentStatusSerializer(serializers.Serializer):
+    rid = serializers.IntegerField(required=False, min_value=0)
+
+    @property
+    def object(self) -> Optional[int]:
+        return self.validated_data.get("rid")
+
+
 class CelerySerializer(serializers.Serializer):
     processId = serializers.CharField(max_length=100, required=True)
 
@@ -94,6 +136,7 @@ class FilesSerializer(serializers.Serializer):
     files = serializers.ListField(
         child=serializers.DictField(required=True), required=False
     )
+    verify = serializers.BooleanField(required=False, default=False)
 
     @property
     def object(self) -> FilesData:
@@ -101,6 +144,31 @@ class FilesSerializer(serializers.Serializer):
             movie_id=self.validated_data["movieId"],
             command=self.validated_data.get("command"),
             files=self.validated_data.get("files", []),
+            verify=self.validated_data.get("verify", False),
+        )
+
+
+class PipelineSerializer(serializers.Serializer):
+    movieId = serializers.IntegerField(required=False)
+
+    @property
+    def object(self) -> PipelineData:
+        return PipelineData(movie_id=self.validated_data.get("movieId"))
+
+
+class TaskRunsSerializer(serializers.Serializer):
+    correlationId = serializers.CharField(required=False, max_length=255)
+    name = serializers.CharField(required=False, max_length=255)
+    state = serializers.ChoiceField(choices=TaskState.values, required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=1000)
+
+    @property
+    def object(self) -> TaskRunsData:
+        return TaskRunsData(
+            correlation_id=self.validated_data.get("correlationId"),
+            name=self.validated_data.get("name"),
+            state=self.validated_data.get("state"),
+            limit=self.validated_data.get("limit", 100),
         )
 
 
@@ -130,6 +198,58 @@ class MovieAddSerializer(serializers.Serializer):
         )
 
 
+class MovieImportSerializer(serializers.Serializer):
+    """Either a list of {"imdbId", "source"} or csv rows of imdb id and source."""
+
+    movies = MovieAddSerializer(many=True, required=False)
+    csv = serializers.CharField(required=False, allow_blank=False)
+
+    def _parse_csv(self, text: str) -> List[Dict[str, str]]:
+        rows: List[List[str]] = [
+            row
+            for row in csv.reader(text.splitlines())
+            if any(cell.strip() for cell in row)
+        ]
+        if rows and rows[0][0].strip().lower() in {"imdbid", "imdb_id", "imdb"}:
+            rows = rows[1:]
+
+        movies: List[Dict[str, str]] = []
+        for line, row in enumerate(rows, start=1):
+            if len(row) != 2:
+                raise ValidationError(
+                    {"csv": f"Row {line} must have an imdb id and a source."}
+                )
+            movies.append({"imdbId": row[0].strip(), "source": row[1].strip()})
+
+        serializer = MovieAddSerializer(data=movies, many=True)
+        if not serializer.is_valid():
+            raise ValidationError({"csv": serializer.errors})
+
+        return serializer.validated_data
+
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        movies: List[Dict[str, str]] = list(attrs.get("movies", []))
+        if attrs.get("csv"):
+            movies += self._parse_csv(attrs["csv"])
+
+        if not movies:
+            raise ValidationError("Either movies or csv is required.")
+        if len(movies) > MAX_IMPORTED_MOVIES:
+            raise ValidationError(
+                f"At most {MAX_IMPORTED_MOVIES} movies can be imported at once."
+            )
+
+        attrs["movies"] = movies
+        return attrs
+
+    @property
+    def object(self) -> List[MovieAdd]:
+        return [
+            MovieAdd(imdb_id=movie["imdbId"], source=movie["source"])
+            for movie in self.validated_data["movies"]
+        ]
+
+
 class GlobalSettingsSerializer(serializers.Serializer):
     dotenv = serializers.DictField(required=True)
 
@@ -0,0 +1,188 @@
+from datetime import timedelta
+from pathlib import PosixPath
+from typing import Any, Dict
+
+import pytest
+from django.conf import settings
+from django.utils import timezone
+from pytest_mock import MockerFixture
+
+from panel.api.handlers import (
+    FilesHandler,
+    FilesResult,
+    MovieManagementHandler,
+    TorrentProcessHandler,
+)
+from panel.api.serializers import FilesData, TorrentProcess
+from panel.models import MediaFile, MovieTorrent
+from panel.tasks.file_index import remove_folders
+from panel.tests.factories import MovieTorrentFactory
+from stream.models import Movie, MovieContent, MovieSubtitle
+from stream.tests.factories import (
+    MovieContentFactory,
+    MovieFactory,
+    MovieSubtitleFactory,
+)
+
+
+@pytest.fixture
+def movie(tmp_path: PosixPath, mocker: MockerFixture) -> Movie:
+    mocker.patch.object(settings, "MEDIA_FOLDER", str(tmp_path))
+    folder: PosixPath = tmp_path / "abc"
+    (folder / "vtt_subtitles").mkdir(parents=True)
+    (folder / "abc.mp4").write_bytes(b"video")
+    (folder / "vtt_subtitles" / "eng1.vtt").write_bytes(b"vtt")
+    movie_content: MovieContent = MovieContentFactory(
+        main_folder="abc",
+        full_path=str(folder / "abc.mp4"),
+    )
+
+    return MovieFactory(movie_content=[movie_content])
+
+
+@pytest.mark.usefixtures("db")
+class TestFilesHandler:
+    def test_returns_hierarchy(self, movie: Movie, tmp_path: PosixPath) -> None:
+        result: FilesResult = FilesHandler().get(
+            files_data=FilesData(movie_id=movie.id, command="", files=[])
+        )
+
+        root: Dict[str, Any] = result.files[0]
+        assert root["full_path"] == str(tmp_path)
+        main: Dict[str, Any] = root["files"][0]
+        assert main["name"] == "abc"
+        assert main["relative_path"] == f"{tmp_path.name}/abc"
+        assert [(f["name"], f["type"]) for f in main["files"]] == [
+            ("abc.mp4", "file"),
+            ("vtt_subtitles", "folder"),
+        ]
+        assert main["files"][0]["used"] is True
+        assert main["files"][0]["size"] == 5
+        assert main["files"][1]["files"][0]["name"] == "eng1.vtt"
+        assert result.missing_files == set()
+
+    def test_answers_from_index(self, movie: Movie, tmp_path: PosixPath) -> None:
+        data: FilesData = FilesData(movie_id=movie.id, command="", files=[])
+        FilesHandler().get(files_data=data)
+        (tmp_path / "abc" / "abc.mp4").unlink()
+
+        result: FilesResult = FilesHandler().get(files_data=data)
+
+        assert result.missing_files == set()
+
+        data.verify = True
+        result = FilesHandler().get(files_data=data)
+
+        assert result.missing_files == {str(tmp_path / "abc" / "abc.mp4")}
+        assert not MediaFile.objects.filter(
+            full_path=str(tmp_path / "abc" / "abc.mp4")
+        ).exists()
+
+    def test_remove_files_updates_index(
+        self, movie: Movie, tmp_path: PosixPath
+    ) -> None:
+        FilesHandler().get(
+            files_data=FilesData(movie_id=movie.id, command="", files=[])
+        )
+        subtitles: PosixPath = tmp_path / "abc" / "vtt_subtitles"
+
+        FilesHandler().post(
+            files_data=FilesData(
+                movie_id=movie.id,
+                command="deleteFiles",
+                files=[{"full_path": str(subtitles)}],
+            )
+        )
+
+        assert not subtitles.exists()
+        assert not MediaFile.objects.filter(
+            full_path__startswith=str(subtitles)
+        ).exists()
+
+
+@pytest.mark.usefixtures("db")
+class TestMovieManagementHandler:
+    def test_delete_everything(
+        self, movie: Movie, tmp_path: PosixPath, mocker: MockerFixture
+    ) -> None:
+        mocker.patch("panel.api.handlers.is_qbittorrent_running", return_value=True)
+        mocker.patch("panel.api.handlers.is_redis_online", return_value=True)
+        client = mocker.patch("panel.api.handlers.get_qbittorrent_client")
+        revoke = mocker.patch("panel.api.handlers.revoke_tasks", return_value=[])
+        remove_folders = mocker.patch("panel.api.handlers.remove_folders.delay")
+        admit_downloads = mocker.patch("panel.api.handlers.admit_downloads.delay")
+        movie_content: MovieContent = movie.movie_content.first()
+        subtitle: MovieSubtitle = MovieSubtitleFactory()
+        movie_content.movie_subtitle.add(subtitle)
+        movie_torrent: MovieTorrent = MovieTorrentFactory(movie_content=movie_content)
+        other: MovieTorrent = MovieTorrentFactory()
+        client.return_value.torrents.return_value = [
+            {"hash": "aaa", "category": str(movie_torrent.id)},
+            {"hash": "bbb", "category": str(other.id)},
+        ]
+
+        result: str = MovieManagementHandler()._delete_everything(movie_id=movie.id)
+
+        assert result == "Everything has been deleted."
+        client.return_value.torrents.assert_called_once_with()
+        client.return_value.delete_permanently.assert_called_once_with(
+            infohash_list=["aaa"]
+        )
+        revoke.assert_called_once_with(movie_content_ids=[movie_content.id])
+        remove_folders.assert_called_once_with(paths=[str(tmp_path / "abc")])
+        admit_downloads.assert_called_once_with()
+        assert not Movie.objects.filter(id=movie.id).exists()
+        assert not MovieContent.objects.filter(id=movie_content.id).exists()
+        assert not MovieSubtitle.objects.filter(id=subtitle.id).exists()
+        assert not MovieTorrent.objects.filter(id=movie_torrent.id).exists()
+        assert MovieTorrent.objects.filter(id=other.id).exists()
+
+    def test_delete_everything_removes_images(
+        self, movie: Movie, tmp_path: PosixPath, mocker: MockerFixture
+    ) -> None:
+        mocker.patch("panel.api.handlers.is_qbittorrent_running", return_value=False)
+        mocker.patch("panel.api.handlers.is_redis_online", return_value=True)
+        mocker.patch("panel.api.handlers.revoke_tasks", return_value=[])
+        remove_folders = mocker.patch("panel.api.handlers.remove_folders.delay")
+        images: PosixPath = tmp_path / "images" / str(movie.id)
+        images.mkdir(parents=True)
+
+        MovieManagementHandler()._delete_everything(movie_id=movie.id)
+
+        remove_folders.assert_called_once_with(
+            paths=[str(tmp_path / "abc"), str(images)]
+        )
+
+
+@pytest.mark.usefixtures("db")
+def test_deleting_a_torrent_releases_its_download_slot(mocker: MockerFixture) -> None:
+    movie_torrent: MovieTorrent = MovieTorrentFactory(
+        admitted_at=timezone.now() - timedelta(hours=1)
+    )
+    mocker.patch(
+        "panel.api.handlers.sync_torrents",
+        return_value={"torrents": {"aaa": {"category": str(movie_torrent.id)}}},
+    )
+    client = mocker.patch("panel.api.handlers.get_qbittorrent_client")
+    admit_downloads = mocker.patch("panel.api.handlers.admit_downloads.delay")
+
+    TorrentProcessHandler().handle(
+        TorrentProcess(info_hashes=["aaa"], command="delete")
+    )
+
+    client.return_value.delete.assert_called_once_with(infohash_list=["aaa"])
+    movie_torrent.refresh_from_db()
+    assert movie_torrent.error == "Torrent was deleted."
+    admit_downloads.assert_called_once_with()
+
+
+def test_remove_folders(tmp_path: PosixPath, mocker: MockerFixture) -> None:
+    remove_from_index = mocker.patch("panel.tasks.file_index.remove_from_index")
+    folder: PosixPath = tmp_path / "abc"
+    folder.mkdir()
+    (folder / "movie.mp4").touch()
+
+    remove_folders(paths=[str(folder)])
+
+    assert not folder.exists()
+    remove_from_index.assert_called_once_with(str(folder))
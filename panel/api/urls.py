@@ -5,13 +5,17 @@ from . import views
 urlpatterns = [
     path("t_status", views.TorrentEndpoint.as_view(), name="background_management"),
     path("celery", views.CeleryEndpoint.as_view(), name="celery_endpoint"),
+    path("downloads", views.DownloadQueueEndpoint.as_view(), name="download_queue"),
     path(
         "movie-management",
         views.MovieManagementEndpoint.as_view(),
         name="movie_management",
     ),
     path("files", views.FilesEndpoint.as_view(), name="files"),
+    path("pipeline", views.PipelineEndpoint.as_view(), name="pipeline"),
+    path("task-runs", views.TaskRunsEndpoint.as_view(), name="task_runs"),
     path("add-movie", views.MovieAddEndpoint.as_view(), name="add_movie"),
+    path("import-movies", views.MovieImportEndpoint.as_view(), name="import_movies"),
     path(
         "global-settings",
         views.GlobalSettingsEndpoint.as_view(),
@@ -9,7 +9,9 @@ from django.db.models import QuerySet
 from redis import Redis
 from rest_framework.exceptions import APIException
 
+from panel.tasks.movie_import import parse_imdb_id
 from panel.tasks.torrent import get_qbittorrent_client
+from panel.tasks.tracing import correlation
 from stream.models import Movie, MovieContent
 from watch.celery import app
 from watch.settings.base import CELERY_BROKER_URL
@@ -75,12 +77,20 @@ class AddMovieHandler:
     def __init__(self, source: str, imdb_id: str) -> None:
         self.source: str = source
         self._imdb: str = imdb_id
+        self.correlation_id: Optional[str] = None
 
     def handle(self) -> str:
+        # Every task of the ingest chain started from here shares the correlation id.
+        with correlation() as correlation_id:
+            self.correlation_id = correlation_id
+            logger.info(
+                f"Add movie requested for {self.imdb_id}, correlation id {correlation_id}"
+            )
+            return self._add()
+
+    def _add(self) -> str:
         from panel.tasks.torrent import download_torrent
 
-        logger.info(f"Add movie requested for {self.imdb_id}")
-
         existing_movies: "QuerySet[Movie]" = Movie.objects.filter(
             imdb_id=self.imdb_id
         ).all()
@@ -121,13 +131,7 @@ class AddMovieHandler:
 
     @property
     def imdb_id(self) -> str:
-        imdb: str = self._imdb
-        if len(imdb) > 9 and "title/" in imdb:
-            _imdb: str = imdb.split("title/")[1].split("/")[0]
-            if 9 <= len(_imdb) <= 13:
-                return _imdb
-
-        return imdb
+        return parse_imdb_id(self._imdb)
 
 
 def get_dotenv_location() -> str:
@@ -1,12 +1,10 @@
 import logging
 from dataclasses import asdict
-from typing import List, Dict, Any
+from typing import Dict, Any
 
 import dotenv
-from celery.app.control import Inspect
 from django.conf import settings
 from django.contrib.auth.models import User
-from qbittorrent import Client
 from rest_framework import status, generics
 from rest_framework.exceptions import APIException, NotFound
 from rest_framework.generics import GenericAPIView
@@ -20,6 +18,10 @@ from panel.api.handlers import (
     FilesHandler,
     MovieManagementHandler,
     FilesResult,
+    PipelineHandler,
+    TaskRunsHandler,
+    MovieImportHandler,
+    DownloadQueueHandler,
 )
 from panel.api.serializers import (
     TorrentSerializer,
@@ -30,9 +32,13 @@ from panel.api.serializers import (
     GlobalSettingsSerializer,
     MudSourceSerializer,
     RedownloadSubtitlesSerializer,
+    PipelineSerializer,
+    TaskRunsSerializer,
+    MovieImportSerializer,
+    DownloadPrioritySerializer,
+    TorrentStatusSerializer,
 )
 from panel.api.utils import (
-    get_celery_nodes,
     is_redis_online,
     AddMovieHandler,
     is_qbittorrent_running,
@@ -46,8 +52,8 @@ from panel.management.commands import superuser
 from panel.models import MudSource
 from panel.tasks import redownload_subtitles
 from panel.tasks.inmemory import set_redis
-from panel.tasks.torrent import get_qbittorrent_client
-from watch.celery import app
+from panel.tasks.task_registry import get_task_status, revoke_task_ids
+from panel.tasks.torrent_sync import get_torrent_delta, get_torrent_list, sync_torrents
 
 logger = logging.getLogger(__name__)
 
@@ -59,13 +65,19 @@ class TorrentEndpoint(GenericAPIView):
     verbose_request_logging = True
 
     def get(self, request: Request) -> Response:
+        serializer = TorrentStatusSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
         try:
-            client: Client = get_qbittorrent_client()
+            snapshot: Dict[str, Any] = sync_torrents()
         except Exception:
             raise APIException("Qbittorrent connection failed.")
 
+        # Pages that send the rid of their last response only get what changed since.
+        if serializer.object is not None:
+            return Response(get_torrent_delta(snapshot, rid=serializer.object))
+
         return Response(
-            {"torrents": client.torrents()},
+            {"torrents": get_torrent_list(snapshot), "rid": snapshot["revision"]},
             status=status.HTTP_200_OK,
         )
 
@@ -83,6 +95,23 @@ class TorrentEndpoint(GenericAPIView):
         return Response(handler)
 
 
+class DownloadQueueEndpoint(GenericAPIView):
+    serializer_class = DownloadPrioritySerializer
+    handler_class = DownloadQueueHandler
+    permission_classes = [DemoOrIsAuthenticated]
+    verbose_request_logging = True
+
+    def get(self, request: Request) -> Response:
+        return Response(self.handler_class().get())
+
+    @check_demo
+    def post(self, request: Request) -> Response:
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(self.handler_class().post(download_priority=serializer.object))
+
+
 class CeleryEndpoint(GenericAPIView):
     serializer_class = CelerySerializer
     permission_classes = [DemoOrIsAuthenticated]
@@ -92,19 +121,7 @@ class CeleryEndpoint(GenericAPIView):
         if not is_redis_online():
             raise APIException("Redis is offline.")
 
-        nodes: List[str] = get_celery_nodes()
-        logger.info(f"Celery nodes: {nodes}")
-
-        inspect: Inspect = app.control.inspect(nodes)
-
-        return Response(
-            {
-                "active": self._concatenate(inspect.active()),
-                "reserved": self._concatenate(inspect.reserved()),
-                "scheduled": self._concatenate(inspect.scheduled()),
-            },
-            status=status.HTTP_200_OK,
-        )
+        return Response(get_task_status(), status=status.HTTP_200_OK)
 
     @check_demo
     def post(self, request: Request) -> Response:
@@ -113,23 +130,10 @@ class CeleryEndpoint(GenericAPIView):
         if not is_redis_online():
             raise APIException("RabbitMQ is not running. Cannot process the request.")
 
-        app.control.revoke(serializer.object.process_id)
+        revoke_task_ids(task_ids=[serializer.object.process_id])
 
         return Response({"status": "success"})
 
-    @staticmethod
-    def _concatenate(
-        node_result: Dict[str, List[Dict[str, Any]]]
-    ) -> List[Dict[str, Any]]:
-        if not node_result:
-            return []
-
-        _result: List[Dict[str, Any]] = []
-        for value in node_result.values():
-            _result += value
-
-        return _result
-
 
 class FilesEndpoint(GenericAPIView):
     serializer_class = FilesSerializer
@@ -183,6 +187,32 @@ class MovieManagementEndpoint(GenericAPIView):
         return Response({"operation": result})
 
 
+class PipelineEndpoint(GenericAPIView):
+    serializer_class = PipelineSerializer
+    handler_class = PipelineHandler
+    permission_classes = [DemoOrIsAuthenticated]
+    verbose_request_logging = True
+
+    def get(self, request: Request) -> Response:
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(self.handler_class().handle(pipeline_data=serializer.object))
+
+
+class TaskRunsEndpoint(GenericAPIView):
+    serializer_class = TaskRunsSerializer
+    handler_class = TaskRunsHandler
+    permission_classes = [DemoOrIsAuthenticated]
+    verbose_request_logging = True
+
+    def get(self, request: Request) -> Response:
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(self.handler_class().handle(task_runs_data=serializer.object))
+
+
 class MovieAddEndpoint(GenericAPIView):
     serializer_class = MovieAddSerializer
     permission_classes = [DemoOrIsAuthenticated]
@@ -193,11 +223,26 @@ class MovieAddEndpoint(GenericAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        result: str = AddMovieHandler(
+        handler: AddMovieHandler = AddMovieHandler(
             source=serializer.object.source, imdb_id=serializer.object.imdb_id
-        ).handle()
+        )
+        result: str = handler.handle()
 
-        return Response({"operation": result})
+        return Response({"operation": result, "correlation_id": handler.correlation_id})
+
+
+class MovieImportEndpoint(GenericAPIView):
+    serializer_class = MovieImportSerializer
+    handler_class = MovieImportHandler
+    permission_classes = [DemoOrIsAuthenticated]
+    verbose_request_logging = True
+
+    @check_demo
+    def post(self, request: Request) -> Response:
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(self.handler_class().handle(movies=serializer.object))
 
 
 class GlobalSettingsEndpoint(GenericAPIView):
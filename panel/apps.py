@@ -3,6 +3,9 @@ import os
 from typing import Optional
 
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+from watch.database import configure_sqlite
 
 logger = logging.getLogger(__name__)
 
@@ -38,4 +41,12 @@ class PanelConfig(AppConfig):
     name = "panel"
 
     def ready(self):
+        # Registers the celery signal handlers
+        from panel.tasks import task_registry  # noqa: F401
+        from panel.tasks.tracing import render_task_metrics
+        from watch.metrics import REGISTRY
+
+        REGISTRY.register_collector(render_task_metrics)
+
+        connection_created.connect(configure_sqlite)
         process_demo_setting()
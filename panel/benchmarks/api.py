@@ -0,0 +1,229 @@
+import logging
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from panel.tasks.pipeline import percentile
+from stream.models import Movie, MovieContent, MovieDBCategory, MovieSubtitle
+from stream.tests.factories import (
+    MovieContentFactory,
+    MovieFactory,
+    MovieSubtitleFactory,
+    UserFactory,
+    UserMovieHistoryFactory,
+)
+
+logger = logging.getLogger(__name__)
+
+LANGS: List[str] = ["eng", "tur", "ger", "fre", "spa"]
+
+
+@dataclass
+class EndpointResult:
+    name: str
+    movies: int
+    status_code: int = 0
+    cold_seconds: float = 0.0
+    cold_queries: int = 0
+    warm_queries: int = 0
+    response_bytes: int = 0
+    warm_seconds: List[float] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = asdict(self)
+        result.pop("warm_seconds")
+        result["warm_seconds_p50"] = percentile(self.warm_seconds, 50)
+        result["warm_seconds_p95"] = percentile(self.warm_seconds, 95)
+
+        return result
+
+
+def _bulk_link(through: Any, rows: List[Dict[str, int]], batch_size: int) -> None:
+    through.objects.bulk_create([through(**row) for row in rows], batch_size=batch_size)
+
+
+def seed_database(
+    movies: int,
+    users: int = 10,
+    contents_per_movie: int = 2,
+    subtitles_per_content: int = 2,
+    histories_per_user: int = 20,
+    batch_size: int = 1000,
+) -> List[User]:
+    """Factories build the rows, they are inserted in batches to reach 100k movies."""
+    rng: random.Random = random.Random(movies)
+    categories: List[int] = list(
+        MovieDBCategory.objects.values_list("moviedb_id", flat=True)
+    )
+
+    for start in range(0, movies, batch_size):
+        count: int = min(batch_size, movies - start)
+        created_movies: List[Movie] = Movie.objects.bulk_create(
+            [
+                MovieFactory.build(
+                    title=f"Movie {start + index}",
+                    imdb_id=f"tt{start + index:08}",
+                    is_ready=True,
+                    is_playable=True,
+                    max_resolution_width=1920,
+                    max_resolution_height=1080,
+                    subtitle_languages=LANGS[:subtitles_per_content],
+                )
+                for index in range(count)
+            ]
+        )
+        contents: List[MovieContent] = MovieContent.objects.bulk_create(
+            [
+                MovieContentFactory.build(
+                    is_ready=True,
+                    full_path=f"/media/{movie.imdb_id}/{index}.mp4",
+                    relative_path=f"{movie.imdb_id}/{index}.mp4",
+                    file_name=f"{index}",
+                    file_extension=".mp4",
+                    resolution_width=1920,
+                    resolution_height=1080,
+                )
+                for movie in created_movies
+                for index in range(contents_per_movie)
+            ]
+        )
+        subtitles: List[MovieSubtitle] = MovieSubtitle.objects.bulk_create(
+            [
+                MovieSubtitleFactory.build(
+                    full_path=f"{content.full_path}.{lang}.vtt",
+                    relative_path=f"{content.relative_path}.{lang}.vtt",
+                    file_name=f"{lang}.vtt",
+                    suffix=".vtt",
+                    lang_three=lang,
+                )
+                for content in contents
+                for lang in LANGS[:subtitles_per_content]
+            ]
+        )
+
+        # Django 3.2 sets the primary keys after bulk_create on PostgreSQL only, on
+        # SQLite the rows of this batch are read back in insertion order.
+        if created_movies and created_movies[0].pk is None:
+            created_movies = list(Movie.objects.order_by("-id")[:count][::-1])
+            contents = list(MovieContent.objects.order_by("-id")[: len(contents)][::-1])
+            subtitles = list(
+                MovieSubtitle.objects.order_by("-id")[: len(subtitles)][::-1]
+            )
+
+        _bulk_link(
+            Movie.movie_content.through,
+            [
+                {"movie_id": movie.id, "moviecontent_id": content.id}
+                for index, movie in enumerate(created_movies)
+                for content in contents[
+                    index * contents_per_movie : (index + 1) * contents_per_movie
+                ]
+            ],
+            batch_size,
+        )
+        _bulk_link(
+            MovieContent.movie_subtitle.through,
+            [
+                {"moviecontent_id": content.id, "moviesubtitle_id": subtitle.id}
+                for index, content in enumerate(contents)
+                for subtitle in subtitles[
+                    index * subtitles_per_content : (index + 1) * subtitles_per_content
+                ]
+            ],
+            batch_size,
+        )
+        if categories:
+            _bulk_link(
+                Movie.moviedb_category.through,
+                [
+                    {"movie_id": movie.id, "moviedbcategory_id": category}
+                    for movie in created_movies
+                    for category in rng.sample(categories, min(2, len(categories)))
+                ],
+                batch_size,
+            )
+        logger.info(f"{start + count}/{movies} movies are created")
+
+    movie_ids: List[int] = list(Movie.objects.values_list("id", flat=True))
+    created_users: List[User] = []
+    for index in range(users):
+        user: User = UserFactory(username=f"benchmark_user_{movies}_{index}")
+        created_users.append(user)
+        for movie_id in rng.sample(movie_ids, min(histories_per_user, len(movie_ids))):
+            UserMovieHistoryFactory(
+                user=user,
+                movie_id=movie_id,
+                current_second=rng.randint(1, 3600),
+                remaining_seconds=rng.randint(1, 3600),
+            )
+
+    return created_users
+
+
+def measure_endpoint(
+    client: Client, name: str, url: str, movies: int, repeat: int = 10
+) -> EndpointResult:
+    result: EndpointResult = EndpointResult(name=name, movies=movies)
+
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        started: float = time.perf_counter()
+        response = client.get(url)
+        result.cold_seconds = time.perf_counter() - started
+    result.cold_queries = len(queries)
+    result.status_code = response.status_code
+    result.response_bytes = len(response.content)
+
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            client.get(url)
+            result.warm_seconds.append(time.perf_counter() - started)
+        result.warm_queries = len(queries)
+
+    return result
+
+
+def get_endpoints(movie_id: Optional[int]) -> Dict[str, str]:
+    endpoints: Dict[str, str] = {
+        "/api/movies": reverse("stream:movies_api"),
+        "/api/categories": reverse("stream:categories_api"),
+        "/api/continue-movie-list": reverse("stream:continue_movie_list"),
+    }
+    if movie_id is not None:
+        endpoints["watch"] = reverse("stream:watch", kwargs={"movie_id": movie_id})
+
+    return endpoints
+
+
+def run_endpoints(movies: int, user: User, repeat: int = 10) -> List[EndpointResult]:
+    client: Client = Client()
+    client.force_login(user)
+    movie_id: Optional[int] = (
+        Movie.objects.filter(history__user=user).values_list("id", flat=True).first()
+    )
+
+    # The harness runs against a fresh database, the settings pages are not filled.
+    with mock.patch("panel.decorators.are_settings_filled", return_value=True):
+        return [
+            measure_endpoint(client, name=name, url=url, movies=movies, repeat=repeat)
+            for name, url in get_endpoints(movie_id=movie_id).items()
+        ]
+
+
+def find_query_growth(results: List[EndpointResult]) -> List[str]:
+    """Endpoints whose query count changes with the number of movies."""
+    queries: Dict[str, set] = {}
+    for result in results:
+        queries.setdefault(result.name, set()).add(result.cold_queries)
+
+    return sorted(name for name, counts in queries.items() if len(counts) > 1)
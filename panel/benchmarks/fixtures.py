@@ -0,0 +1,160 @@
+import subprocess
+from dataclasses import dataclass
+from pathlib import PosixPath
+from typing import Any, Dict, List, Optional
+
+SUBTITLE_LANGS: List[str] = ["eng", "tur", "ger", "fre"]
+
+
+@dataclass
+class MediaFixture:
+    """A synthetic torrent folder, the video is generated with ffmpeg."""
+
+    name: str
+    container: str
+    width: int
+    height: int
+    duration: int
+    audio_streams: int = 1
+    subtitle_streams: int = 0
+    # Folders the video is nested in, torrents often wrap the movie in a few of them.
+    depth: int = 0
+    srt_files: int = 2
+    srt_cues: int = 1500
+
+
+FIXTURES: List[MediaFixture] = [
+    MediaFixture(name="mp4-720p", container="mp4", width=1280, height=720, duration=30),
+    MediaFixture(
+        name="mkv-1080p-multi-audio",
+        container="mkv",
+        width=1920,
+        height=1080,
+        duration=60,
+        audio_streams=3,
+        subtitle_streams=2,
+    ),
+    MediaFixture(
+        name="mkv-1080p-nested",
+        container="mkv",
+        width=1920,
+        height=1080,
+        duration=30,
+        depth=3,
+    ),
+    MediaFixture(
+        name="mkv-2160p-long",
+        container="mkv",
+        width=3840,
+        height=2160,
+        duration=300,
+        audio_streams=2,
+        subtitle_streams=4,
+        srt_files=4,
+    ),
+]
+
+
+def get_fixture(name: str) -> Optional[MediaFixture]:
+    return next((fixture for fixture in FIXTURES if fixture.name == name), None)
+
+
+def _format_timestamp(milliseconds: int) -> str:
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+
+    return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
+
+
+def write_srt(path: PosixPath, cues: int) -> PosixPath:
+    with open(str(path), "w") as f:
+        for index in range(cues):
+            start: int = index * 2000
+            f.write(f"{index + 1}\n")
+            f.write(
+                f"{_format_timestamp(start)} --> {_format_timestamp(start + 1500)}\n"
+            )
+            f.write(f"Subtitle line number {index + 1}\n\n")
+
+    return path
+
+
+def get_ffmpeg_command(fixture: MediaFixture, output: PosixPath) -> List[str]:
+    # Video and audio are encoded with the fastest settings, only the size and the
+    # stream layout matter to the ingest pipeline, which copies streams.
+    command: List[str] = [
+        "ffmpeg",
+        "-y",
+        "-v",
+        "error",
+        "-f",
+        "lavfi",
+        "-i",
+        f"testsrc2=size={fixture.width}x{fixture.height}:rate=24:duration={fixture.duration}",
+    ]
+    for index in range(fixture.audio_streams):
+        command += [
+            "-f",
+            "lavfi",
+            "-i",
+            f"sine=frequency={440 + index * 110}:duration={fixture.duration}",
+        ]
+    subtitle_inputs: List[PosixPath] = [
+        output.parent / f"stream-{index}.srt"
+        for index in range(fixture.subtitle_streams)
+    ]
+    for subtitle in subtitle_inputs:
+        command += ["-i", str(subtitle)]
+
+    for index in range(1 + fixture.audio_streams + fixture.subtitle_streams):
+        command += ["-map", str(index)]
+
+    command += ["-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac"]
+    if fixture.subtitle_streams:
+        command += ["-c:s", "srt" if fixture.container == "mkv" else "mov_text"]
+
+    return command + [str(output)]
+
+
+def generate_fixture(fixture: MediaFixture, folder: PosixPath) -> PosixPath:
+    """Returns the torrent root folder, videos are cached between runs."""
+    root: PosixPath = folder / fixture.name
+    video_folder: PosixPath = root
+    for level in range(fixture.depth):
+        video_folder = video_folder / f"level-{level}"
+    video_folder.mkdir(parents=True, exist_ok=True)
+
+    video: PosixPath = video_folder / f"{fixture.name}.{fixture.container}"
+    if not video.is_file():
+        subtitle_duration: int = max(fixture.duration // 2, 1)
+        for index in range(fixture.subtitle_streams):
+            write_srt(video_folder / f"stream-{index}.srt", cues=subtitle_duration)
+
+        subprocess.run(get_ffmpeg_command(fixture=fixture, output=video), check=True)
+
+        for index in range(fixture.subtitle_streams):
+            (video_folder / f"stream-{index}.srt").unlink()
+
+    subtitles_folder: PosixPath = root / "subtitles"
+    subtitles_folder.mkdir(exist_ok=True)
+    for index in range(fixture.srt_files):
+        lang: str = SUBTITLE_LANGS[index % len(SUBTITLE_LANGS)]
+        srt: PosixPath = subtitles_folder / f"{lang}-{index}.srt"
+        if not srt.is_file():
+            write_srt(srt, cues=fixture.srt_cues)
+
+    return root
+
+
+def get_fixture_dict(fixture: MediaFixture, root: PosixPath) -> Dict[str, Any]:
+    return {
+        "name": fixture.name,
+        "container": fixture.container,
+        "resolution": f"{fixture.width}x{fixture.height}",
+        "duration": fixture.duration,
+        "audio_streams": fixture.audio_streams,
+        "subtitle_streams": fixture.subtitle_streams,
+        "depth": fixture.depth,
+        "bytes": sum(path.stat().st_size for path in root.rglob("*") if path.is_file()),
+    }
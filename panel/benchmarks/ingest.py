@@ -0,0 +1,202 @@
+import datetime
+import logging
+import platform
+import resource
+import shutil
+import subprocess
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path, PosixPath
+from typing import Any, Dict, Iterable, Iterator, List, Set
+from unittest import mock
+
+from django.test import override_settings
+
+from panel.benchmarks.fixtures import MediaFixture, generate_fixture, get_fixture_dict
+from panel.tasks.opensubtitles_hasher import get_hash
+from panel.tasks.pipeline import percentile
+from panel.tasks.subtitles import _convert_srts_to_vtts_in_folder
+from panel.tasks.torrent import (
+    VideoDetail,
+    _change_and_move_parent_folder,
+    _process_videos,
+    get_videos_from_folder,
+    is_torrent_complete,
+)
+
+logger = logging.getLogger(__name__)
+
+# ru_inblock and ru_oublock are counted in 512 byte blocks.
+BLOCK_SIZE: int = 512
+
+
+@dataclass
+class StageResult:
+    fixture: str
+    stage: str
+    run: int = 0
+    wall_seconds: float = 0.0
+    cpu_user_seconds: float = 0.0
+    cpu_system_seconds: float = 0.0
+    input_bytes: int = 0
+    output_bytes: int = 0
+    block_read_bytes: int = 0
+    block_write_bytes: int = 0
+
+
+class FakeQBittorrent:
+    """Answers like a qBittorrent client that has a single finished torrent."""
+
+    def __init__(self, content_path: str) -> None:
+        self.content_path: str = content_path
+
+    def torrents(self, **kwargs) -> List[Dict[str, Any]]:
+        size: int = sum(
+            path.stat().st_size
+            for path in Path(self.content_path).rglob("*")
+            if path.is_file()
+        )
+        return [{"progress": 1, "content_path": self.content_path, "total_size": size}]
+
+
+def _get_usage() -> List[resource.struct_rusage]:
+    # ffmpeg and ffprobe run as child processes, their usage is counted too.
+    return [
+        resource.getrusage(resource.RUSAGE_SELF),
+        resource.getrusage(resource.RUSAGE_CHILDREN),
+    ]
+
+
+@contextmanager
+def measure(fixture: str, stage: str, run: int = 0) -> Iterator[StageResult]:
+    result: StageResult = StageResult(fixture=fixture, stage=stage, run=run)
+    before: List[resource.struct_rusage] = _get_usage()
+    started: float = time.perf_counter()
+
+    yield result
+
+    result.wall_seconds = time.perf_counter() - started
+    after: List[resource.struct_rusage] = _get_usage()
+    for start, end in zip(before, after):
+        result.cpu_user_seconds += end.ru_utime - start.ru_utime
+        result.cpu_system_seconds += end.ru_stime - start.ru_stime
+        result.block_read_bytes += (end.ru_inblock - start.ru_inblock) * BLOCK_SIZE
+        result.block_write_bytes += (end.ru_oublock - start.ru_oublock) * BLOCK_SIZE
+
+
+def _get_size(paths: Iterable[PosixPath]) -> int:
+    return sum(path.stat().st_size for path in paths if path.is_file())
+
+
+def run_fixture(
+    source: PosixPath, work: PosixPath, name: str, run: int
+) -> List[StageResult]:
+    """Runs the ingest steps on a copy of the fixture, the same way a torrent is processed."""
+    if work.exists():
+        shutil.rmtree(str(work))
+    downloads: PosixPath = work / "downloads"
+    media: PosixPath = work / "media"
+    media.mkdir(parents=True)
+    shutil.copytree(str(source), str(downloads / source.name))
+    root: str = str(downloads / source.name)
+    results: List[StageResult] = []
+
+    with measure(name, "discover", run) as result:
+        videos: Set[PosixPath] = get_videos_from_folder(root)
+    results.append(result)
+
+    client: FakeQBittorrent = FakeQBittorrent(content_path=root)
+    with override_settings(MEDIA_FOLDER=str(media) + "/"), mock.patch(
+        "panel.tasks.torrent.get_qbittorrent_client", return_value=client
+    ):
+        with measure(name, "move", run) as result:
+            is_torrent_complete(movie_torrent_id=run)
+            root = _change_and_move_parent_folder(client.torrents()[0]["content_path"])
+            result.input_bytes = client.torrents()[0]["total_size"]
+        results.append(result)
+
+    videos = get_videos_from_folder(root)
+    with measure(name, "process_videos", run) as result:
+        result.input_bytes = _get_size(videos)
+        details: List[VideoDetail] = _process_videos(videos, delete_original=False)
+        result.output_bytes = _get_size(Path(detail.full_path) for detail in details)
+    results.append(result)
+
+    with measure(name, "hash", run) as result:
+        for detail in details:
+            get_hash(detail.full_path)
+            result.input_bytes += min(Path(detail.full_path).stat().st_size, 65536 * 2)
+    results.append(result)
+
+    subtitles_folder: PosixPath = Path(root) / "subtitles"
+    with measure(name, "subtitles", run) as result:
+        result.input_bytes = _get_size(subtitles_folder.glob("*.srt"))
+        _convert_srts_to_vtts_in_folder(subtitles_folder=subtitles_folder)
+        result.output_bytes = _get_size(subtitles_folder.glob("*.vtt"))
+    results.append(result)
+
+    shutil.rmtree(str(work))
+
+    return results
+
+
+def summarize(results: List[StageResult]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    grouped: Dict[str, Dict[str, List[StageResult]]] = {}
+    for result in results:
+        grouped.setdefault(result.fixture, {}).setdefault(result.stage, []).append(
+            result
+        )
+
+    return {
+        fixture: {
+            stage: {
+                "runs": len(runs),
+                "wall_seconds_p50": percentile([run.wall_seconds for run in runs], 50),
+                "wall_seconds_max": max(run.wall_seconds for run in runs),
+                "cpu_seconds_p50": percentile(
+                    [run.cpu_user_seconds + run.cpu_system_seconds for run in runs], 50
+                ),
+                "input_bytes": runs[0].input_bytes,
+                "output_bytes": runs[0].output_bytes,
+            }
+            for stage, runs in stages.items()
+        }
+        for fixture, stages in grouped.items()
+    }
+
+
+def _get_ffmpeg_version() -> str:
+    result = subprocess.run(
+        ["ffmpeg", "-version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+    )
+    return result.stdout.decode().split("\n")[0]
+
+
+def run_benchmark(
+    fixtures: List[MediaFixture], folder: PosixPath, repeat: int = 3
+) -> Dict[str, Any]:
+    results: List[StageResult] = []
+    fixture_dicts: List[Dict[str, Any]] = []
+    for fixture in fixtures:
+        logger.info(f"Generating {fixture.name}")
+        source: PosixPath = generate_fixture(
+            fixture=fixture, folder=folder / "fixtures"
+        )
+        fixture_dicts.append(get_fixture_dict(fixture=fixture, root=source))
+        for run in range(repeat):
+            logger.info(f"Running {fixture.name} {run + 1}/{repeat}")
+            results += run_fixture(
+                source=source, work=folder / "work", name=fixture.name, run=run
+            )
+
+    return {
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "ffmpeg": _get_ffmpeg_version(),
+        "repeat": repeat,
+        "fixtures": fixture_dicts,
+        "results": [asdict(result) for result in results],
+        "summary": summarize(results),
+    }
@@ -0,0 +1,63 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List
+
+from django.core.management.base import BaseCommand
+
+from panel.tasks.moviedb import (
+    get_moviedb_client,
+    refresh_categories,
+    update_movie_info,
+)
+from panel.tasks.tmdb import TMDBClient
+from stream.models import Movie
+
+
+class Command(BaseCommand):
+    help: str = "Refresh moviedb categories and metadata of every movie in the library"
+
+    def add_arguments(self, parser):
+        parser.add_argument("-workers", type=int, default=8)
+        parser.add_argument(
+            "--refresh", action="store_true", help="Ignore the cached responses"
+        )
+
+    def handle(self, *args, **options):
+        workers: int = options.get("workers") or 8
+        refresh: bool = options.get("refresh", False)
+        client: TMDBClient = get_moviedb_client()
+
+        categories: int = refresh_categories(client=client)
+        self.stdout.write(f"{categories} categories are refreshed.")
+
+        movies: Dict[str, List[Movie]] = {}
+        for movie in Movie.objects.all():
+            movies.setdefault(movie.imdb_id, []).append(movie)
+
+        started: float = time.monotonic()
+        updated: int = 0
+        failed: int = 0
+        # Only the requests run concurrently, the database is written from this thread.
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(client.find_by_imdb_id, imdb_id, refresh): imdb_id
+                for imdb_id in movies
+            }
+            for future in as_completed(futures):
+                imdb_id: str = futures[future]
+                try:
+                    response: Dict[str, Any] = future.result()
+                    for movie in movies[imdb_id]:
+                        update_movie_info(movie=movie, response=response)
+                        updated += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{imdb_id} could not be updated: {exc}")
+
+        elapsed: float = time.monotonic() - started
+        hit_rate: float = client.cache.hit_rate if client.cache else 0.0
+        self.stdout.write(
+            f"{updated} movies are updated, {failed} failed in {elapsed:.2f} seconds "
+            f"({len(futures) / elapsed if elapsed else 0:.2f} requests/s, "
+            f"cache hit rate {hit_rate:.0%})."
+        )
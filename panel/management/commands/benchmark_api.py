@@ -0,0 +1,81 @@
+import json
+from typing import Any, Dict, List
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from panel.benchmarks.api import (
+    EndpointResult,
+    find_query_growth,
+    run_endpoints,
+    seed_database,
+)
+
+LOCAL_CACHE: Dict[str, Dict[str, str]] = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Seed a throwaway database with movies and measure the latency, query count "
+        "and response size of the stream endpoints"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-movies",
+            type=int,
+            action="append",
+            help="Can be given more than once, 1000, 10000 and 100000 by default",
+        )
+        parser.add_argument("-users", type=int, default=10)
+        parser.add_argument("-repeat", type=int, default=10)
+        parser.add_argument("-output", type=str, default=None)
+        parser.add_argument(
+            "--fail-on-query-growth",
+            action="store_true",
+            help="Exit with an error when a query count grows with the movies",
+        )
+
+    def handle(self, *args, **options):
+        results: List[EndpointResult] = []
+        for movies in options["movies"] or [1000, 10000, 100000]:
+            self.stdout.write(f"Seeding {movies} movies")
+            # The test database keeps the real one and its cache untouched.
+            old_name: str = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+            try:
+                with override_settings(CACHES=LOCAL_CACHE):
+                    users: List[User] = seed_database(
+                        movies=movies, users=options["users"]
+                    )
+                    results += run_endpoints(
+                        movies=movies, user=users[0], repeat=options["repeat"]
+                    )
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report: List[Dict[str, Any]] = [result.to_dict() for result in results]
+        for result in report:
+            self.stdout.write(
+                f"{result['name']} ({result['movies']} movies): "
+                f"status {result['status_code']}, "
+                f"cold {result['cold_seconds'] * 1000:.1f} ms / "
+                f"{result['cold_queries']} queries, "
+                f"warm p50 {(result['warm_seconds_p50'] or 0) * 1000:.1f} ms / "
+                f"{result['warm_queries']} queries, {result['response_bytes']} bytes"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump({"results": report}, f, indent=2)
+
+        growing: List[str] = find_query_growth(results)
+        if growing and options["fail_on_query_growth"]:
+            raise CommandError(
+                f"Query counts grow with the movies: {', '.join(growing)}"
+            )
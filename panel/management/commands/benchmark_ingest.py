@@ -0,0 +1,61 @@
+import json
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from panel.benchmarks.fixtures import FIXTURES, MediaFixture, get_fixture
+from panel.benchmarks.ingest import run_benchmark
+
+
+class Command(BaseCommand):
+    help: str = "Run the ingest pipeline on synthetic videos and write a JSON report"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-folder",
+            type=str,
+            default=str(Path(settings.BASE_DIR) / "cache" / "benchmarks"),
+            help="Generated videos are kept here between runs",
+        )
+        parser.add_argument(
+            "-fixture",
+            type=str,
+            action="append",
+            choices=[fixture.name for fixture in FIXTURES],
+            help="Can be given more than once, every fixture runs by default",
+        )
+        parser.add_argument("-repeat", type=int, default=3)
+        parser.add_argument("-output", type=str, default=None)
+
+    def handle(self, *args, **options):
+        for program in ("ffmpeg", "ffprobe"):
+            if shutil.which(program) is None:
+                raise CommandError(f"{program} could not be found.")
+
+        fixtures: List[MediaFixture] = (
+            [get_fixture(name) for name in options["fixture"]]
+            if options["fixture"]
+            else FIXTURES
+        )
+        report: Dict[str, Any] = run_benchmark(
+            fixtures=fixtures, folder=Path(options["folder"]), repeat=options["repeat"]
+        )
+
+        if not options["output"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2)
+
+        for fixture, stages in report["summary"].items():
+            for stage, summary in stages.items():
+                self.stdout.write(
+                    f"{fixture} {stage}: p50 {summary['wall_seconds_p50']:.3f} s, "
+                    f"cpu {summary['cpu_seconds_p50']:.3f} s, "
+                    f"{summary['input_bytes']} bytes in, {summary['output_bytes']} bytes out"
+                )
+        self.stdout.write(f"Report is written to {options['output']}")
@@ -0,0 +1,121 @@
+from pathlib import Path
+from typing import Dict, List, Set, Type
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, models, transaction
+
+from watch.database import get_sqlite_config
+
+SOURCE: str = "sqlite_source"
+TARGET: str = "default"
+
+
+def get_models_in_order() -> List[Type[models.Model]]:
+    """Models sorted so that every model comes after the models it references."""
+    all_models: List[Type[models.Model]] = [
+        model
+        for model in apps.get_models(include_auto_created=True)
+        if model._meta.managed and not model._meta.proxy
+    ]
+    dependencies: Dict[Type[models.Model], Set[Type[models.Model]]] = {
+        model: {
+            field.related_model._meta.concrete_model
+            for field in model._meta.local_fields
+            if field.is_relation and field.related_model is not None
+        }.difference({model})
+        for model in all_models
+    }
+
+    ordered: List[Type[models.Model]] = []
+    while dependencies:
+        ready: List[Type[models.Model]] = [
+            model
+            for model, requires in dependencies.items()
+            if not requires.intersection(dependencies)
+        ]
+        if not ready:
+            # A reference cycle, the remaining models are copied as they are.
+            ready = list(dependencies)
+
+        for model in ready:
+            ordered.append(model)
+            dependencies.pop(model)
+
+    return ordered
+
+
+def copy_model(model: Type[models.Model], batch_size: int) -> int:
+    copied: int = 0
+    batch: List[models.Model] = []
+    for instance in (
+        model._base_manager.using(SOURCE).order_by("pk").iterator(chunk_size=batch_size)
+    ):
+        batch.append(instance)
+        if len(batch) >= batch_size:
+            model._base_manager.using(TARGET).bulk_create(batch)
+            copied += len(batch)
+            batch = []
+
+    if batch:
+        model._base_manager.using(TARGET).bulk_create(batch)
+        copied += len(batch)
+
+    return copied
+
+
+class Command(BaseCommand):
+    help: str = "Copy every row of a SQLite database into the configured database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", type=str, help="Path of the SQLite database")
+        parser.add_argument("-batch", type=int, default=1000)
+        parser.add_argument(
+            "--noinput", action="store_true", help="Do not ask for confirmation"
+        )
+
+    def handle(self, *args, **options):
+        source: Path = Path(options["source"])
+        if not source.is_file():
+            raise CommandError(f"{source} could not be found.")
+
+        target = connections[TARGET]
+        if target.vendor == "sqlite" and Path(target.settings_dict["NAME"]) == source:
+            raise CommandError("The source and the target databases are the same.")
+
+        if not options["noinput"]:
+            answer: str = input(
+                f"Every row in the {target.vendor} database will be replaced with the "
+                f"rows of {source}. Type 'yes' to continue: "
+            )
+            if answer != "yes":
+                raise CommandError("Copy cancelled.")
+
+        connections.databases[SOURCE] = get_sqlite_config(path=str(source))
+        # Both schemas have to match the models before the rows are copied.
+        for database in (SOURCE, TARGET):
+            call_command("migrate", database=database, interactive=False, verbosity=0)
+
+        ordered: List[Type[models.Model]] = get_models_in_order()
+        tables: List[str] = [model._meta.db_table for model in ordered]
+        with transaction.atomic(using=TARGET):
+            # Migrations create content types, permissions and categories. They are
+            # replaced with the source rows so that the primary keys keep matching.
+            with target.cursor() as cursor:
+                for sql in target.ops.sql_flush(
+                    no_style(), tables, reset_sequences=False, allow_cascade=True
+                ):
+                    cursor.execute(sql)
+
+            for model in ordered:
+                copied: int = copy_model(model=model, batch_size=options["batch"])
+                self.stdout.write(f"{model._meta.label}: {copied} rows")
+
+            with target.cursor() as cursor:
+                for sql in target.ops.sequence_reset_sql(no_style(), ordered):
+                    cursor.execute(sql)
+
+        connections[SOURCE].close()
+        self.stdout.write(f"{source} has been copied to the {target.vendor} database.")
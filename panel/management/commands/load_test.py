@@ -0,0 +1,144 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.crypto import get_random_string
+
+from panel.tasks.pipeline import percentile
+from stream.models import Movie
+
+CSRF_CHARS: str = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+
+@dataclass
+class LoadTestResult:
+    name: str
+    elapsed: float = 0.0
+    errors: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        milliseconds: Dict[int, float] = {
+            percent: (percentile(self.latencies, percent) or 0.0) * 1000
+            for percent in (50, 95, 99)
+        }
+        return (
+            f"{self.name}: {len(self.latencies)} requests, {self.errors} errors, "
+            f"{self.throughput:.1f} requests/s, p50 {milliseconds[50]:.1f} ms, "
+            f"p95 {milliseconds[95]:.1f} ms, p99 {milliseconds[99]:.1f} ms"
+        )
+
+
+def create_session_cookies(user: User) -> Dict[str, str]:
+    session: SessionStore = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+
+    return {
+        settings.SESSION_COOKIE_NAME: session.session_key,
+        settings.CSRF_COOKIE_NAME: get_random_string(32, CSRF_CHARS),
+    }
+
+
+def run_load(
+    name: str,
+    send: Callable[[requests.Session], requests.Response],
+    cookies: Dict[str, str],
+    total: int,
+    concurrency: int,
+) -> LoadTestResult:
+    result: LoadTestResult = LoadTestResult(name=name)
+    local: threading.local = threading.local()
+    lock: threading.Lock = threading.Lock()
+
+    def _request(_: int) -> None:
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+            local.session.cookies.update(cookies)
+            local.session.headers["X-CSRFToken"] = cookies[settings.CSRF_COOKIE_NAME]
+
+        started: float = time.perf_counter()
+        try:
+            response: Optional[requests.Response] = send(local.session)
+        except requests.exceptions.RequestException:
+            response = None
+        latency: float = time.perf_counter() - started
+
+        with lock:
+            if response is None or response.status_code != 200:
+                result.errors += 1
+            else:
+                result.latencies.append(latency)
+
+    started: float = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(_request, range(total)))
+    result.elapsed = time.perf_counter() - started
+
+    return result
+
+
+class Command(BaseCommand):
+    help: str = "Send concurrent requests to a running server and report throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument("-url", type=str, default="http://127.0.0.1:8000")
+        parser.add_argument("-username", type=str, default=None)
+        parser.add_argument("-requests", type=int, default=500)
+        parser.add_argument("-concurrency", type=int, default=16)
+
+    def handle(self, *args, **options):
+        url: str = options["url"].rstrip("/")
+        user: Optional[User] = (
+            User.objects.filter(username=options["username"]).first()
+            if options.get("username")
+            else User.objects.filter(is_superuser=True).first()
+        )
+        if not user:
+            raise CommandError("User could not be found.")
+
+        movie: Optional[Movie] = Movie.objects.first()
+        if not movie:
+            raise CommandError("At least one movie is needed for the load test.")
+
+        cookies: Dict[str, str] = create_session_cookies(user=user)
+        payload: Dict[str, Any] = {
+            "movieId": movie.id,
+            "currentSecond": 60,
+            "remainingSeconds": 600,
+        }
+        scenarios: Dict[str, Callable[[requests.Session], requests.Response]] = {
+            "GET /api/movies": lambda session: session.get(
+                f"{url}/api/movies", timeout=30
+            ),
+            "POST /api/save-current-second": lambda session: session.post(
+                f"{url}/api/save-current-second",
+                json=payload,
+                headers={"Referer": url},
+                timeout=30,
+            ),
+        }
+
+        for name, send in scenarios.items():
+            result: LoadTestResult = run_load(
+                name=name,
+                send=send,
+                cookies=cookies,
+                total=options["requests"],
+                concurrency=options["concurrency"],
+            )
+            self.stdout.write(result.summary())
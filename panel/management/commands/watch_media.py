@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from panel.media_watcher import MediaFolderWatcher
+from panel.tasks.torrent import _get_media_folder
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Watch MEDIA_FOLDER and keep the file index and movie contents up to date"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-batch", type=float, default=2.0)
+        parser.add_argument("-poll", type=float, default=60.0)
+        parser.add_argument(
+            "--polling", action="store_true", help="Poll instead of using inotify"
+        )
+
+    def handle(self, *args, **options):
+        watcher: MediaFolderWatcher = MediaFolderWatcher(
+            media_folder=_get_media_folder(),
+            batch_seconds=options.get("batch"),
+            poll_interval=options.get("poll"),
+            use_polling=options.get("polling", False),
+        )
+        self.stdout.write(
+            f"Watching {watcher.media_folder} with {type(watcher.source).__name__}"
+        )
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
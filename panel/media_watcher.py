@@ -0,0 +1,275 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import re
+import select
+import struct
+import time
+from pathlib import Path, PosixPath
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from panel.tasks.file_index import index_folder, scan_folder, scan_media_folder
+from panel.tasks.images import IMAGES_FOLDER
+from panel.tasks.subtitles import _add_vtt_files_to_movie_content
+from stream.models import Movie, MovieContent
+
+logger = logging.getLogger(__name__)
+
+IN_CLOSE_WRITE: int = 0x00000008
+IN_MOVED_FROM: int = 0x00000040
+IN_MOVED_TO: int = 0x00000080
+IN_CREATE: int = 0x00000100
+IN_DELETE: int = 0x00000200
+IN_DELETE_SELF: int = 0x00000400
+IN_MOVE_SELF: int = 0x00000800
+IN_Q_OVERFLOW: int = 0x00004000
+IN_IGNORED: int = 0x00008000
+IN_ISDIR: int = 0x40000000
+WATCH_MASK: int = (
+    IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+EVENT_HEADER: struct.Struct = struct.Struct("iIII")
+SUBTITLE_NAME: re.Pattern = re.compile(r"^([a-z]{3})\d*\.vtt$")
+
+
+class InotifySource:
+    def __init__(self, root: str) -> None:
+        libc_name: Optional[str] = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc could not be found.")
+
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init"):
+            raise OSError("inotify is not supported on this system.")
+
+        self.fd: int = self._libc.inotify_init()
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init failed.")
+
+        self.root: str = root
+        self.watches: Dict[int, str] = {}
+        self._add_tree(root)
+
+    def _add_watch(self, path: str) -> None:
+        wd: int = self._libc.inotify_add_watch(
+            self.fd, os.fsencode(path), ctypes.c_uint32(WATCH_MASK)
+        )
+        if wd < 0:
+            logger.warning(f"Could not watch {path}: {os.strerror(ctypes.get_errno())}")
+            return
+
+        self.watches[wd] = path
+
+    def _add_tree(self, path: str) -> None:
+        for entry in scan_folder(path):
+            if entry.is_dir:
+                self._add_watch(entry.full_path)
+
+    def read(self, timeout: float) -> Set[str]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed: Set[str] = set()
+        buffer: bytes = os.read(self.fd, 64 * 1024)
+        offset: int = 0
+        while offset < len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name: str = os.fsdecode(buffer[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                changed.add(self.root)
+                continue
+
+            folder: Optional[str] = self.watches.get(wd)
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+
+            if folder is None:
+                continue
+
+            path: str = os.path.join(folder, name) if name else folder
+            changed.add(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._add_tree(path)
+
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingSource:
+    def __init__(self, root: str, interval: float = 60) -> None:
+        self.root: str = root
+        self.interval: float = interval
+        self.snapshot: Dict[str, Tuple[int, float]] = self._snapshot()
+        self.scanned_at: float = time.monotonic()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, float]]:
+        return {
+            entry.full_path: (entry.size, entry.mtime)
+            for entry in scan_folder(self.root)
+        }
+
+    def read(self, timeout: float) -> Set[str]:
+        # The watcher reads every batch_seconds, the folder is scanned every interval.
+        remaining: float = self.scanned_at + self.interval - time.monotonic()
+        if remaining > 0:
+            time.sleep(min(timeout, remaining))
+            if remaining > timeout:
+                return set()
+
+        snapshot: Dict[str, Tuple[int, float]] = self._snapshot()
+        self.scanned_at = time.monotonic()
+        changed: Set[str] = set(snapshot).symmetric_difference(self.snapshot)
+        changed.update(
+            path
+            for path, value in snapshot.items()
+            if path in self.snapshot and self.snapshot[path] != value
+        )
+        self.snapshot = snapshot
+
+        return changed
+
+    def close(self) -> None:
+        ...
+
+
+def _get_top_folder(media_folder: PosixPath, path: PosixPath) -> str:
+    return path.relative_to(media_folder).parts[0]
+
+
+def _get_dirty_paths(media_folder: PosixPath, paths: Iterable[str]) -> Set[PosixPath]:
+    dirty: Set[PosixPath] = {Path(path) for path in paths}
+    if media_folder in dirty:
+        return {media_folder}
+
+    # Paths are indexed recursively, and a missing path drops its rows from the index,
+    # so only the topmost changed paths need to be indexed again.
+    return {
+        path
+        for path in dirty
+        if media_folder in path.parents
+        and not any(parent in dirty for parent in path.parents)
+    }
+
+
+def _register_subtitles(movie_content: MovieContent) -> None:
+    if not movie_content.full_path:
+        return
+
+    subtitles_folder: PosixPath = Path(movie_content.full_path).parent / "vtt_subtitles"
+    if not subtitles_folder.is_dir():
+        return
+
+    file_to_lang: Dict[str, str] = {}
+    for item in subtitles_folder.iterdir():
+        match: Optional[re.Match] = SUBTITLE_NAME.match(item.name)
+        if match:
+            file_to_lang[item.name] = match.group(1)
+
+    _add_vtt_files_to_movie_content(
+        movie_content=movie_content,
+        subtitles_folder=subtitles_folder,
+        file_to_lang=file_to_lang,
+    )
+
+
+def apply_changes(media_folder: str, paths: Iterable[str]) -> None:
+    root: PosixPath = Path(media_folder)
+    dirty: Set[PosixPath] = _get_dirty_paths(media_folder=root, paths=paths)
+    if root in dirty:
+        scan_media_folder()
+        contents: Dict[str, MovieContent] = {
+            content.main_folder: content
+            for content in MovieContent.objects.exclude(main_folder__isnull=True)
+        }
+    else:
+        top_folders: Set[str] = {_get_top_folder(root, path) for path in dirty}
+        top_folders.discard(IMAGES_FOLDER)
+        contents = {
+            content.main_folder: content
+            for content in MovieContent.objects.filter(main_folder__in=top_folders)
+        }
+        for path in dirty:
+            top: str = _get_top_folder(root, path)
+            if top in top_folders:
+                index_folder(folder=str(path), movie_content=contents.get(top))
+
+    lost: List[int] = []
+    for content in contents.values():
+        if content.is_ready and not Path(content.full_path or "").is_file():
+            lost.append(content.id)
+        elif content.is_ready:
+            _register_subtitles(movie_content=content)
+
+    if lost:
+        logger.warning(f"Videos of movie contents {lost} disappeared.")
+        MovieContent.objects.filter(id__in=lost).update(is_ready=False)
+        Movie.refresh_summaries(movie_content_ids=lost)
+
+
+class MediaFolderWatcher:
+    def __init__(
+        self,
+        media_folder: str,
+        batch_seconds: float = 2.0,
+        max_wait_seconds: float = 30.0,
+        poll_interval: float = 60.0,
+        use_polling: bool = False,
+    ) -> None:
+        self.media_folder: str = str(Path(media_folder))
+        self.batch_seconds: float = batch_seconds
+        self.max_wait_seconds: float = max_wait_seconds
+        self.source = self._get_source(use_polling=use_polling, interval=poll_interval)
+
+    def _get_source(self, use_polling: bool, interval: float):
+        if not use_polling:
+            try:
+                return InotifySource(root=self.media_folder)
+            except OSError:
+                logger.warning("inotify is not available, falling back to polling.")
+
+        return PollingSource(root=self.media_folder, interval=interval)
+
+    def run(self, iterations: Optional[int] = None) -> None:
+        pending: Set[str] = set()
+        first_event: float = 0.0
+        while iterations is None or iterations > 0:
+            if iterations is not None:
+                iterations -= 1
+
+            changed: Set[str] = self.source.read(timeout=self.batch_seconds)
+            now: float = time.monotonic()
+            if changed and not pending:
+                first_event = now
+            pending.update(changed)
+
+            # Torrent moves produce bursts of events; wait for the burst to settle.
+            if pending and (not changed or now - first_event >= self.max_wait_seconds):
+                self.flush(pending)
+                pending = set()
+
+        if pending:
+            self.flush(pending)
+
+    def flush(self, paths: Set[str]) -> None:
+        logger.info(f"Applying {len(paths)} media folder changes")
+        try:
+            apply_changes(media_folder=self.media_folder, paths=paths)
+        except Exception:
+            logger.exception("Could not apply media folder changes")
+
+    def close(self) -> None:
+        self.source.close()
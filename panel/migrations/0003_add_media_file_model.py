@@ -0,0 +1,49 @@
+# Generated by Django 3.2.1 on 2026-10-19 11:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stream", "0006_add_local_images_to_movie"),
+        ("panel", "0002_add_core_model"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaFile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("full_path", models.CharField(max_length=1024, unique=True)),
+                ("name", models.CharField(max_length=255)),
+                ("is_dir", models.BooleanField(default=False)),
+                ("size", models.BigIntegerField(default=0)),
+                ("mtime", models.FloatField(default=0.0)),
+                ("ctime", models.FloatField(default=0.0)),
+                (
+                    "movie_content",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="stream.moviecontent",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.1 on 2026-10-19 12:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stream", "0006_add_local_images_to_movie"),
+        ("panel", "0003_add_media_file_model"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MovieContentTask",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("task_id", models.CharField(max_length=255, unique=True)),
+                ("name", models.CharField(max_length=255)),
+                (
+                    "movie_content",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="stream.moviecontent",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 3.2.1 on 2026-10-19 14:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("panel", "0004_add_movie_content_task_model"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="moviecontenttask",
+            name="args",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="moviecontenttask",
+            name="state",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "Pending"),
+                    ("STARTED", "Started"),
+                    ("RETRY", "Retry"),
+                    ("SUCCESS", "Success"),
+                    ("FAILURE", "Failure"),
+                    ("REVOKED", "Revoked"),
+                ],
+                db_index=True,
+                default="PENDING",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="moviecontenttask",
+            name="eta",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="moviecontenttask",
+            name="started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="moviecontenttask",
+            name="finished_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="moviecontenttask",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
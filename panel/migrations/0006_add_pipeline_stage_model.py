@@ -0,0 +1,60 @@
+# Generated by Django 3.2.1 on 2026-10-19 15:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stream", "0006_add_local_images_to_movie"),
+        ("panel", "0005_add_state_to_movie_content_task"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PipelineStage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "stage",
+                    models.CharField(
+                        choices=[
+                            ("download", "Download"),
+                            ("move", "Move"),
+                            ("remux", "Remux"),
+                            ("probe", "Probe"),
+                            ("subtitles", "Subtitles"),
+                            ("movie_info", "Movie Info"),
+                        ],
+                        db_index=True,
+                        max_length=20,
+                    ),
+                ),
+                ("started_at", models.DateTimeField()),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("duration", models.FloatField(blank=True, null=True)),
+                ("bytes_processed", models.BigIntegerField(default=0)),
+                ("error", models.TextField(blank=True, default="")),
+                (
+                    "movie_content",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="stream.moviecontent",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["started_at"],
+            },
+        ),
+    ]
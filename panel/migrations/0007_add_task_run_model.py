@@ -0,0 +1,64 @@
+# Generated by Django 3.2.1 on 2026-10-19 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("panel", "0006_add_pipeline_stage_model"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("task_id", models.CharField(db_index=True, max_length=255)),
+                ("name", models.CharField(db_index=True, max_length=255)),
+                ("attempt", models.IntegerField(default=0)),
+                (
+                    "correlation_id",
+                    models.CharField(
+                        blank=True, db_index=True, default="", max_length=32
+                    ),
+                ),
+                ("queue", models.CharField(blank=True, default="", max_length=50)),
+                (
+                    "state",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("STARTED", "Started"),
+                            ("RETRY", "Retry"),
+                            ("SUCCESS", "Success"),
+                            ("FAILURE", "Failure"),
+                            ("REVOKED", "Revoked"),
+                        ],
+                        default="STARTED",
+                        max_length=20,
+                    ),
+                ),
+                ("wait_seconds", models.FloatField(blank=True, null=True)),
+                ("started_at", models.DateTimeField()),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("duration", models.FloatField(blank=True, null=True)),
+                ("error", models.TextField(blank=True, default="")),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="taskrun",
+            constraint=models.UniqueConstraint(
+                fields=("task_id", "attempt"), name="unique_task_run_attempt"
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.1 on 2026-10-19 19:10
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def admit_existing_torrents(apps, schema_editor):
+    # Torrents created before the download queue were sent to qBittorrent directly.
+    MovieTorrent = apps.get_model("panel", "MovieTorrent")
+    MovieTorrent.objects.update(admitted_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("panel", "0007_add_task_run_model"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="movietorrent",
+            name="priority",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="movietorrent",
+            name="admitted_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(admit_existing_torrents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.1 on 2026-10-19 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("panel", "0008_add_download_queue_to_movie_torrent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mediafile",
+            name="is_skipped",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name="pipelinestage",
+            name="stage",
+            field=models.CharField(
+                choices=[
+                    ("download", "Download"),
+                    ("move", "Move"),
+                    ("select", "Select"),
+                    ("remux", "Remux"),
+                    ("probe", "Probe"),
+                    ("subtitles", "Subtitles"),
+                    ("movie_info", "Movie Info"),
+                ],
+                db_index=True,
+                max_length=20,
+            ),
+        ),
+    ]
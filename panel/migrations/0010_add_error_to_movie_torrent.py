@@ -0,0 +1,18 @@
+# Generated by Django 3.2.1 on 2026-10-20 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("panel", "0009_add_video_selection"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="movietorrent",
+            name="error",
+            field=models.TextField(blank=True, default=""),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.1 on 2026-10-20 11:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stream", "0009_add_playable_summary_to_movie"),
+        ("panel", "0010_add_error_to_movie_torrent"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="moviecontenttask",
+            name="movie_content",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="stream.moviecontent",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.1 on 2026-10-20 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("panel", "0011_allow_tasks_without_movie_content"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mediafile",
+            name="is_extra",
+            field=models.BooleanField(default=False),
+        ),
+    ]
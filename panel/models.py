@@ -17,6 +17,11 @@ class MovieTorrent(CoreModel):
         MovieContent, on_delete=models.SET_NULL, null=True
     )
     is_complete = models.BooleanField(default=False)
+    # Torrents wait in the download queue until they are admitted to qBittorrent.
+    priority = models.IntegerField(default=0)
+    admitted_at = models.DateTimeField(null=True, blank=True)
+    # Set when the torrent will not complete, it no longer holds a download slot.
+    error = models.TextField(blank=True, default="")
 
 
 class MudSource(CoreModel):
@@ -30,3 +35,116 @@ class MudSource(CoreModel):
 
     class Meta:
         ordering = ["order", "updated_at"]
+
+
+class MediaFile(CoreModel):
+    full_path = models.CharField(max_length=1024, unique=True)
+    name = models.CharField(max_length=255)
+    is_dir = models.BooleanField(default=False)
+    size = models.BigIntegerField(default=0)
+    mtime = models.FloatField(default=0.0)
+    ctime = models.FloatField(default=0.0)
+    movie_content = models.ForeignKey(
+        MovieContent, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    # Videos of a torrent that were not picked as the main feature or an extra.
+    is_skipped = models.BooleanField(default=False)
+    # Converted videos matching VIDEO_EXTRA_PATTERN.
+    is_extra = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return self.full_path
+
+
+class TaskState(models.TextChoices):
+    PENDING = "PENDING"
+    STARTED = "STARTED"
+    RETRY = "RETRY"
+    SUCCESS = "SUCCESS"
+    FAILURE = "FAILURE"
+    REVOKED = "REVOKED"
+
+
+UNFINISHED_TASK_STATES = [TaskState.PENDING, TaskState.STARTED, TaskState.RETRY]
+
+
+class MovieContentTask(CoreModel):
+    # Empty for the tasks that do not belong to a movie, e.g. the media folder scan.
+    movie_content = models.ForeignKey(
+        MovieContent, on_delete=models.CASCADE, null=True, blank=True
+    )
+    task_id = models.CharField(max_length=255, unique=True)
+    name = models.CharField(max_length=255)
+    args = models.TextField(blank=True, default="")
+    state = models.CharField(
+        max_length=20,
+        choices=TaskState.choices,
+        default=TaskState.PENDING,
+        db_index=True,
+    )
+    eta = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.movie_content_id} - {self.name} - {self.task_id}"
+
+
+class PipelineStageName(models.TextChoices):
+    DOWNLOAD = "download"
+    MOVE = "move"
+    SELECT = "select"
+    REMUX = "remux"
+    PROBE = "probe"
+    SUBTITLES = "subtitles"
+    MOVIE_INFO = "movie_info"
+
+
+class PipelineStage(CoreModel):
+    movie_content = models.ForeignKey(MovieContent, on_delete=models.CASCADE)
+    stage = models.CharField(
+        max_length=20, choices=PipelineStageName.choices, db_index=True
+    )
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True)
+    bytes_processed = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    def __str__(self) -> str:
+        return f"{self.movie_content_id} - {self.stage} - {self.duration}"
+
+    class Meta:
+        ordering = ["started_at"]
+
+
+class TaskRun(CoreModel):
+    """One attempt of a celery task, retries are stored as separate attempts."""
+
+    task_id = models.CharField(max_length=255, db_index=True)
+    name = models.CharField(max_length=255, db_index=True)
+    attempt = models.IntegerField(default=0)
+    correlation_id = models.CharField(
+        max_length=32, blank=True, default="", db_index=True
+    )
+    queue = models.CharField(max_length=50, blank=True, default="")
+    state = models.CharField(
+        max_length=20, choices=TaskState.choices, default=TaskState.STARTED
+    )
+    wait_seconds = models.FloatField(null=True, blank=True)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+
+    def __str__(self) -> str:
+        return f"{self.name} - {self.task_id} - {self.attempt}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["task_id", "attempt"], name="unique_task_run_attempt"
+            )
+        ]
@@ -2,3 +2,5 @@ from .torrent import download_torrent, check_and_process_torrent
 from .subtitles import fetch_subtitles
 from .moviedb import download_movie_info
 from .redownload_subtitles import redownload_subtitles
+from .images import download_movie_images
+from .file_index import scan_media_folder
@@ -0,0 +1,144 @@
+import heapq
+import logging
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.utils import timezone
+from qbittorrent import Client
+
+from panel.models import MovieTorrent, PipelineStageName
+from panel.tasks.pipeline import get_stage_statistics
+from panel.tasks.torrent import (
+    get_active_downloads,
+    get_qbittorrent_client,
+    get_queued_downloads,
+    set_max_priority,
+)
+from stream.models import Movie
+
+logger = logging.getLogger(__name__)
+
+# qBittorrent reports 100 days when it cannot estimate the download.
+QBITTORRENT_UNKNOWN_ETA: int = 8640000
+PROCESSING_STAGES: List[str] = [
+    PipelineStageName.MOVE,
+    PipelineStageName.SELECT,
+    PipelineStageName.REMUX,
+    PipelineStageName.PROBE,
+    PipelineStageName.SUBTITLES,
+]
+
+
+def _get_qbittorrent_torrents() -> Dict[str, Dict[str, Any]]:
+    try:
+        client: Client = get_qbittorrent_client()
+        return {torrent.get("category"): torrent for torrent in client.torrents()}
+    except Exception:
+        logger.warning("Qbittorrent could not be reached for the download estimates")
+        return {}
+
+
+def _get_active_eta(
+    torrent_obj: MovieTorrent,
+    qbittorrent: Optional[Dict[str, Any]],
+    typical_download: Optional[float],
+) -> Optional[float]:
+    if qbittorrent and 0 <= qbittorrent.get("eta", -1) < QBITTORRENT_UNKNOWN_ETA:
+        return float(qbittorrent["eta"])
+
+    if typical_download is None:
+        return None
+
+    elapsed: float = (timezone.now() - torrent_obj.admitted_at).total_seconds()
+    return max(typical_download - elapsed, 0.0)
+
+
+def get_download_queue() -> List[Dict[str, Any]]:
+    """Active and queued downloads with the estimated seconds until they are ready.
+
+    Queued torrents take the first free download slot, and downloads take as long as
+    the median download of the library. Processing after the download takes the median
+    of the move, remux, probe and subtitle stages."""
+    active: List[MovieTorrent] = list(get_active_downloads().order_by("admitted_at"))
+    queued: List[MovieTorrent] = list(get_queued_downloads())
+    titles: Dict[int, str] = dict(
+        Movie.movie_content.through.objects.filter(
+            moviecontent_id__in=[
+                torrent.movie_content_id for torrent in active + queued
+            ]
+        ).values_list("moviecontent_id", "movie__title")
+    )
+    qbittorrent: Dict[str, Dict[str, Any]] = (
+        _get_qbittorrent_torrents() if active else {}
+    )
+    statistics: Dict[str, Dict[str, Any]] = get_stage_statistics()
+    typical_download: Optional[float] = statistics[PipelineStageName.DOWNLOAD]["p50"]
+    processing: float = sum(
+        statistics[stage]["p50"] or 0.0 for stage in PROCESSING_STAGES
+    )
+
+    downloads: List[Dict[str, Any]] = []
+    slots: List[float] = []
+    is_known: bool = True
+    for torrent_obj in active:
+        info: Optional[Dict[str, Any]] = qbittorrent.get(str(torrent_obj.id))
+        eta: Optional[float] = _get_active_eta(torrent_obj, info, typical_download)
+        if eta is None:
+            is_known = False
+        else:
+            slots.append(eta)
+        downloads.append(
+            {
+                "state": "downloading",
+                "progress": info.get("progress", 0.0) if info else 0.0,
+                "download_eta": eta,
+                "torrent": torrent_obj,
+            }
+        )
+
+    slots += [0.0] * max(settings.MAX_ACTIVE_DOWNLOADS - len(active), 0)
+    heapq.heapify(slots)
+    for torrent_obj in queued:
+        eta = None
+        if is_known and typical_download is not None and slots:
+            eta = heapq.heappop(slots) + typical_download
+            heapq.heappush(slots, eta)
+        downloads.append(
+            {
+                "state": "queued",
+                "progress": 0.0,
+                "download_eta": eta,
+                "torrent": torrent_obj,
+            }
+        )
+
+    for position, download in enumerate(downloads):
+        torrent_obj = download.pop("torrent")
+        download.update(
+            {
+                "movie_torrent_id": torrent_obj.id,
+                "movie_content_id": torrent_obj.movie_content_id,
+                "title": titles.get(torrent_obj.movie_content_id, ""),
+                "priority": torrent_obj.priority,
+                "position": position,
+                "ready_eta": None
+                if download["download_eta"] is None
+                else download["download_eta"] + processing,
+            }
+        )
+
+    return downloads
+
+
+def set_download_priority(movie_torrent_id: int, priority: int) -> MovieTorrent:
+    torrent_obj: MovieTorrent = MovieTorrent.objects.get(id=movie_torrent_id)
+    torrent_obj.priority = priority
+    torrent_obj.save(update_fields=["priority"])
+
+    if torrent_obj.admitted_at and not torrent_obj.is_complete and priority > 0:
+        try:
+            set_max_priority(get_qbittorrent_client(), torrent_obj)
+        except Exception:
+            logger.warning(f"Qbittorrent priority of {movie_torrent_id} is not updated")
+
+    return torrent_obj
@@ -0,0 +1,158 @@
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+import redis
+from django.conf import settings
+
+from panel.tasks.events import (
+    EVENTS_CHANNEL,
+    format_event,
+    get_connection,
+    publish_event,
+)
+from panel.tasks.torrent_sync import get_snapshot, get_torrent_delta, sync_torrents
+from watch.celery import app
+
+logger = logging.getLogger(__name__)
+
+PRODUCER_KEY: str = "vigilio:panel-events:producer"
+REVISION_KEY: str = "vigilio:panel-events:torrent-revision"
+HEARTBEAT_SECONDS: int = 15
+
+# Every open stream holds a gunicorn thread until it is closed.
+_streams: Dict[str, int] = {"open": 0}
+_streams_lock: threading.Lock = threading.Lock()
+
+
+def _get_producer_ttl() -> int:
+    # A producer that died without clearing the key is replaced after this long.
+    return int(max(settings.TORRENT_SYNC_SECONDS * 5, 10))
+
+
+def has_listeners(connection: redis.Redis) -> bool:
+    return any(count for _, count in connection.pubsub_numsub(EVENTS_CHANNEL))
+
+
+def start_producer(connection: redis.Redis) -> bool:
+    if not connection.set(PRODUCER_KEY, 1, nx=True, ex=_get_producer_ttl()):
+        return False
+
+    publish_torrent_progress.delay()
+    return True
+
+
+@app.task(ignore_result=True, is_traced=False)
+def publish_torrent_progress() -> None:
+    """The only process that reads qBittorrent for the event streams. It runs every
+    TORRENT_SYNC_SECONDS while a panel page is listening."""
+    connection: Optional[redis.Redis] = get_connection()
+    if connection is None:
+        return
+
+    if not has_listeners(connection):
+        connection.delete(PRODUCER_KEY)
+        return
+
+    connection.set(PRODUCER_KEY, 1, ex=_get_producer_ttl())
+    try:
+        revision: int = sync_torrents()["revision"]
+        if connection.getset(REVISION_KEY, revision) != str(revision).encode():
+            publish_event("torrents", {"rid": revision})
+    except Exception:
+        logger.exception("Torrent progress could not be published")
+        publish_event("failure", {"message": "Qbittorrent connection failed."})
+
+    publish_torrent_progress.apply_async(countdown=settings.TORRENT_SYNC_SECONDS)
+
+
+def _get_torrent_event(rid: Optional[int]) -> Optional[Dict[str, Any]]:
+    delta: Dict[str, Any] = get_torrent_delta(
+        get_snapshot(), rid=-1 if rid is None else rid
+    )
+    if delta["full_update"] or delta["torrents"] or delta["torrents_removed"]:
+        return delta
+
+    return None
+
+
+def stream_events(rid: Optional[int] = None) -> Iterator[bytes]:
+    """Server-sent events for one panel page. Torrent events carry only the fields
+    that changed since the rid the page has, the other events are passed as they are
+    published. The browser reconnects when the stream ends after EVENT_STREAM_SECONDS.
+    """
+    yield b"retry: 5000\n\n"
+    connection: Optional[redis.Redis] = get_connection()
+    if connection is None:
+        yield format_event("failure", {"message": "Redis is not available."})
+        return
+
+    pubsub = connection.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(EVENTS_CHANNEL)
+    try:
+        start_producer(connection)
+        delta: Optional[Dict[str, Any]] = _get_torrent_event(rid)
+        if delta:
+            rid = delta["rid"]
+            yield format_event("torrents", delta, event_id=rid)
+
+        deadline: float = time.monotonic() + settings.EVENT_STREAM_SECONDS
+        while time.monotonic() < deadline:
+            message: Optional[Dict[str, Any]] = pubsub.get_message(
+                timeout=HEARTBEAT_SECONDS
+            )
+            if message is None:
+                yield b": keepalive\n\n"
+                continue
+
+            payload: Dict[str, Any] = json.loads(message["data"])
+            if payload["event"] != "torrents":
+                yield format_event(payload["event"], payload["data"])
+                continue
+
+            delta = _get_torrent_event(rid)
+            if delta:
+                rid = delta["rid"]
+                yield format_event("torrents", delta, event_id=rid)
+    finally:
+        pubsub.close()
+
+
+def is_cache_shared() -> bool:
+    # The snapshot is written by celery, a per-process cache never shows it to gunicorn.
+    return settings.CACHES["default"]["BACKEND"] == "django_redis.cache.RedisCache"
+
+
+class EventStream:
+    """Holds one of the EVENT_STREAMS_PER_PROCESS slots until the response is closed."""
+
+    def __init__(self, rid: Optional[int] = None) -> None:
+        self._events: Iterator[bytes] = stream_events(rid=rid)
+        self._closed: bool = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self._events
+
+    def close(self) -> None:
+        if self._closed:
+            return
+
+        self._closed = True
+        self._events.close()
+        with _streams_lock:
+            _streams["open"] -= 1
+
+
+def open_event_stream(rid: Optional[int] = None) -> Optional[EventStream]:
+    """None when the stream cannot be served, the page polls instead."""
+    if not is_cache_shared() or get_connection() is None:
+        return None
+
+    with _streams_lock:
+        if _streams["open"] >= settings.EVENT_STREAMS_PER_PROCESS:
+            return None
+        _streams["open"] += 1
+
+    return EventStream(rid=rid)
@@ -0,0 +1,43 @@
+import json
+import logging
+from typing import Any, Dict, Optional
+
+import redis
+
+from panel.tasks.inmemory import get_redis
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL: str = "vigilio:panel-events"
+
+_connection: Dict[str, Optional[redis.Redis]] = {"redis": None}
+
+
+def get_connection() -> Optional[redis.Redis]:
+    if _connection["redis"] is None:
+        _connection["redis"] = get_redis()
+
+    return _connection["redis"]
+
+
+def publish_event(event: str, data: Dict[str, Any]) -> None:
+    """Events are best effort, the panel pages still work without them."""
+    connection: Optional[redis.Redis] = get_connection()
+    if connection is None:
+        return
+
+    try:
+        connection.publish(
+            EVENTS_CHANNEL, json.dumps({"event": event, "data": data}, default=str)
+        )
+    except redis.exceptions.RedisError:
+        logger.warning(f"Could not publish the {event} event")
+        _connection["redis"] = None
+
+
+def format_event(event: str, data: Any, event_id: Optional[int] = None) -> bytes:
+    lines: str = f"event: {event}\ndata: {json.dumps(data, default=str)}\n"
+    if event_id is not None:
+        lines += f"id: {event_id}\n"
+
+    return f"{lines}\n".encode("utf-8")
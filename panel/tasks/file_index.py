@@ -0,0 +1,185 @@
+import logging
+import os
+import shutil
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from django.db import transaction
+from django.db.models import Q, QuerySet
+
+from panel.models import MediaFile
+from stream.models import MovieContent
+from watch.celery import app
+
+logger = logging.getLogger(__name__)
+
+UPDATED_FIELDS: List[str] = ["is_dir", "size", "mtime", "ctime", "movie_content"]
+
+
+@dataclass
+class DiskEntry:
+    full_path: str
+    name: str
+    is_dir: bool
+    size: int
+    mtime: float
+    ctime: float
+
+
+def _entry_from_stat(path: str, is_dir: bool, stat: os.stat_result) -> DiskEntry:
+    return DiskEntry(
+        full_path=path,
+        name=os.path.basename(path),
+        is_dir=is_dir,
+        size=stat.st_size,
+        mtime=stat.st_mtime,
+        ctime=stat.st_ctime,
+    )
+
+
+def scan_folder(folder: str) -> Iterator[DiskEntry]:
+    try:
+        root_stat: os.stat_result = os.stat(folder)
+    except FileNotFoundError:
+        return
+
+    is_dir: bool = os.path.isdir(folder)
+    yield _entry_from_stat(folder, is_dir, root_stat)
+    if not is_dir:
+        return
+
+    folders: List[str] = [folder]
+    while folders:
+        try:
+            with os.scandir(folders.pop()) as entries:
+                for entry in entries:
+                    try:
+                        entry_is_dir: bool = entry.is_dir(follow_symlinks=False)
+                        yield _entry_from_stat(entry.path, entry_is_dir, entry.stat())
+                    except FileNotFoundError:
+                        continue
+
+                    if entry_is_dir:
+                        folders.append(entry.path)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            logger.warning(f"Could not scan {folder}")
+
+
+def _under(path: str) -> Q:
+    return Q(full_path=path) | Q(full_path__startswith=path.rstrip("/") + "/")
+
+
+def get_indexed_files(path: str) -> "QuerySet[MediaFile]":
+    return MediaFile.objects.filter(_under(path))
+
+
+def index_folder(
+    folder: str, movie_content: Optional[MovieContent] = None
+) -> Dict[str, int]:
+    folder = str(Path(folder))
+    existing: Dict[str, MediaFile] = {
+        media_file.full_path: media_file for media_file in get_indexed_files(folder)
+    }
+    content_id: Optional[int] = movie_content.id if movie_content else None
+    created: List[MediaFile] = []
+    updated: List[MediaFile] = []
+    found: Set[str] = set()
+
+    for entry in scan_folder(folder):
+        found.add(entry.full_path)
+        media_file: Optional[MediaFile] = existing.get(entry.full_path)
+        if media_file is None:
+            created.append(MediaFile(movie_content_id=content_id, **asdict(entry)))
+            continue
+
+        if (
+            media_file.mtime != entry.mtime
+            or media_file.size != entry.size
+            or media_file.is_dir != entry.is_dir
+            or (content_id and media_file.movie_content_id != content_id)
+        ):
+            media_file.is_dir = entry.is_dir
+            media_file.size = entry.size
+            media_file.mtime = entry.mtime
+            media_file.ctime = entry.ctime
+            media_file.movie_content_id = content_id or media_file.movie_content_id
+            updated.append(media_file)
+
+    removed: List[int] = [
+        media_file.id for path, media_file in existing.items() if path not in found
+    ]
+
+    with transaction.atomic():
+        MediaFile.objects.bulk_create(created, batch_size=500)
+        MediaFile.objects.bulk_update(updated, UPDATED_FIELDS, batch_size=500)
+        MediaFile.objects.filter(id__in=removed).delete()
+
+    return {"created": len(created), "updated": len(updated), "removed": len(removed)}
+
+
+def record_file(
+    path: str, movie_content: Optional[MovieContent] = None, **flags: bool
+) -> Optional[MediaFile]:
+    """Indexes a single file, whether or not its folder was indexed before."""
+    try:
+        stat: os.stat_result = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    entry: DiskEntry = _entry_from_stat(path=path, is_dir=False, stat=stat)
+    values: Dict[str, Any] = asdict(entry)
+    values.pop("full_path")
+    media_file, _ = MediaFile.objects.update_or_create(
+        full_path=entry.full_path,
+        defaults={**values, "movie_content": movie_content, **flags},
+    )
+
+    return media_file
+
+
+def remove_from_index(path: str) -> None:
+    get_indexed_files(str(Path(path))).delete()
+
+
+@app.task
+def remove_folders(paths: List[str]) -> None:
+    for path in paths:
+        logger.info(f"{path} removing the directory.")
+        shutil.rmtree(path, ignore_errors=True)
+        remove_from_index(path)
+
+
+@app.task
+def scan_media_folder() -> None:
+    from panel.tasks.images import IMAGES_FOLDER
+    from panel.tasks.torrent import _get_media_folder
+
+    media_folder: str = str(Path(_get_media_folder()))
+    contents: Dict[str, MovieContent] = {
+        content.main_folder: content
+        for content in MovieContent.objects.exclude(main_folder__isnull=True).exclude(
+            main_folder=""
+        )
+    }
+
+    seen: Set[str] = set()
+    with os.scandir(media_folder) as entries:
+        for entry in entries:
+            if entry.name == IMAGES_FOLDER:
+                continue
+
+            seen.add(entry.path)
+            index_folder(folder=entry.path, movie_content=contents.get(entry.name))
+
+    vanished: Set[str] = {
+        str(Path(media_folder) / Path(path).relative_to(media_folder).parts[0])
+        for path in get_indexed_files(media_folder)
+        .exclude(full_path=media_folder)
+        .values_list("full_path", flat=True)
+        .iterator()
+    }.difference(seen)
+    for path in vanished:
+        remove_from_index(path)
+
+    logger.info(f"Media folder scan complete, {len(vanished)} folders removed")
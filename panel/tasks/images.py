@@ -0,0 +1,161 @@
+import hashlib
+import logging
+import shutil
+import subprocess
+from pathlib import Path, PosixPath
+from typing import Dict, List, Optional, Set, Tuple
+
+import requests
+from requests import Response
+
+from stream.cache import bump_catalog_version
+from stream.models import Movie
+from watch.celery import app
+
+logger = logging.getLogger(__name__)
+
+IMAGES_FOLDER: str = "images"
+# Movie field of the original image -> (Movie field that is replaced, width)
+IMAGE_VARIANTS: Dict[str, List[Tuple[str, int]]] = {
+    "poster_path_big": [("poster_path_small", 342), ("poster_path_big", 780)],
+    "backdrop_path_big": [("backdrop_path_small", 780), ("backdrop_path_big", 1280)],
+}
+VARIANT_FORMATS: List[str] = [".webp", ".jpg"]
+
+
+def _get_images_folder(media_folder: str, movie_id: int) -> PosixPath:
+    folder: PosixPath = Path(media_folder) / IMAGES_FOLDER / str(movie_id)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    return folder
+
+
+def _get_version(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:10]
+
+
+def download_image(url: str, file_path: PosixPath) -> bool:
+    try:
+        response: Response = requests.get(url, stream=True, timeout=30)
+    except requests.exceptions.RequestException:
+        logger.exception(f"Image could not be downloaded from {url}")
+        return False
+
+    if response.status_code != 200:
+        logger.error(f"Image download returned {response.status_code} for {url}")
+        return False
+
+    with open(str(file_path), "wb") as f:
+        shutil.copyfileobj(response.raw, f)
+
+    return True
+
+
+def resize_image(source: PosixPath, target: PosixPath, width: int) -> bool:
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-v",
+            "error",
+            "-i",
+            str(source),
+            "-vf",
+            f"scale='min({width},iw)':-2",
+            "-q:v",
+            "80" if target.suffix == ".webp" else "4",
+            str(target),
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+
+    return target.is_file() and target.stat().st_size > 0
+
+
+def _find_variant(folder: PosixPath, name: str) -> Optional[PosixPath]:
+    for suffix in VARIANT_FORMATS:
+        target: PosixPath = folder / f"{name}{suffix}"
+        if target.is_file():
+            return target
+
+    return None
+
+
+def _create_variant(
+    source: PosixPath, folder: PosixPath, name: str, width: int
+) -> Optional[PosixPath]:
+    for suffix in VARIANT_FORMATS:
+        target: PosixPath = folder / f"{name}{suffix}"
+        if resize_image(source=source, target=target, width=width):
+            return target
+
+    logger.error(f"Could not create {name} from {source}")
+    return None
+
+
+def _remove_stale_images(folder: PosixPath, used: Set[PosixPath]) -> None:
+    for item in folder.iterdir():
+        if item.is_file() and item not in used:
+            item.unlink()
+
+
+def cache_movie_images(movie: Movie) -> Dict[str, str]:
+    from panel.tasks.torrent import _get_media_folder, _get_relative_path
+
+    folder: PosixPath = _get_images_folder(
+        media_folder=_get_media_folder(), movie_id=movie.id
+    )
+    created: Dict[str, PosixPath] = {}
+
+    for original_field, variants in IMAGE_VARIANTS.items():
+        url: Optional[str] = getattr(movie, original_field)
+        if not url or not url.startswith("http"):
+            continue
+
+        version: str = _get_version(url)
+        missing: List[Tuple[str, int]] = []
+        for field, width in variants:
+            existing: Optional[PosixPath] = _find_variant(
+                folder=folder, name=f"{field}.{version}"
+            )
+            if existing:
+                created[field] = existing
+            else:
+                missing.append((field, width))
+
+        if not missing:
+            continue
+
+        # A name of its own, the .jpg variant of the big field would overwrite it.
+        source: PosixPath = folder / f"{original_field}.{version}.source"
+        try:
+            if not download_image(url=url, file_path=source):
+                continue
+
+            for field, width in missing:
+                variant: Optional[PosixPath] = _create_variant(
+                    source=source, folder=folder, name=f"{field}.{version}", width=width
+                )
+                if variant:
+                    created[field] = variant
+        finally:
+            if source.is_file():
+                source.unlink()
+
+    _remove_stale_images(folder=folder, used=set(created.values()))
+
+    return {field: _get_relative_path(str(path)) for field, path in created.items()}
+
+
+@app.task
+def download_movie_images(movie_id: int) -> None:
+    try:
+        movie: Movie = Movie.objects.get(id=movie_id)
+    except Movie.DoesNotExist:
+        raise Exception(f"Download movie images. Movie {movie_id} could not be found.")
+
+    movie.local_images = cache_movie_images(movie=movie)
+    movie.save(update_fields=["local_images", "updated_at"])
+    bump_catalog_version()
+    logger.info(f"{len(movie.local_images)} images are cached for {movie}")
@@ -0,0 +1,172 @@
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from panel.tasks.torrent import download_torrent
+from stream.models import Movie, MovieContent
+from watch.celery import app
+
+logger = logging.getLogger(__name__)
+
+# SQLite before 3.32 allows 999 variables in a query, imports can be larger than that.
+LOOKUP_CHUNK_SIZE: int = 500
+
+
+@dataclass
+class ImportResult:
+    added: List[Dict[str, Any]] = field(default_factory=list)
+    skipped: List[Dict[str, str]] = field(default_factory=list)
+
+    def skip(self, imdb_id: str, source: str, reason: str) -> None:
+        self.skipped.append({"imdb_id": imdb_id, "source": source, "reason": reason})
+
+
+def parse_imdb_id(imdb: str) -> str:
+    """tt0050083 or https://www.imdb.com/title/tt0050083/"""
+    imdb = imdb.strip()
+    if len(imdb) > 9 and "title/" in imdb:
+        _imdb: str = imdb.split("title/")[1].split("/")[0]
+        if 9 <= len(_imdb) <= 13:
+            return _imdb
+
+    return imdb
+
+
+def _chunks(values: Iterable[str]) -> Iterator[List[str]]:
+    values = list(values)
+    for index in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        yield values[index : index + LOOKUP_CHUNK_SIZE]
+
+
+def _create_movies(imdb_ids: List[str]) -> Dict[str, int]:
+    movies: List[Movie] = Movie.objects.bulk_create(
+        [Movie(imdb_id=imdb_id) for imdb_id in imdb_ids]
+    )
+    # Django 3.2 sets the primary keys after bulk_create on PostgreSQL only, SQLite
+    # always takes the lookup.
+    if movies and movies[0].pk is None:
+        return {
+            imdb_id: movie_id
+            for chunk in _chunks(imdb_ids)
+            for imdb_id, movie_id in Movie.objects.filter(
+                imdb_id__in=chunk
+            ).values_list("imdb_id", "id")
+        }
+
+    return {movie.imdb_id: movie.id for movie in movies}
+
+
+def _create_contents(sources: List[str]) -> Dict[str, int]:
+    contents: List[MovieContent] = MovieContent.objects.bulk_create(
+        [MovieContent(torrent_source=source) for source in sources]
+    )
+    if contents and contents[0].pk is None:
+        return {
+            source: content_id
+            for chunk in _chunks(sources)
+            for source, content_id in MovieContent.objects.filter(
+                torrent_source__in=chunk
+            ).values_list("torrent_source", "id")
+        }
+
+    return {content.torrent_source: content.id for content in contents}
+
+
+def import_movies(entries: List[Tuple[str, str]]) -> ImportResult:
+    """Adds (imdb id, torrent source) pairs with a fixed number of queries for every
+    LOOKUP_CHUNK_SIZE pairs.
+
+    Sources that are already in the system are skipped. A new content is added to the
+    movie with the same imdb id, a movie is created when there is none."""
+    result: ImportResult = ImportResult()
+    requested: Dict[str, str] = {}
+    for imdb, source in entries:
+        imdb_id: str = parse_imdb_id(imdb)
+        source = source.strip()
+        if source in requested:
+            result.skip(imdb_id, source, "This torrent is listed more than once.")
+            continue
+        requested[source] = imdb_id
+
+    existing_sources: Set[str] = set()
+    for chunk in _chunks(requested):
+        existing_sources.update(
+            MovieContent.objects.filter(torrent_source__in=chunk).values_list(
+                "torrent_source", flat=True
+            )
+        )
+    movie_ids: Dict[str, List[int]] = defaultdict(list)
+    for chunk in _chunks(set(requested.values())):
+        for movie_id, imdb_id in Movie.objects.filter(imdb_id__in=chunk).values_list(
+            "id", "imdb_id"
+        ):
+            movie_ids[imdb_id].append(movie_id)
+
+    accepted: Dict[str, str] = {}
+    for source, imdb_id in requested.items():
+        if source in existing_sources:
+            result.skip(imdb_id, source, "This torrent already exists in the system.")
+        elif len(movie_ids[imdb_id]) > 1:
+            result.skip(
+                imdb_id, source, "There are more than one movie with this imdb id."
+            )
+        else:
+            accepted[source] = imdb_id
+
+    if not accepted:
+        return result
+
+    new_imdb_ids: List[str] = sorted(
+        {imdb_id for imdb_id in accepted.values() if not movie_ids[imdb_id]}
+    )
+    with transaction.atomic():
+        created_movies: Dict[str, int] = _create_movies(new_imdb_ids)
+        contents: Dict[str, int] = _create_contents(list(accepted))
+        Movie.movie_content.through.objects.bulk_create(
+            [
+                Movie.movie_content.through(
+                    movie_id=movie_ids[imdb_id][0]
+                    if movie_ids[imdb_id]
+                    else created_movies[imdb_id],
+                    moviecontent_id=contents[source],
+                )
+                for source, imdb_id in accepted.items()
+            ]
+        )
+
+    for source, imdb_id in accepted.items():
+        result.added.append(
+            {
+                "imdb_id": imdb_id,
+                "source": source,
+                "movie_content_id": contents[source],
+                "is_new_movie": imdb_id in created_movies,
+            }
+        )
+
+    logger.info(f"{len(result.added)} movies imported, {len(result.skipped)} skipped")
+    return result
+
+
+@app.task
+def enqueue_downloads(movie_content_ids: List[int]) -> None:
+    """Starts MOVIE_IMPORT_RATE downloads and schedules the rest a minute later."""
+    rate: int = max(settings.MOVIE_IMPORT_RATE, 1)
+    batch: List[int] = movie_content_ids[:rate]
+    remaining: List[int] = movie_content_ids[rate:]
+
+    # Contents deleted since the import are not downloaded.
+    existing: Set[int] = set(
+        MovieContent.objects.filter(id__in=batch).values_list("id", flat=True)
+    )
+    for movie_content_id in batch:
+        if movie_content_id in existing:
+            download_torrent.delay(movie_content_id)
+
+    if remaining:
+        logger.info(f"{len(remaining)} imported downloads are waiting to start")
+        enqueue_downloads.apply_async((remaining,), countdown=60)
@@ -1,11 +1,13 @@
 import datetime
-import json
 import logging
-from typing import Dict, Any, Optional
-
-import requests
+from typing import Dict, Any, List, Optional
 
+from panel.models import PipelineStageName
+from panel.tasks.images import download_movie_images
 from panel.tasks.inmemory import get_setting
+from panel.tasks.pipeline import track_stage
+from panel.tasks.tmdb import get_tmdb_client, TMDBClient
+from stream.cache import bump_catalog_version
 from stream.models import Movie, MovieDBCategory
 from watch.celery import app
 
@@ -20,27 +22,11 @@ def _get_moviedb_api_key() -> str:
     return moviedb
 
 
-def _get_response_from_moviedb_api(url: str) -> Dict[str, Any]:
-    response = requests.get(url)
-
-    if response.status_code != 200:
-        raise Exception(f"Moviedb API returned the status code {response.status_code}")
-
-    if not any([value for value in response.json().values() if value]):
-        raise Exception("Moviedb API returned no results. Possible wrong IMDB ID")
-
-    return json.loads(response.text)
-
+def get_moviedb_client() -> TMDBClient:
+    return get_tmdb_client(api_key=_get_moviedb_api_key())
 
-@app.task
-def download_movie_info(movie_id: int) -> None:
-    logger.info(f"Movie info fetching process started for {movie_id}")
-    movie: Movie = Movie.objects.get(id=movie_id)
-    imdb_id: str = movie.imdb_id
-    moviedb_key: str = _get_moviedb_api_key()
-    url: str = f"https://api.themoviedb.org/3/find/{imdb_id}?api_key={moviedb_key}&language=en-US&external_source=imdb_id"
-    response: Dict[str, Any] = _get_response_from_moviedb_api(url)
 
+def update_movie_info(movie: Movie, response: Dict[str, Any]) -> None:
     raw = response["movie_results"]
 
     movie.title = raw[0]["original_title"]
@@ -65,5 +51,31 @@ def download_movie_info(movie_id: int) -> None:
     movie.media_info_raw = raw
     movie.is_ready = True
     movie.save()
+    movie.refresh_summary()
+
+
+def refresh_categories(client: TMDBClient) -> int:
+    genres: List[Dict[str, Any]] = client.get_genres()
+    for genre in genres:
+        MovieDBCategory.objects.update_or_create(
+            moviedb_id=genre["id"], defaults={"name": genre["name"][:20]}
+        )
+    bump_catalog_version()
+
+    return len(genres)
+
+
+@app.task
+def download_movie_info(movie_id: int) -> None:
+    logger.info(f"Movie info fetching process started for {movie_id}")
+    movie: Movie = Movie.objects.get(id=movie_id)
+    movie_content_id: Optional[int] = (
+        movie.movie_content.order_by("-id").values_list("id", flat=True).first()
+    )
+    with track_stage(movie_content_id, PipelineStageName.MOVIE_INFO):
+        response: Dict[str, Any] = get_moviedb_client().find_by_imdb_id(movie.imdb_id)
+        update_movie_info(movie=movie, response=response)
+
+    download_movie_images.delay(movie_id=movie.id)
 
     logger.info(f"Movie info fetching process ended for {movie}")
@@ -0,0 +1,126 @@
+import logging
+import math
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from django.db.models import QuerySet, Sum
+from django.utils import timezone
+
+from panel.models import PipelineStage, PipelineStageName
+from panel.tasks.events import publish_event
+
+logger = logging.getLogger(__name__)
+
+
+def start_stage(movie_content_id: int, stage: str) -> PipelineStage:
+    pipeline_stage: PipelineStage = PipelineStage.objects.create(
+        movie_content_id=movie_content_id, stage=stage, started_at=timezone.now()
+    )
+    publish_event("stage", get_stage_dict(pipeline_stage))
+
+    return pipeline_stage
+
+
+def _finish(stage: PipelineStage, bytes_processed: int, error: str) -> None:
+    stage.finished_at = timezone.now()
+    stage.duration = (stage.finished_at - stage.started_at).total_seconds()
+    stage.bytes_processed = bytes_processed or stage.bytes_processed
+    stage.error = error
+    stage.save(update_fields=["finished_at", "duration", "bytes_processed", "error"])
+    publish_event("stage", get_stage_dict(stage))
+
+
+def finish_stage(
+    movie_content_id: int, stage: str, bytes_processed: int = 0, error: str = ""
+) -> Optional[PipelineStage]:
+    """Finishes the last open stage. Used for stages that span several tasks."""
+    pipeline_stage: Optional[PipelineStage] = (
+        PipelineStage.objects.filter(
+            movie_content_id=movie_content_id, stage=stage, finished_at__isnull=True
+        )
+        .order_by("started_at")
+        .last()
+    )
+    if pipeline_stage:
+        _finish(pipeline_stage, bytes_processed=bytes_processed, error=error)
+
+    return pipeline_stage
+
+
+@contextmanager
+def track_stage(movie_content_id: Optional[int], stage: str) -> Iterator[PipelineStage]:
+    if movie_content_id is None:
+        yield PipelineStage(stage=stage, started_at=timezone.now())
+        return
+
+    pipeline_stage: PipelineStage = start_stage(
+        movie_content_id=movie_content_id, stage=stage
+    )
+    try:
+        yield pipeline_stage
+    except Exception as exc:
+        _finish(pipeline_stage, bytes_processed=0, error=repr(exc))
+        raise
+
+    _finish(pipeline_stage, bytes_processed=pipeline_stage.bytes_processed, error="")
+
+
+def get_stages(movie_id: int) -> "QuerySet[PipelineStage]":
+    return PipelineStage.objects.filter(movie_content__movie=movie_id)
+
+
+def get_stage_dict(stage: PipelineStage) -> Dict[str, Any]:
+    return {
+        "movie_content_id": stage.movie_content_id,
+        "stage": stage.stage,
+        "started_at": stage.started_at.isoformat(),
+        "finished_at": stage.finished_at.isoformat() if stage.finished_at else None,
+        "duration": stage.duration,
+        "bytes_processed": stage.bytes_processed,
+        "error": stage.error,
+    }
+
+
+def percentile(values: List[float], percent: float) -> Optional[float]:
+    if not values:
+        return None
+
+    ordered: List[float] = sorted(values)
+    rank: int = max(math.ceil(percent / 100 * len(ordered)), 1)
+
+    return ordered[rank - 1]
+
+
+def get_stage_statistics() -> Dict[str, Dict[str, Any]]:
+    # A movie content may run a stage more than once, e.g. one remux per video.
+    durations: Dict[str, List[float]] = defaultdict(list)
+    processed: Dict[str, int] = defaultdict(int)
+    for row in (
+        PipelineStage.objects.filter(duration__isnull=False, error="")
+        .order_by()
+        .values("movie_content_id", "stage")
+        .annotate(total_duration=Sum("duration"), total_bytes=Sum("bytes_processed"))
+    ):
+        durations[row["stage"]].append(row["total_duration"])
+        processed[row["stage"]] += row["total_bytes"]
+
+    failures: Dict[str, int] = defaultdict(int)
+    for stage in PipelineStage.objects.exclude(error="").values_list(
+        "stage", flat=True
+    ):
+        failures[stage] += 1
+
+    statistics: Dict[str, Dict[str, Any]] = {}
+    for stage in PipelineStageName.values:
+        values: List[float] = durations[stage]
+        statistics[stage] = {
+            "count": len(values),
+            "failures": failures[stage],
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "mean": sum(values) / len(values) if values else None,
+            "bytes_processed": processed[stage],
+        }
+
+    return statistics
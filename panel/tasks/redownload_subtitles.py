@@ -52,3 +52,5 @@ def redownload_subtitles(movie_id: int) -> None:
             limit=5,
             delete_original=_is_delete_original_files(),
         )
+
+    movie.refresh_summary()
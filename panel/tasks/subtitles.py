@@ -12,8 +12,11 @@ from typing import Dict, Any, Optional, List, Set
 import requests
 from requests import Response
 
+from panel.models import PipelineStageName
+from panel.tasks.file_index import index_folder
 from panel.tasks.inmemory import get_setting
 from panel.tasks.opensubtitles_hasher import get_hash
+from panel.tasks.pipeline import track_stage
 from stream.models import MovieContent, Movie, MovieSubtitle
 from watch.celery import app
 from watch.settings.base import BASE_DIR
@@ -179,6 +182,7 @@ def _add_vtt_files_to_movie_content(
 ) -> None:
     vtt_files: List[PosixPath] = _get_vtt_files_in_folder(subtitles_folder)
     existing: Set[str] = {sub.full_path for sub in movie_content.movie_subtitle.all()}
+    added: bool = False
 
     for vtt_file in vtt_files:
         if str(vtt_file) in existing:
@@ -192,6 +196,10 @@ def _add_vtt_files_to_movie_content(
             suffix=str(vtt_file.suffix.lower()),
         )
         movie_content.movie_subtitle.add(movie_subtitle)
+        added = True
+
+    if added:
+        Movie.refresh_summaries(movie_content_ids=[movie_content.id])
 
 
 def _change_permissions(subtitles_folder: PosixPath) -> None:
@@ -292,16 +300,10 @@ def _get_file_to_lang_map(results: List[List[ApiResponse]]) -> Dict[str, str]:
     return _temp
 
 
-@app.task
-def fetch_subtitles(
-    movie_content_id: int, limit: int = 5, delete_original: bool = False
+def _download_subtitles(
+    movie_content: MovieContent, limit: int, delete_original: bool
 ) -> None:
-    try:
-        movie_content: MovieContent = MovieContent.objects.get(id=movie_content_id)
-    except MovieContent.DoesNotExist:
-        logger.critical(f"MovieContent with {movie_content_id} id does not exist.")
-        raise
-
+    movie_content_id: int = movie_content.id
     if not movie_content.full_path or not Path(movie_content.full_path).exists():
         raise FileNotFoundError(
             f"{movie_content.full_path} does not exist for MovieContent {movie_content_id}"
@@ -362,4 +364,21 @@ def fetch_subtitles(
         file_to_lang=file_to_lang,
     )
     _change_permissions(subtitles_folder=subtitles_folder)
+    index_folder(folder=str(subtitles_folder), movie_content=movie_content)
     logger.info(f"Subtitles are added to movie content {movie_content_id}")
+
+
+@app.task
+def fetch_subtitles(
+    movie_content_id: int, limit: int = 5, delete_original: bool = False
+) -> None:
+    try:
+        movie_content: MovieContent = MovieContent.objects.get(id=movie_content_id)
+    except MovieContent.DoesNotExist:
+        logger.critical(f"MovieContent with {movie_content_id} id does not exist.")
+        raise
+
+    with track_stage(movie_content_id, PipelineStageName.SUBTITLES):
+        _download_subtitles(
+            movie_content=movie_content, limit=limit, delete_original=delete_original
+        )
@@ -0,0 +1,305 @@
+import inspect
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from celery.signals import before_task_publish, task_postrun, task_prerun, task_revoked
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from panel.models import (
+    UNFINISHED_TASK_STATES,
+    MovieContentTask,
+    MovieTorrent,
+    TaskState,
+)
+from panel.tasks.events import publish_event
+from stream.models import Movie
+from watch.celery import app
+
+logger = logging.getLogger(__name__)
+
+
+def _from_movie_torrent(movie_torrent_id: int) -> Optional[int]:
+    return (
+        MovieTorrent.objects.filter(id=movie_torrent_id)
+        .values_list("movie_content_id", flat=True)
+        .first()
+    )
+
+
+def _from_movie(movie_id: int) -> Optional[int]:
+    return (
+        Movie.objects.filter(id=movie_id)
+        .values_list("movie_content", flat=True)
+        .order_by("-movie_content")
+        .first()
+    )
+
+
+# Task name -> (argument name, resolver of the owning movie content id)
+TRACKED_TASKS: Dict[str, Tuple[str, Callable[[int], Optional[int]]]] = {
+    "panel.tasks.torrent.download_torrent": ("movie_content_id", int),
+    "panel.tasks.torrent.check_and_process_torrent": (
+        "movie_torrent_id",
+        _from_movie_torrent,
+    ),
+    "panel.tasks.torrent.process_videos_in_folder": ("movie_content_id", int),
+    "panel.tasks.subtitles.fetch_subtitles": ("movie_content_id", int),
+    "panel.tasks.moviedb.download_movie_info": ("movie_id", _from_movie),
+}
+
+
+# Rows still STARTED after this long, without a worker running them, are failed.
+LOST_TASK_SECONDS: int = 5 * 60
+
+
+def is_registered(task_name: Optional[str]) -> bool:
+    """Every task is listed on the background processes page, except celery's own
+    tasks and the ones that are not traced."""
+    task: Any = app.tasks.get(task_name or "")
+    return (
+        task is not None
+        and not task_name.startswith("celery.")
+        and getattr(task, "is_traced", True)
+    )
+
+
+def _get_argument(task_name: str, name: str, args: List[Any], kwargs: Dict) -> Any:
+    if name in kwargs:
+        return kwargs[name]
+
+    parameters: List[str] = list(inspect.signature(app.tasks[task_name].run).parameters)
+    if name in parameters and parameters.index(name) < len(args):
+        return args[parameters.index(name)]
+
+    return None
+
+
+def get_movie_content_id(
+    task_name: str, args: List[Any], kwargs: Dict[str, Any]
+) -> Optional[int]:
+    if task_name not in TRACKED_TASKS:
+        return None
+
+    argument, resolver = TRACKED_TASKS[task_name]
+    value: Any = _get_argument(task_name, argument, args, kwargs)
+    if value is None:
+        return None
+
+    return resolver(value)
+
+
+def register_task(
+    task_id: str,
+    task_name: str,
+    args: List[Any],
+    kwargs: Dict[str, Any],
+    args_repr: str = "",
+    eta: Optional[str] = None,
+) -> None:
+    movie_content_id: Optional[int] = get_movie_content_id(task_name, args, kwargs)
+    # Retries are published again with the same task id.
+    MovieContentTask.objects.update_or_create(
+        task_id=task_id,
+        defaults={
+            "movie_content_id": movie_content_id,
+            "name": task_name,
+            "args": args_repr or repr(args),
+            "eta": parse_datetime(eta) if eta else None,
+        },
+    )
+
+
+def set_task_state(task_id: str, state: str) -> int:
+    values: Dict[str, Any] = {"state": state, "updated_at": timezone.now()}
+    if state == TaskState.STARTED:
+        values["started_at"] = values["updated_at"]
+    elif state not in UNFINISHED_TASK_STATES:
+        values["finished_at"] = values["updated_at"]
+
+    updated: int = MovieContentTask.objects.filter(task_id=task_id).update(**values)
+    if updated:
+        publish_event("task", {"task_id": task_id, "state": state})
+
+    return updated
+
+
+# The row is written before the message is sent, so a worker can not start the task
+# before it exists.
+@before_task_publish.connect
+def _register_published_task(
+    sender: Optional[str] = None,
+    headers: Optional[Dict[str, Any]] = None,
+    body: Any = None,
+    **kwargs,
+) -> None:
+    if not is_registered(sender) or not headers:
+        return
+
+    try:
+        args, task_kwargs, _ = body
+        register_task(
+            task_id=headers["id"],
+            task_name=sender,
+            args=args,
+            kwargs=task_kwargs,
+            args_repr=headers.get("argsrepr", ""),
+            eta=headers.get("eta"),
+        )
+    except Exception:
+        logger.exception(f"Could not register task {sender}")
+
+
+@task_prerun.connect
+def _register_started_task(
+    sender: Any = None,
+    task_id: str = "",
+    args: Any = None,
+    kwargs: Optional[Dict[str, Any]] = None,
+    **extra,
+) -> None:
+    if not is_registered(getattr(sender, "name", None)):
+        return
+
+    try:
+        if set_task_state(task_id=task_id, state=TaskState.STARTED):
+            return
+
+        # Published by a process that did not register it, e.g. before an update.
+        register_task(
+            task_id=task_id,
+            task_name=sender.name,
+            args=list(args or []),
+            kwargs=kwargs or {},
+        )
+        set_task_state(task_id=task_id, state=TaskState.STARTED)
+    except Exception:
+        logger.exception(f"Could not register task {sender.name}")
+
+
+@task_postrun.connect
+def _register_finished_task(
+    sender: Any = None, task_id: str = "", state: Optional[str] = None, **kwargs
+) -> None:
+    if is_registered(getattr(sender, "name", None)) and state in TaskState.values:
+        set_task_state(task_id=task_id, state=state)
+
+
+@task_revoked.connect
+def _register_revoked_task(request: Any = None, **kwargs) -> None:
+    if is_registered(getattr(request, "task", None)):
+        set_task_state(task_id=request.id, state=TaskState.REVOKED)
+
+
+def _get_active_task_ids() -> Optional[Set[str]]:
+    active: Optional[Dict[str, List[Dict[str, Any]]]] = app.control.inspect().active()
+    if active is None:
+        return None
+
+    return {task["id"] for tasks in active.values() for task in tasks}
+
+
+@app.task
+def fail_lost_tasks() -> int:
+    """Tasks of a worker that was killed never finish. One broadcast every few minutes
+    finds the started rows that no worker is running."""
+    started_before: datetime = timezone.now() - timedelta(seconds=LOST_TASK_SECONDS)
+    task_ids: List[str] = list(
+        MovieContentTask.objects.filter(
+            state=TaskState.STARTED, started_at__lt=started_before
+        ).values_list("task_id", flat=True)
+    )
+    if not task_ids:
+        return 0
+
+    active: Optional[Set[str]] = _get_active_task_ids()
+    if active is None:
+        # No worker answered in time, nothing can be told apart.
+        return 0
+
+    lost: Set[str] = set(task_ids) - active
+    now: datetime = timezone.now()
+    # Tasks that finished meanwhile keep their state.
+    failed: int = MovieContentTask.objects.filter(
+        task_id__in=lost, state=TaskState.STARTED
+    ).update(state=TaskState.FAILURE, finished_at=now, updated_at=now)
+    for task_id in lost:
+        publish_event("task", {"task_id": task_id, "state": TaskState.FAILURE})
+
+    return failed
+
+
+@app.task
+def remove_finished_tasks() -> int:
+    removed, _ = MovieContentTask.objects.filter(
+        finished_at__lt=timezone.now()
+        - timedelta(days=settings.TASK_RUN_RETENTION_DAYS)
+    ).delete()
+
+    return removed
+
+
+def get_unfinished_tasks() -> "QuerySet[MovieContentTask]":
+    return MovieContentTask.objects.filter(state__in=UNFINISHED_TASK_STATES).order_by(
+        "created_at"
+    )
+
+
+def get_task_ids(movie_content_ids: Iterable[int]) -> List[str]:
+    return list(
+        get_unfinished_tasks()
+        .filter(movie_content_id__in=movie_content_ids)
+        .values_list("task_id", flat=True)
+    )
+
+
+def revoke_task_ids(task_ids: List[str]) -> None:
+    if not task_ids:
+        return
+
+    app.control.revoke(task_ids)
+    MovieContentTask.objects.filter(task_id__in=task_ids).update(
+        state=TaskState.REVOKED, finished_at=timezone.now(), updated_at=timezone.now()
+    )
+
+
+def revoke_tasks(movie_content_ids: Iterable[int]) -> List[str]:
+    task_ids: List[str] = get_task_ids(movie_content_ids=movie_content_ids)
+    revoke_task_ids(task_ids=task_ids)
+
+    return task_ids
+
+
+def _get_task_dict(task: MovieContentTask) -> Dict[str, Any]:
+    return {
+        "id": task.task_id,
+        "name": task.name,
+        "args": task.args,
+        "movie_content_id": task.movie_content_id,
+        "state": task.state,
+        "time_start": task.started_at.timestamp() if task.started_at else None,
+    }
+
+
+def get_task_status() -> Dict[str, List[Dict[str, Any]]]:
+    """Same layout as the active, reserved and scheduled worker inspect results."""
+    status: Dict[str, List[Dict[str, Any]]] = {
+        "active": [],
+        "reserved": [],
+        "scheduled": [],
+    }
+    now = timezone.now()
+    for task in get_unfinished_tasks():
+        if task.state == TaskState.STARTED:
+            status["active"].append(_get_task_dict(task))
+        elif task.eta and task.eta > now:
+            status["scheduled"].append(
+                {"eta": task.eta.isoformat(), "request": _get_task_dict(task)}
+            )
+        else:
+            status["reserved"].append(_get_task_dict(task))
+
+    return status
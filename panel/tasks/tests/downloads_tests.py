@@ -0,0 +1,95 @@
+from typing import Any, Dict, List
+
+import pytest
+from django.utils import timezone
+from pytest_mock import MockerFixture
+
+from panel.models import MovieTorrent, PipelineStage, PipelineStageName
+from panel.tasks.downloads import get_download_queue, set_download_priority
+from panel.tests.factories import MovieTorrentFactory
+from stream.tests.factories import MovieContentFactory, MovieFactory
+
+
+@pytest.fixture
+def torrents() -> List[MovieTorrent]:
+    result: List[MovieTorrent] = []
+    for index, admitted_at in enumerate([timezone.now(), None, None]):
+        movie_torrent: MovieTorrent = MovieTorrentFactory(admitted_at=admitted_at)
+        MovieFactory(
+            title=f"Movie {index}", movie_content=[movie_torrent.movie_content]
+        )
+        result.append(movie_torrent)
+
+    for stage, duration in [
+        (PipelineStageName.DOWNLOAD, 1000.0),
+        (PipelineStageName.REMUX, 50.0),
+    ]:
+        PipelineStage.objects.create(
+            movie_content=MovieContentFactory(),
+            stage=stage,
+            started_at=timezone.now(),
+            duration=duration,
+        )
+
+    return result
+
+
+@pytest.mark.usefixtures("db")
+class TestGetDownloadQueue:
+    def test_estimates_queued_downloads(
+        self, torrents: List[MovieTorrent], mocker: MockerFixture, settings
+    ) -> None:
+        settings.MAX_ACTIVE_DOWNLOADS = 1
+        mocker.patch(
+            "panel.tasks.downloads._get_qbittorrent_torrents",
+            return_value={str(torrents[0].id): {"eta": 100, "progress": 0.5}},
+        )
+
+        queue: List[Dict[str, Any]] = get_download_queue()
+
+        assert [download["movie_torrent_id"] for download in queue] == [
+            torrent.id for torrent in torrents
+        ]
+        assert [download["title"] for download in queue] == [
+            "Movie 0",
+            "Movie 1",
+            "Movie 2",
+        ]
+        assert [download["state"] for download in queue] == [
+            "downloading",
+            "queued",
+            "queued",
+        ]
+        assert [download["download_eta"] for download in queue] == [
+            100.0,
+            1100.0,
+            2100.0,
+        ]
+        assert [download["ready_eta"] for download in queue] == [
+            150.0,
+            1150.0,
+            2150.0,
+        ]
+        assert queue[0]["progress"] == 0.5
+
+    def test_unknown_without_history(self, mocker: MockerFixture) -> None:
+        mocker.patch("panel.tasks.downloads._get_qbittorrent_torrents", return_value={})
+        MovieTorrentFactory()
+
+        assert get_download_queue()[0]["ready_eta"] is None
+
+
+@pytest.mark.usefixtures("db")
+def test_set_download_priority_moves_the_queue(
+    torrents: List[MovieTorrent], mocker: MockerFixture, settings
+) -> None:
+    settings.MAX_ACTIVE_DOWNLOADS = 1
+    mocker.patch("panel.tasks.downloads._get_qbittorrent_torrents", return_value={})
+
+    set_download_priority(movie_torrent_id=torrents[2].id, priority=3)
+
+    assert [download["movie_torrent_id"] for download in get_download_queue()] == [
+        torrents[0].id,
+        torrents[2].id,
+        torrents[1].id,
+    ]
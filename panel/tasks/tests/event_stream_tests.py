@@ -0,0 +1,180 @@
+import json
+from itertools import islice
+from typing import Any, Dict, List
+from unittest.mock import MagicMock
+
+import pytest
+from django.core.cache import cache
+from pytest_mock import MockerFixture
+
+from panel.tasks import event_stream
+from panel.tasks.event_stream import (
+    open_event_stream,
+    publish_torrent_progress,
+    stream_events,
+)
+from panel.tasks.events import format_event
+from panel.tasks.torrent_sync import SNAPSHOT_KEY
+
+SNAPSHOT: Dict[str, Any] = {
+    "revision": 1,
+    "torrents": {"aaa": {"name": "A", "progress": 0.1}},
+    "history": [
+        {
+            "revision": 1,
+            "torrents": {"aaa": {"name": "A", "progress": 0.1}},
+            "removed": [],
+        }
+    ],
+    "synced_at": 0.0,
+}
+
+
+@pytest.fixture
+def connection(mocker: MockerFixture) -> MagicMock:
+    connection: MagicMock = MagicMock()
+    mocker.patch("panel.tasks.event_stream.get_connection", return_value=connection)
+    cache.set(SNAPSHOT_KEY, SNAPSHOT)
+
+    yield connection
+
+    cache.delete(SNAPSHOT_KEY)
+
+
+def _get_message(event: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    return {"data": json.dumps({"event": event, "data": data})}
+
+
+def test_format_event() -> None:
+    assert format_event("torrents", {"rid": 1}, event_id=1) == (
+        b'event: torrents\ndata: {"rid": 1}\nid: 1\n\n'
+    )
+
+
+def test_stream_sends_torrent_deltas_and_events(
+    connection: MagicMock, mocker: MockerFixture
+) -> None:
+    connection.set.return_value = False
+    pubsub: MagicMock = connection.pubsub.return_value
+    second: Dict[str, Any] = {
+        **SNAPSHOT,
+        "revision": 2,
+        "history": SNAPSHOT["history"]
+        + [{"revision": 2, "torrents": {"aaa": {"progress": 0.5}}, "removed": []}],
+    }
+    pubsub.get_message.side_effect = [
+        None,
+        _get_message("stage", {"stage": "remux"}),
+        _get_message("torrents", {"rid": 2}),
+    ]
+    mocker.patch(
+        "panel.tasks.event_stream.get_snapshot", side_effect=[SNAPSHOT, second]
+    )
+
+    events: List[bytes] = list(islice(stream_events(), 5))
+
+    assert events[0] == b"retry: 5000\n\n"
+    assert json.loads(events[1].split(b"\n")[1][6:])["full_update"] is True
+    assert events[2] == b": keepalive\n\n"
+    assert events[3] == format_event("stage", {"stage": "remux"})
+    assert events[4] == format_event(
+        "torrents",
+        {
+            "rid": 2,
+            "full_update": False,
+            "torrents": {"aaa": {"progress": 0.5}},
+            "torrents_removed": [],
+        },
+        event_id=2,
+    )
+    pubsub.subscribe.assert_called_once_with(event_stream.EVENTS_CHANNEL)
+
+
+def test_stream_skips_torrents_the_client_has(connection: MagicMock) -> None:
+    connection.set.return_value = False
+    connection.pubsub.return_value.get_message.return_value = None
+
+    events: List[bytes] = list(islice(stream_events(rid=1), 2))
+
+    assert events[1] == b": keepalive\n\n"
+
+
+def test_stream_starts_the_producer_once(
+    connection: MagicMock, mocker: MockerFixture
+) -> None:
+    delay: MagicMock = mocker.patch.object(publish_torrent_progress, "delay")
+    connection.set.side_effect = [True, False]
+    connection.pubsub.return_value.get_message.return_value = None
+
+    list(islice(stream_events(rid=1), 2))
+    list(islice(stream_events(rid=1), 2))
+
+    delay.assert_called_once_with()
+
+
+def test_stream_without_redis(mocker: MockerFixture) -> None:
+    mocker.patch("panel.tasks.event_stream.get_connection", return_value=None)
+
+    assert list(stream_events())[-1] == format_event(
+        "failure", {"message": "Redis is not available."}
+    )
+
+
+class TestOpenEventStream:
+    def test_limits_the_streams_of_a_process(
+        self, connection: MagicMock, mocker: MockerFixture, settings
+    ) -> None:
+        settings.EVENT_STREAMS_PER_PROCESS = 1
+        mocker.patch("panel.tasks.event_stream.is_cache_shared", return_value=True)
+        mocker.patch.dict(event_stream._streams, {"open": 0})
+
+        stream = open_event_stream()
+        assert stream is not None
+        assert open_event_stream() is None
+
+        stream.close()
+        stream.close()
+        assert event_stream._streams["open"] == 0
+        assert open_event_stream() is not None
+
+    def test_refuses_without_a_shared_cache(self, connection: MagicMock) -> None:
+        # The tests use a per-process cache.
+        assert open_event_stream() is None
+
+
+class TestPublishTorrentProgress:
+    def test_stops_without_listeners(
+        self, connection: MagicMock, mocker: MockerFixture
+    ) -> None:
+        sync_torrents: MagicMock = mocker.patch(
+            "panel.tasks.event_stream.sync_torrents"
+        )
+        connection.pubsub_numsub.return_value = [(b"vigilio:panel-events", 0)]
+
+        publish_torrent_progress()
+
+        sync_torrents.assert_not_called()
+        connection.delete.assert_called_once_with(event_stream.PRODUCER_KEY)
+
+    def test_publishes_new_revisions(
+        self, connection: MagicMock, mocker: MockerFixture, settings
+    ) -> None:
+        settings.TORRENT_SYNC_SECONDS = 2
+        mocker.patch(
+            "panel.tasks.event_stream.sync_torrents", return_value={"revision": 3}
+        )
+        publish_event: MagicMock = mocker.patch(
+            "panel.tasks.event_stream.publish_event"
+        )
+        apply_async: MagicMock = mocker.patch.object(
+            publish_torrent_progress, "apply_async"
+        )
+        connection.pubsub_numsub.return_value = [(b"vigilio:panel-events", 1)]
+        connection.getset.side_effect = [b"2", b"3"]
+
+        publish_torrent_progress()
+        publish_torrent_progress()
+
+        publish_event.assert_called_once_with("torrents", {"rid": 3})
+        apply_async.assert_called_with(countdown=2)
+        assert apply_async.call_count == 2
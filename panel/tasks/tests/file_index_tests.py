@@ -0,0 +1,131 @@
+import os
+import shutil
+from pathlib import PosixPath
+from typing import Dict, Set
+
+import pytest
+from django.conf import settings
+from pytest_mock import MockerFixture
+
+from panel.models import MediaFile
+from panel.tasks.file_index import (
+    scan_folder,
+    index_folder,
+    get_indexed_files,
+    record_file,
+    remove_from_index,
+    scan_media_folder,
+)
+from stream.models import MovieContent
+from stream.tests.factories import MovieContentFactory
+
+
+def _create_tree(root: PosixPath) -> PosixPath:
+    folder: PosixPath = root / "movie"
+    (folder / "subs").mkdir(parents=True)
+    (folder / "movie.mp4").write_bytes(b"video")
+    (folder / "subs" / "eng.srt").write_bytes(b"subtitle")
+
+    return folder
+
+
+def _indexed_paths(folder: PosixPath) -> Set[str]:
+    return set(get_indexed_files(str(folder)).values_list("full_path", flat=True))
+
+
+def test_scan_folder(tmp_path: PosixPath) -> None:
+    folder: PosixPath = _create_tree(tmp_path)
+
+    entries = {entry.full_path: entry for entry in scan_folder(str(folder))}
+
+    assert set(entries) == {
+        str(folder),
+        str(folder / "movie.mp4"),
+        str(folder / "subs"),
+        str(folder / "subs" / "eng.srt"),
+    }
+    assert entries[str(folder)].is_dir is True
+    assert entries[str(folder / "movie.mp4")].size == 5
+
+
+def test_scan_folder_missing(tmp_path: PosixPath) -> None:
+    assert list(scan_folder(str(tmp_path / "missing"))) == []
+
+
+@pytest.mark.usefixtures("db")
+class TestIndexFolder:
+    def test_creates_entries(self, tmp_path: PosixPath) -> None:
+        folder: PosixPath = _create_tree(tmp_path)
+        movie_content: MovieContent = MovieContentFactory()
+
+        result: Dict[str, int] = index_folder(str(folder), movie_content=movie_content)
+
+        assert result == {"created": 4, "updated": 0, "removed": 0}
+        assert MediaFile.objects.filter(movie_content=movie_content).count() == 4
+
+    def test_is_incremental(self, tmp_path: PosixPath) -> None:
+        folder: PosixPath = _create_tree(tmp_path)
+        index_folder(str(folder))
+
+        assert index_folder(str(folder)) == {"created": 0, "updated": 0, "removed": 0}
+
+        (folder / "movie.mp4").write_bytes(b"longer video")
+        os.utime(str(folder / "movie.mp4"), (1, 1))
+        shutil.rmtree(str(folder / "subs"))
+        (folder / "eng.vtt").touch()
+
+        assert index_folder(str(folder)) == {"created": 1, "updated": 2, "removed": 2}
+        assert MediaFile.objects.get(full_path=str(folder / "movie.mp4")).size == 12
+
+    def test_does_not_touch_siblings(self, tmp_path: PosixPath) -> None:
+        folder: PosixPath = _create_tree(tmp_path)
+        sibling: PosixPath = tmp_path / "movie2"
+        sibling.mkdir()
+        index_folder(str(sibling))
+        index_folder(str(folder))
+
+        assert _indexed_paths(sibling) == {str(sibling)}
+
+    def test_remove_from_index(self, tmp_path: PosixPath) -> None:
+        folder: PosixPath = _create_tree(tmp_path)
+        index_folder(str(folder))
+
+        remove_from_index(str(folder / "subs"))
+
+        assert _indexed_paths(folder) == {str(folder), str(folder / "movie.mp4")}
+
+
+@pytest.mark.usefixtures("db")
+def test_record_file(tmp_path: PosixPath) -> None:
+    folder: PosixPath = _create_tree(tmp_path)
+    index_folder(str(folder))
+    movie_content: MovieContent = MovieContentFactory()
+    (tmp_path / "extra.mp4").write_bytes(b"extra")
+
+    record_file(str(folder / "movie.mp4"), movie_content=movie_content, is_skipped=True)
+    record_file(str(tmp_path / "extra.mp4"), movie_content=movie_content, is_extra=True)
+
+    assert dict(
+        MediaFile.objects.filter(movie_content=movie_content).values_list(
+            "name", "size"
+        )
+    ) == {"movie.mp4": 5, "extra.mp4": 5}
+    assert MediaFile.objects.get(name="movie.mp4").is_skipped is True
+    assert MediaFile.objects.get(name="extra.mp4").is_extra is True
+    assert record_file(str(folder / "missing.mp4")) is None
+    assert index_folder(str(folder)) == {"created": 0, "updated": 0, "removed": 0}
+
+
+@pytest.mark.usefixtures("db")
+def test_scan_media_folder(tmp_path: PosixPath, mocker: MockerFixture) -> None:
+    mocker.patch.object(settings, "MEDIA_FOLDER", str(tmp_path))
+    folder: PosixPath = _create_tree(tmp_path)
+    (tmp_path / "images").mkdir()
+    movie_content: MovieContent = MovieContentFactory(main_folder="movie")
+    MediaFile.objects.create(full_path=str(tmp_path / "deleted"), name="deleted")
+    MediaFile.objects.create(full_path=str(tmp_path / "deleted" / "a"), name="a")
+
+    scan_media_folder()
+
+    assert _indexed_paths(tmp_path) == _indexed_paths(folder)
+    assert MediaFile.objects.filter(movie_content=movie_content).count() == 4
@@ -0,0 +1,120 @@
+from pathlib import PosixPath
+from typing import Dict
+
+import pytest
+from django.conf import settings
+from pytest_mock import MockerFixture
+
+from panel.tasks.images import cache_movie_images, download_movie_images, _get_version
+from stream.models import Movie
+from stream.tests.factories import MovieFactory
+
+POSTER: str = "https://image.tmdb.org/t/p/original/poster.jpg"
+BACKDROP: str = "https://image.tmdb.org/t/p/original/backdrop.jpg"
+
+
+def _download(url: str, file_path: PosixPath) -> bool:
+    file_path.write_bytes(b"image")
+    return True
+
+
+def _resize(source: PosixPath, target: PosixPath, width: int) -> bool:
+    target.write_bytes(b"variant")
+    return True
+
+
+@pytest.fixture
+def media_folder(mocker: MockerFixture, tmp_path: PosixPath) -> PosixPath:
+    mocker.patch.object(settings, "MEDIA_FOLDER", str(tmp_path))
+
+    return tmp_path
+
+
+@pytest.mark.usefixtures("db")
+class TestCacheMovieImages:
+    def test_creates_variants(
+        self, media_folder: PosixPath, mocker: MockerFixture
+    ) -> None:
+        mocker.patch("panel.tasks.images.download_image", _download)
+        mocker.patch("panel.tasks.images.resize_image", _resize)
+        movie: Movie = MovieFactory(poster_path_big=POSTER, backdrop_path_big=BACKDROP)
+
+        result: Dict[str, str] = cache_movie_images(movie=movie)
+
+        poster: str = _get_version(POSTER)
+        backdrop: str = _get_version(BACKDROP)
+        assert result == {
+            "poster_path_small": f"images/{movie.id}/poster_path_small.{poster}.webp",
+            "poster_path_big": f"images/{movie.id}/poster_path_big.{poster}.webp",
+            "backdrop_path_small": f"images/{movie.id}/backdrop_path_small.{backdrop}.webp",
+            "backdrop_path_big": f"images/{movie.id}/backdrop_path_big.{backdrop}.webp",
+        }
+        assert {
+            item.name for item in (media_folder / "images" / str(movie.id)).iterdir()
+        } == {PosixPath(path).name for path in result.values()}
+
+    def test_skips_download_when_variants_exist(
+        self, media_folder: PosixPath, mocker: MockerFixture
+    ) -> None:
+        mocker.patch("panel.tasks.images.resize_image", _resize)
+        download = mocker.patch(
+            "panel.tasks.images.download_image", side_effect=_download
+        )
+        movie: Movie = MovieFactory(poster_path_big=POSTER)
+
+        first: Dict[str, str] = cache_movie_images(movie=movie)
+        second: Dict[str, str] = cache_movie_images(movie=movie)
+
+        assert first == second
+        assert download.call_count == 1
+
+    def test_falls_back_to_jpg(
+        self, media_folder: PosixPath, mocker: MockerFixture
+    ) -> None:
+        def _resize_jpg(source: PosixPath, target: PosixPath, width: int) -> bool:
+            assert source != target
+            return target.suffix == ".jpg" and _resize(source, target, width)
+
+        mocker.patch("panel.tasks.images.download_image", _download)
+        mocker.patch("panel.tasks.images.resize_image", _resize_jpg)
+        movie: Movie = MovieFactory(poster_path_big=POSTER)
+
+        result: Dict[str, str] = cache_movie_images(movie=movie)
+
+        assert result["poster_path_small"].endswith(".jpg")
+        assert result["poster_path_big"].endswith(".jpg")
+        assert {
+            item.name for item in (media_folder / "images" / str(movie.id)).iterdir()
+        } == {PosixPath(path).name for path in result.values()}
+
+    def test_removes_old_versions(
+        self, media_folder: PosixPath, mocker: MockerFixture
+    ) -> None:
+        mocker.patch("panel.tasks.images.download_image", _download)
+        mocker.patch("panel.tasks.images.resize_image", _resize)
+        movie: Movie = MovieFactory(poster_path_big=POSTER)
+        old: Dict[str, str] = cache_movie_images(movie=movie)
+
+        movie.poster_path_big = POSTER.replace("poster", "new_poster")
+        new: Dict[str, str] = cache_movie_images(movie=movie)
+
+        assert old != new
+        for path in old.values():
+            assert not (media_folder / path).exists()
+
+    def test_ignores_missing_images(self, media_folder: PosixPath) -> None:
+        movie: Movie = MovieFactory()
+
+        assert cache_movie_images(movie=movie) == {}
+
+
+@pytest.mark.usefixtures("db")
+def test_download_movie_images(media_folder: PosixPath, mocker: MockerFixture) -> None:
+    mocker.patch("panel.tasks.images.download_image", _download)
+    mocker.patch("panel.tasks.images.resize_image", _resize)
+    movie: Movie = MovieFactory(poster_path_big=POSTER)
+
+    download_movie_images(movie.id)
+
+    movie.refresh_from_db()
+    assert set(movie.local_images.keys()) == {"poster_path_small", "poster_path_big"}
@@ -38,6 +38,10 @@ class MockClient:
     def download_from_file(link: str = "", **kwargs) -> None:
         ...
 
+    @staticmethod
+    def set_max_priority(infohash_list: List[str]) -> None:
+        ...
+
 
 class MockClientRaises:
     def __init__(self, *args, **kwargs) -> None:
@@ -0,0 +1,117 @@
+from typing import List
+
+import pytest
+from pytest_mock import MockerFixture
+
+from panel.api.serializers import MovieImportSerializer
+from panel.tasks.movie_import import (
+    ImportResult,
+    enqueue_downloads,
+    import_movies,
+    parse_imdb_id,
+)
+from stream.models import Movie
+from stream.tests.factories import MovieContentFactory, MovieFactory
+
+MAGNET: str = "magnet:?xt=urn:btih:"
+
+
+def test_parse_imdb_id() -> None:
+    assert parse_imdb_id("https://www.imdb.com/title/tt0050083/") == "tt0050083"
+    assert parse_imdb_id(" tt0050083 ") == "tt0050083"
+
+
+@pytest.mark.usefixtures("db")
+def test_import_movies(django_assert_max_num_queries) -> None:
+    existing: Movie = MovieFactory(
+        imdb_id="tt0000001",
+        movie_content=[MovieContentFactory(torrent_source=f"{MAGNET}a")],
+    )
+    for _ in range(2):
+        MovieFactory(imdb_id="tt0000009")
+    entries: List = [
+        ("tt0000001", f"{MAGNET}a"),
+        ("tt0000001", f"{MAGNET}b"),
+        ("https://www.imdb.com/title/tt0000002/", f"{MAGNET}c"),
+        ("tt0000002", f"{MAGNET}d"),
+        ("tt0000003", f"{MAGNET}d"),
+        ("tt0000009", f"{MAGNET}e"),
+    ]
+
+    # Two lookups, movies, contents and their links, refetching keys on SQLite.
+    with django_assert_max_num_queries(9):
+        result: ImportResult = import_movies(entries)
+
+    assert [movie["source"] for movie in result.added] == [
+        f"{MAGNET}b",
+        f"{MAGNET}c",
+        f"{MAGNET}d",
+    ]
+    assert [movie["source"] for movie in result.skipped] == [
+        f"{MAGNET}d",
+        f"{MAGNET}a",
+        f"{MAGNET}e",
+    ]
+    assert Movie.objects.filter(imdb_id="tt0000002").count() == 1
+    assert not Movie.objects.filter(imdb_id="tt0000003").exists()
+    assert set(existing.movie_content.values_list("torrent_source", flat=True)) == {
+        f"{MAGNET}a",
+        f"{MAGNET}b",
+    }
+    assert set(
+        Movie.objects.get(imdb_id="tt0000002").movie_content.values_list(
+            "id", flat=True
+        )
+    ) == {result.added[1]["movie_content_id"], result.added[2]["movie_content_id"]}
+    assert [movie["is_new_movie"] for movie in result.added] == [False, True, True]
+
+
+@pytest.mark.usefixtures("db")
+def test_import_movies_in_chunks(mocker: MockerFixture) -> None:
+    mocker.patch("panel.tasks.movie_import.LOOKUP_CHUNK_SIZE", 2)
+    MovieContentFactory(torrent_source=f"{MAGNET}0")
+    entries: List = [(f"tt000000{index}", f"{MAGNET}{index}") for index in range(5)]
+
+    result: ImportResult = import_movies(entries)
+
+    assert [movie["source"] for movie in result.skipped] == [f"{MAGNET}0"]
+    assert [movie["imdb_id"] for movie in result.added] == [
+        f"tt000000{index}" for index in range(1, 5)
+    ]
+    assert len({movie["movie_content_id"] for movie in result.added}) == 4
+    assert Movie.objects.filter(imdb_id__startswith="tt000000").count() == 4
+
+
+@pytest.mark.usefixtures("db")
+def test_enqueue_downloads_is_rate_limited(mocker: MockerFixture, settings) -> None:
+    settings.MOVIE_IMPORT_RATE = 2
+    delay = mocker.patch("panel.tasks.movie_import.download_torrent.delay")
+    apply_async = mocker.patch("panel.tasks.movie_import.enqueue_downloads.apply_async")
+    ids: List[int] = [MovieContentFactory().id for _ in range(3)]
+
+    enqueue_downloads([ids[0], 999, ids[1], ids[2]])
+
+    delay.assert_called_once_with(ids[0])
+    apply_async.assert_called_once_with(([ids[1], ids[2]],), countdown=60)
+
+
+class TestMovieImportSerializer:
+    def test_reads_csv_and_movies(self) -> None:
+        serializer = MovieImportSerializer(
+            data={
+                "movies": [{"imdbId": "tt0000001", "source": f"{MAGNET}a"}],
+                "csv": f"imdb_id,source\ntt0000002,{MAGNET}b\n\n",
+            }
+        )
+
+        assert serializer.is_valid(), serializer.errors
+        assert [movie.imdb_id for movie in serializer.object] == [
+            "tt0000001",
+            "tt0000002",
+        ]
+
+    @pytest.mark.parametrize(
+        "data", [{}, {"csv": "tt0000001"}, {"csv": "tt0000001,short"}]
+    )
+    def test_invalid(self, data) -> None:
+        assert not MovieImportSerializer(data=data).is_valid()
@@ -1,20 +1,17 @@
-import json
-from typing import Union, Dict, Any
+from typing import Union, Dict, Any, List
 
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
 from django.conf import settings
 from pytest_mock import MockerFixture
 
-import panel
 from panel.tasks.moviedb import (
     _get_moviedb_api_key,
-    _get_response_from_moviedb_api,
     download_movie_info,
+    refresh_categories,
 )
-from panel.tasks.tests.mocks import MockRequest
 from panel.tasks.tests.test_utils import MOVIEDB
-from stream.models import Movie
+from stream.models import Movie, MovieDBCategory
 from stream.tests.factories import MovieFactory
 
 
@@ -45,57 +42,13 @@ class TestGetMovieDBApiKey:
         assert _get_moviedb_api_key() == mockerdb_api
 
 
-class TestGetResponseFromMovieDBApi:
-    def test_raises_when_response_not_200(self, mocker: MonkeyPatch) -> None:
-        mocker.patch("panel.tasks.moviedb.requests", MockRequest)
-        mocker.patch("panel.tasks.tests.mocks.MockRequest.status_code", 404)
-
-        with pytest.raises(Exception) as exc:
-            _get_response_from_moviedb_api("http://test")
-
-        assert str(exc.value) == "Moviedb API returned the status code 404"
-
-    def test_raises_when_response_has_only_empty_lists(
-        self, mocker: MonkeyPatch
-    ) -> None:
-        result: Dict[str, Any] = {
-            "movie_results": [],
-            "person_results": [],
-            "tv_results": [],
-            "tv_episode_results": [],
-            "tv_season_results": [],
-        }
-        mocker.patch("panel.tasks.moviedb.requests", MockRequest)
-        mocker.patch.object(
-            panel.tasks.tests.mocks.MockRequest, "json", lambda x: result
-        )
-
-        with pytest.raises(Exception) as exc:
-            _get_response_from_moviedb_api("http://test")
-
-        assert (
-            str(exc.value) == "Moviedb API returned no results. Possible wrong IMDB ID"
-        )
-
-    def test_returns_result(self, mocker: MonkeyPatch) -> None:
-        mocker.patch("panel.tasks.moviedb.requests", MockRequest)
-        mocker.patch(
-            "panel.tasks.tests.mocks.MockRequest.text",
-            json.dumps(MOVIEDB).encode("UTF-8"),
-        )
-        mocker.patch.object(
-            panel.tasks.tests.mocks.MockRequest, "json", lambda x: {"dummy": "response"}
-        )
-
-        assert _get_response_from_moviedb_api("http://test") == MOVIEDB
-
-
 @pytest.mark.usefixtures("db")
 def test_download_movie_info(mocker: MockerFixture) -> None:
-    mocker.patch.object(settings, "MOVIEDB_API", "lalala")
-    mocker.patch.object(
-        panel.tasks.moviedb, "_get_response_from_moviedb_api", lambda x: MOVIEDB
+    download_movie_images = mocker.patch(
+        "panel.tasks.moviedb.download_movie_images.delay"
     )
+    client = mocker.patch("panel.tasks.moviedb.get_moviedb_client")
+    client.return_value.find_by_imdb_id.return_value = MOVIEDB
     movie: Movie = MovieFactory()
     expected = MOVIEDB["movie_results"][0]
 
@@ -116,3 +69,25 @@ def test_download_movie_info(mocker: MockerFixture) -> None:
     assert expected.get("backdrop_path") in movie.backdrop_path_small
     assert movie.imdb_score == expected.get("vote_average")
     assert movie.is_ready is True
+    download_movie_images.assert_called_once_with(movie_id=movie.id)
+
+
+@pytest.mark.usefixtures("db")
+def test_refresh_categories(mocker: MockerFixture) -> None:
+    genres: List[Dict[str, Any]] = [
+        {"id": 18, "name": "Drama"},
+        {"id": 878, "name": "Science Fiction"},
+    ]
+    MovieDBCategory.objects.filter(moviedb_id=18).update(name="Old name")
+    client = mocker.Mock()
+    client.get_genres.return_value = genres
+
+    assert refresh_categories(client=client) == 2
+    assert dict(
+        MovieDBCategory.objects.filter(moviedb_id__in=[18, 878]).values_list(
+            "moviedb_id", "name"
+        )
+    ) == {
+        18: "Drama",
+        878: "Science Fiction",
+    }
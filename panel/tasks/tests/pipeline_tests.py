@@ -0,0 +1,131 @@
+from datetime import timedelta
+from typing import Any, Dict, List
+
+import pytest
+from django.utils import timezone
+
+from panel.api.handlers import PipelineHandler
+from panel.api.serializers import PipelineData
+from panel.models import PipelineStage, PipelineStageName
+from panel.tasks.pipeline import (
+    finish_stage,
+    get_stage_statistics,
+    percentile,
+    start_stage,
+    track_stage,
+)
+from stream.models import Movie, MovieContent
+from stream.tests.factories import MovieContentFactory, MovieFactory
+
+
+def _create_stage(
+    movie_content: MovieContent, stage: str, duration: float, error: str = ""
+) -> PipelineStage:
+    return PipelineStage.objects.create(
+        movie_content=movie_content,
+        stage=stage,
+        started_at=timezone.now() - timedelta(seconds=duration),
+        finished_at=timezone.now(),
+        duration=duration,
+        error=error,
+    )
+
+
+def test_percentile() -> None:
+    values: List[float] = [float(value) for value in range(1, 21)]
+
+    assert percentile(values, 50) == 10.0
+    assert percentile(values, 95) == 19.0
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([], 50) is None
+
+
+@pytest.mark.usefixtures("db")
+class TestTrackStage:
+    def test_records_duration_and_bytes(self) -> None:
+        movie_content: MovieContent = MovieContentFactory()
+
+        with track_stage(movie_content.id, PipelineStageName.REMUX) as stage:
+            stage.bytes_processed = 1024
+
+        stage.refresh_from_db()
+        assert stage.finished_at is not None
+        assert stage.duration >= 0
+        assert stage.bytes_processed == 1024
+        assert stage.error == ""
+
+    def test_records_errors(self) -> None:
+        movie_content: MovieContent = MovieContentFactory()
+
+        with pytest.raises(ValueError):
+            with track_stage(movie_content.id, PipelineStageName.PROBE):
+                raise ValueError("broken")
+
+        stage: PipelineStage = PipelineStage.objects.get(movie_content=movie_content)
+        assert stage.error == "ValueError('broken')"
+        assert stage.finished_at is not None
+
+    def test_does_nothing_without_movie_content(self) -> None:
+        with track_stage(None, PipelineStageName.PROBE):
+            pass
+
+        assert not PipelineStage.objects.exists()
+
+
+@pytest.mark.usefixtures("db")
+def test_finish_stage_finishes_open_stage() -> None:
+    movie_content: MovieContent = MovieContentFactory()
+    start_stage(movie_content_id=movie_content.id, stage=PipelineStageName.DOWNLOAD)
+
+    stage: PipelineStage = finish_stage(
+        movie_content_id=movie_content.id,
+        stage=PipelineStageName.DOWNLOAD,
+        bytes_processed=2048,
+    )
+
+    assert stage.duration is not None
+    assert stage.bytes_processed == 2048
+    assert (
+        finish_stage(
+            movie_content_id=movie_content.id, stage=PipelineStageName.DOWNLOAD
+        )
+        is None
+    )
+
+
+@pytest.mark.usefixtures("db")
+def test_get_stage_statistics() -> None:
+    for duration in range(1, 11):
+        _create_stage(MovieContentFactory(), PipelineStageName.SUBTITLES, duration)
+    multiple: MovieContent = MovieContentFactory()
+    _create_stage(multiple, PipelineStageName.REMUX, 2)
+    _create_stage(multiple, PipelineStageName.REMUX, 3)
+    _create_stage(multiple, PipelineStageName.PROBE, 1, error="Exception()")
+
+    statistics: Dict[str, Dict[str, Any]] = get_stage_statistics()
+
+    assert statistics["subtitles"]["count"] == 10
+    assert statistics["subtitles"]["p50"] == 5
+    assert statistics["subtitles"]["p95"] == 10
+    assert statistics["subtitles"]["mean"] == 5.5
+    assert statistics["remux"]["count"] == 1
+    assert statistics["remux"]["p50"] == 5
+    assert statistics["probe"]["count"] == 0
+    assert statistics["probe"]["failures"] == 1
+    assert statistics["download"]["p50"] is None
+
+
+@pytest.mark.usefixtures("db")
+def test_pipeline_handler_returns_stages_of_movie() -> None:
+    movie_content: MovieContent = MovieContentFactory()
+    movie: Movie = MovieFactory(movie_content=[movie_content])
+    _create_stage(movie_content, PipelineStageName.MOVE, 1)
+    _create_stage(MovieContentFactory(), PipelineStageName.MOVE, 1)
+
+    result: Dict[str, Any] = PipelineHandler().handle(
+        pipeline_data=PipelineData(movie_id=movie.id)
+    )
+
+    assert [stage["stage"] for stage in result["stages"]] == ["move"]
+    assert result["stages"][0]["movie_content_id"] == movie_content.id
+    assert result["statistics"]["move"]["count"] == 2
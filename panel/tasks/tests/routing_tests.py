@@ -0,0 +1,21 @@
+import pytest
+
+from watch.celery import app
+
+
+@pytest.mark.parametrize(
+    "task_name, queue",
+    [
+        ("panel.tasks.torrent.process_videos_in_folder", "media"),
+        ("panel.tasks.images.download_movie_images", "media"),
+        ("panel.tasks.file_index.scan_media_folder", "media"),
+        ("panel.tasks.file_index.remove_folders", "media"),
+        ("panel.tasks.torrent.download_torrent", "io"),
+        ("panel.tasks.torrent.check_and_process_torrent", "io"),
+        ("panel.tasks.subtitles.fetch_subtitles", "io"),
+        ("panel.tasks.moviedb.download_movie_info", "io"),
+        ("panel.tasks.demo_tasks.delete_demo_users", "io"),
+    ],
+)
+def test_task_routes(task_name: str, queue: str) -> None:
+    assert app.amqp.router.route({}, task_name)["queue"].name == queue
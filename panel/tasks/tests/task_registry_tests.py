@@ -0,0 +1,226 @@
+from datetime import timedelta
+from typing import Any, Dict, List
+
+import pytest
+from django.utils import timezone
+from pytest_mock import MockerFixture
+
+from panel.models import MovieContentTask, MovieTorrent, TaskState
+from panel.tasks.task_registry import (
+    _register_finished_task,
+    _register_published_task,
+    _register_started_task,
+    fail_lost_tasks,
+    get_movie_content_id,
+    get_task_status,
+    register_task,
+    revoke_tasks,
+)
+from panel.tasks.torrent import download_torrent
+from panel.tests.factories import MovieTorrentFactory
+from stream.models import Movie, MovieContent
+from stream.tests.factories import MovieContentFactory, MovieFactory
+
+
+@pytest.mark.usefixtures("db")
+class TestGetMovieContentId:
+    def test_from_keyword(self) -> None:
+        assert (
+            get_movie_content_id(
+                "panel.tasks.subtitles.fetch_subtitles",
+                [],
+                {"movie_content_id": 3, "limit": 5},
+            )
+            == 3
+        )
+
+    def test_from_positional_movie_torrent(self) -> None:
+        movie_torrent: MovieTorrent = MovieTorrentFactory()
+
+        assert (
+            get_movie_content_id(
+                "panel.tasks.torrent.check_and_process_torrent",
+                [movie_torrent.id],
+                {},
+            )
+            == movie_torrent.movie_content_id
+        )
+
+    def test_from_movie(self) -> None:
+        movie_content: MovieContent = MovieContentFactory()
+        movie: Movie = MovieFactory(movie_content=[movie_content])
+
+        assert (
+            get_movie_content_id(
+                "panel.tasks.moviedb.download_movie_info", [], {"movie_id": movie.id}
+            )
+            == movie_content.id
+        )
+
+    def test_ignores_untracked_tasks(self) -> None:
+        assert (
+            get_movie_content_id("panel.tasks.demo_tasks.delete_demo_users", [], {})
+            is None
+        )
+
+
+@pytest.mark.usefixtures("db")
+class TestRegisterTask:
+    def test_registers_once(self) -> None:
+        movie_content: MovieContent = MovieContentFactory()
+
+        for _ in range(2):
+            register_task(
+                task_id="abc",
+                task_name="panel.tasks.torrent.process_videos_in_folder",
+                args=[movie_content.id],
+                kwargs={},
+            )
+
+        assert MovieContentTask.objects.filter(movie_content=movie_content).count() == 1
+
+    def test_registers_published_task(self) -> None:
+        movie_content: MovieContent = MovieContentFactory()
+
+        _register_published_task(
+            sender="panel.tasks.torrent.download_torrent",
+            headers={
+                "id": "xyz",
+                "task": "panel.tasks.torrent.download_torrent",
+                "argsrepr": f"({movie_content.id},)",
+                "eta": "2030-01-01T10:00:00+00:00",
+            },
+            body=([movie_content.id], {}, {}),
+        )
+
+        task: MovieContentTask = MovieContentTask.objects.get(task_id="xyz")
+        assert task.movie_content == movie_content
+        assert task.state == TaskState.PENDING
+        assert task.args == f"({movie_content.id},)"
+        assert task.eta.year == 2030
+
+    def test_registers_tasks_without_movie_content(self) -> None:
+        _register_published_task(
+            sender="panel.tasks.file_index.scan_media_folder",
+            headers={"id": "scan", "argsrepr": "()"},
+            body=([], {}, {}),
+        )
+        _register_published_task(
+            sender="panel.tasks.event_stream.publish_torrent_progress",
+            headers={"id": "progress", "argsrepr": "()"},
+            body=([], {}, {}),
+        )
+
+        assert list(MovieContentTask.objects.values_list("task_id", flat=True)) == [
+            "scan"
+        ]
+        assert MovieContentTask.objects.get().movie_content is None
+
+    def test_registers_task_started_before_it_was_published(self) -> None:
+        movie_content: MovieContent = MovieContentFactory()
+
+        _register_started_task(
+            sender=download_torrent, task_id="abc", args=[movie_content.id], kwargs={}
+        )
+
+        task: MovieContentTask = MovieContentTask.objects.get(task_id="abc")
+        assert task.movie_content == movie_content
+        assert task.state == TaskState.STARTED
+
+
+@pytest.mark.usefixtures("db")
+def test_records_task_lifecycle() -> None:
+    task: MovieContentTask = MovieContentTask.objects.create(
+        movie_content=MovieContentFactory(), task_id="abc", name=download_torrent.name
+    )
+
+    _register_started_task(sender=download_torrent, task_id="abc")
+    task.refresh_from_db()
+    assert task.state == TaskState.STARTED
+    assert task.started_at is not None
+    assert task.finished_at is None
+
+    _register_finished_task(sender=download_torrent, task_id="abc", state="SUCCESS")
+    task.refresh_from_db()
+    assert task.state == TaskState.SUCCESS
+    assert task.finished_at is not None
+
+
+@pytest.mark.usefixtures("db")
+def test_get_task_status() -> None:
+    movie_content: MovieContent = MovieContentFactory()
+    for task_id, state, eta in [
+        ("active", TaskState.STARTED, None),
+        ("reserved", TaskState.PENDING, None),
+        ("scheduled", TaskState.RETRY, timezone.now() + timedelta(minutes=5)),
+        ("done", TaskState.SUCCESS, None),
+    ]:
+        MovieContentTask.objects.create(
+            movie_content=movie_content, task_id=task_id, name="a", state=state, eta=eta
+        )
+
+    status: Dict[str, List[Dict[str, Any]]] = get_task_status()
+
+    assert [task["id"] for task in status["active"]] == ["active"]
+    assert [task["id"] for task in status["reserved"]] == ["reserved"]
+    assert [task["request"]["id"] for task in status["scheduled"]] == ["scheduled"]
+
+
+@pytest.mark.usefixtures("db")
+def test_revoke_tasks_only_revokes_given_contents(mocker: MockerFixture) -> None:
+    revoke = mocker.patch("panel.tasks.task_registry.app.control.revoke")
+    first: MovieContent = MovieContentFactory()
+    second: MovieContent = MovieContentFactory()
+    MovieContentTask.objects.create(movie_content=first, task_id="1", name="a")
+    MovieContentTask.objects.create(movie_content=second, task_id="2", name="a")
+
+    MovieContentTask.objects.create(
+        movie_content=first, task_id="3", name="a", state=TaskState.SUCCESS
+    )
+
+    revoked: List[str] = revoke_tasks(movie_content_ids=[first.id])
+
+    assert revoked == ["1"]
+    revoke.assert_called_once_with(["1"])
+    assert MovieContentTask.objects.get(task_id="1").state == TaskState.REVOKED
+    assert MovieContentTask.objects.get(task_id="2").state == TaskState.PENDING
+
+
+@pytest.mark.usefixtures("db")
+def test_fail_lost_tasks(mocker: MockerFixture) -> None:
+    inspect = mocker.patch("panel.tasks.task_registry.app.control.inspect")
+    inspect.return_value.active.return_value = {"worker@host": [{"id": "running"}]}
+    started_at = timezone.now() - timedelta(hours=1)
+    for task_id, state, started in [
+        ("running", TaskState.STARTED, started_at),
+        ("lost", TaskState.STARTED, started_at),
+        ("just-started", TaskState.STARTED, timezone.now()),
+        ("done", TaskState.SUCCESS, started_at),
+    ]:
+        MovieContentTask.objects.create(
+            task_id=task_id, name="a", state=state, started_at=started
+        )
+
+    assert fail_lost_tasks() == 1
+
+    assert dict(MovieContentTask.objects.values_list("task_id", "state")) == {
+        "running": TaskState.STARTED,
+        "lost": TaskState.FAILURE,
+        "just-started": TaskState.STARTED,
+        "done": TaskState.SUCCESS,
+    }
+
+
+@pytest.mark.usefixtures("db")
+def test_fail_lost_tasks_without_worker_replies(mocker: MockerFixture) -> None:
+    inspect = mocker.patch("panel.tasks.task_registry.app.control.inspect")
+    inspect.return_value.active.return_value = None
+    MovieContentTask.objects.create(
+        task_id="abc",
+        name="a",
+        state=TaskState.STARTED,
+        started_at=timezone.now() - timedelta(hours=1),
+    )
+
+    assert fail_lost_tasks() == 0
+    assert MovieContentTask.objects.get().state == TaskState.STARTED
@@ -0,0 +1,106 @@
+import json
+import os
+import time
+from pathlib import PosixPath
+from typing import Any, Dict
+
+import pytest
+from pytest_mock import MockerFixture
+
+import panel
+from panel.tasks.tests.mocks import MockRequest
+from panel.tasks.tests.test_utils import MOVIEDB
+from panel.tasks.tmdb import TMDBCache, TMDBClient, RateLimiter
+
+
+@pytest.fixture
+def client(mocker: MockerFixture) -> TMDBClient:
+    _client: TMDBClient = TMDBClient(api_key="abcdef")
+    mocker.patch.object(_client, "session", MockRequest)
+
+    return _client
+
+
+class TestTMDBClient:
+    def test_raises_when_response_not_200(
+        self, client: TMDBClient, mocker: MockerFixture
+    ) -> None:
+        mocker.patch("panel.tasks.tests.mocks.MockRequest.status_code", 404)
+
+        with pytest.raises(Exception) as exc:
+            client.find_by_imdb_id("tt0050083")
+
+        assert str(exc.value) == "Moviedb API returned the status code 404"
+
+    def test_raises_when_response_has_only_empty_lists(
+        self, client: TMDBClient, mocker: MockerFixture
+    ) -> None:
+        result: Dict[str, Any] = {
+            "movie_results": [],
+            "person_results": [],
+            "tv_results": [],
+            "tv_episode_results": [],
+            "tv_season_results": [],
+        }
+        mocker.patch("panel.tasks.tests.mocks.MockRequest.text", json.dumps(result))
+
+        with pytest.raises(Exception) as exc:
+            client.find_by_imdb_id("tt0050083")
+
+        assert (
+            str(exc.value) == "Moviedb API returned no results. Possible wrong IMDB ID"
+        )
+
+    def test_returns_result(self, client: TMDBClient, mocker: MockerFixture) -> None:
+        mocker.patch("panel.tasks.tests.mocks.MockRequest.text", json.dumps(MOVIEDB))
+
+        assert client.find_by_imdb_id("tt0050083") == MOVIEDB
+
+    def test_uses_cache(
+        self, client: TMDBClient, mocker: MockerFixture, tmp_path: PosixPath
+    ) -> None:
+        mocker.patch("panel.tasks.tests.mocks.MockRequest.text", json.dumps(MOVIEDB))
+        get = mocker.spy(panel.tasks.tests.mocks.MockRequest, "get")
+        client.cache = TMDBCache(folder=str(tmp_path), max_age=60)
+
+        assert client.find_by_imdb_id("tt0050083") == MOVIEDB
+        assert client.find_by_imdb_id("tt0050083") == MOVIEDB
+        assert get.call_count == 1
+        assert client.cache.hit_rate == 0.5
+
+        assert client.find_by_imdb_id("tt0050083", refresh=True) == MOVIEDB
+        assert get.call_count == 2
+
+
+class TestTMDBCache:
+    def test_returns_none_when_missing(self, tmp_path: PosixPath) -> None:
+        cache: TMDBCache = TMDBCache(folder=str(tmp_path), max_age=60)
+
+        assert cache.get("find_tt0050083") is None
+        assert cache.misses == 1
+
+    def test_returns_saved_value(self, tmp_path: PosixPath) -> None:
+        cache: TMDBCache = TMDBCache(folder=str(tmp_path / "tmdb"), max_age=60)
+        cache.set("find_tt0050083", MOVIEDB)
+
+        assert cache.get("find_tt0050083") == MOVIEDB
+        assert cache.hits == 1
+
+    def test_expires(self, tmp_path: PosixPath) -> None:
+        cache: TMDBCache = TMDBCache(folder=str(tmp_path), max_age=60)
+        cache.set("find_tt0050083", MOVIEDB)
+        old: float = time.time() - 120
+        os.utime(str(tmp_path / "find_tt0050083.json"), (old, old))
+
+        assert cache.get("find_tt0050083") is None
+
+
+def test_rate_limiter_spaces_calls(mocker: MockerFixture) -> None:
+    sleep = mocker.patch("panel.tasks.tmdb.time.sleep")
+    limiter: RateLimiter = RateLimiter(rate=10)
+
+    limiter.wait()
+    limiter.wait()
+
+    assert sleep.call_count == 1
+    assert 0 < sleep.call_args[0][0] <= 0.1
@@ -0,0 +1,154 @@
+from typing import Any, Dict, List
+from unittest.mock import MagicMock
+
+import pytest
+from django.core.cache import cache
+from pytest_mock import MockerFixture
+
+from panel.tasks import torrent_sync
+from panel.tasks.torrent_sync import (
+    get_changes,
+    get_torrent_delta,
+    get_torrent_list,
+    sync_torrents,
+)
+
+RESPONSES: List[Dict[str, Any]] = [
+    {
+        "rid": 1,
+        "full_update": True,
+        "torrents": {
+            "aaa": {"name": "A", "progress": 0.1, "added_on": 2},
+            "bbb": {"name": "B", "progress": 0.5, "added_on": 1},
+        },
+    },
+    {"rid": 2, "torrents": {"aaa": {"progress": 0.2}}},
+    {"rid": 3},
+    {"rid": 4, "torrents_removed": ["bbb"], "torrents": {"ccc": {"name": "C"}}},
+]
+
+
+@pytest.fixture
+def client(mocker: MockerFixture, settings) -> MagicMock:
+    settings.TORRENT_SYNC_SECONDS = 0
+    cache.delete(torrent_sync.SNAPSHOT_KEY)
+    cache.delete(torrent_sync.SNAPSHOT_LOCK_KEY)
+    mocker.patch.dict(torrent_sync._local, {"client": None, "rid": 0, "session": None})
+    client: MagicMock = MagicMock()
+    client.sync_main_data.side_effect = RESPONSES
+    mocker.patch("panel.tasks.torrent_sync.get_qbittorrent_client", return_value=client)
+
+    yield client
+
+    cache.delete(torrent_sync.SNAPSHOT_KEY)
+
+
+def test_get_changes_of_a_full_update() -> None:
+    changed, removed = get_changes(
+        {"aaa": {"progress": 0.1, "name": "A"}, "bbb": {"name": "B"}},
+        {"full_update": True, "torrents": {"aaa": {"progress": 0.2, "name": "A"}}},
+    )
+
+    assert changed == {"aaa": {"progress": 0.2}}
+    assert removed == ["bbb"]
+
+
+def test_sync_torrents_sends_deltas(client: MagicMock) -> None:
+    first: Dict[str, Any] = sync_torrents()
+    assert [torrent["hash"] for torrent in get_torrent_list(first)] == ["bbb", "aaa"]
+    assert first["revision"] == 1
+
+    second: Dict[str, Any] = sync_torrents()
+    assert get_torrent_delta(second, rid=1) == {
+        "rid": 2,
+        "full_update": False,
+        "torrents": {"aaa": {"progress": 0.2}},
+        "torrents_removed": [],
+    }
+
+    # Nothing has changed, the revision stays the same.
+    third: Dict[str, Any] = sync_torrents()
+    assert third["revision"] == 2
+    assert get_torrent_delta(third, rid=2)["torrents"] == {}
+
+    assert get_torrent_delta(sync_torrents(), rid=1) == {
+        "rid": 3,
+        "full_update": False,
+        "torrents": {"aaa": {"progress": 0.2}, "ccc": {"name": "C"}},
+        "torrents_removed": ["bbb"],
+    }
+    assert [call.kwargs["rid"] for call in client.sync_main_data.call_args_list] == [
+        0,
+        1,
+        2,
+        3,
+    ]
+
+
+def test_unknown_revision_gets_everything(client: MagicMock) -> None:
+    snapshot: Dict[str, Any] = sync_torrents()
+
+    delta: Dict[str, Any] = get_torrent_delta(snapshot, rid=10)
+
+    assert delta["full_update"] is True
+    assert set(delta["torrents"]) == {"aaa", "bbb"}
+
+
+def test_snapshot_is_reused_between_syncs(client: MagicMock, settings) -> None:
+    settings.TORRENT_SYNC_SECONDS = 60
+
+    sync_torrents()
+    sync_torrents()
+
+    client.sync_main_data.assert_called_once_with(rid=0)
+
+
+def test_one_process_updates_the_snapshot_at_a_time(client: MagicMock) -> None:
+    snapshot: Dict[str, Any] = sync_torrents()
+    cache.add(torrent_sync.SNAPSHOT_LOCK_KEY, 1)
+
+    assert sync_torrents() == snapshot
+    client.sync_main_data.assert_called_once_with(rid=0)
+
+    cache.delete(torrent_sync.SNAPSHOT_LOCK_KEY)
+    assert sync_torrents()["revision"] == 2
+
+
+def test_updates_fully_after_another_session_wrote(
+    client: MagicMock, mocker: MockerFixture
+) -> None:
+    client.sync_main_data.side_effect = [
+        {"rid": 1, "full_update": True, "torrents": {"aaa": {"state": "downloading"}}},
+        {
+            "rid": 2,
+            "full_update": True,
+            "torrents": {"aaa": {"state": "downloading"}},
+        },
+    ]
+    other: MagicMock = MagicMock()
+    other.sync_main_data.side_effect = [
+        {"rid": 1, "full_update": True, "torrents": {"aaa": {"state": "pausedDL"}}},
+    ]
+
+    sync_torrents()
+    # Another process pauses the torrent in the snapshot with its own session.
+    this_process: Dict[str, Any] = dict(torrent_sync._local)
+    torrent_sync._local.update({"client": other, "rid": 0, "session": "other"})
+    assert get_torrent_list(sync_torrents())[0]["state"] == "pausedDL"
+    torrent_sync._local.update(this_process)
+
+    # Its own delta would be empty, the torrent went back to downloading meanwhile.
+    assert get_torrent_list(sync_torrents())[0]["state"] == "downloading"
+    assert [call.kwargs["rid"] for call in client.sync_main_data.call_args_list] == [
+        0,
+        0,
+    ]
+
+
+def test_logs_in_again_when_the_session_expires(
+    client: MagicMock, mocker: MockerFixture
+) -> None:
+    client.sync_main_data.side_effect = [Exception("403"), RESPONSES[0]]
+
+    assert sync_torrents()["revision"] == 1
+    assert torrent_sync.get_qbittorrent_client.call_count == 2
@@ -2,17 +2,20 @@ import copy
 import json
 import os
 import subprocess
+from datetime import timedelta
 from pathlib import PosixPath, Path
 from typing import Any, Set, Dict, List
 
 import celery
 import pytest
 from django.conf import settings
+from django.core.cache import cache
 from django.test import override_settings
+from django.utils import timezone
 from pytest_mock import MockerFixture
 
 import panel
-from panel.models import MovieTorrent
+from panel.models import MediaFile, MovieTorrent
 from panel.tasks.tests.mocks import MockClient, MockClientRaises, MockSubprocess
 from panel.tasks.tests.test_utils import RAW_INFO, TORRENTS
 from panel.tasks.torrent import (
@@ -21,6 +24,9 @@ from panel.tasks.torrent import (
     is_torrent_complete,
     _get_videos_from_path,
     get_videos_from_folder,
+    iter_video_candidates,
+    select_videos,
+    VideoCandidate,
     _get_video_raw_detail,
     _convert_video_to_mp4,
     _hash,
@@ -36,6 +42,10 @@ from panel.tasks.torrent import (
     _get_root_path,
     process_videos_in_folder,
     download_torrent,
+    admit_downloads,
+    _claim_downloads,
+    get_queued_downloads,
+    ADMISSION_LOCK_KEY,
 )
 from panel.tests.factories import MovieTorrentFactory
 from stream.models import MovieContent, Movie
@@ -144,6 +154,77 @@ class TestGetVideosFromPath:
         assert Path(next(iter(videos))).parent.parent.name == "trailers"
 
 
+class TestIterVideoCandidates:
+    def test_skips_samples(self, tmp_path: PosixPath) -> None:
+        sample = tmp_path / "Sample"
+        sample.mkdir()
+        (sample / "movie.mkv").touch()
+        (tmp_path / "movie-sample.mkv").touch()
+        (tmp_path / "movie.mkv").write_bytes(b"movie")
+
+        candidates: List[VideoCandidate] = list(iter_video_candidates(tmp_path))
+
+        assert candidates == [VideoCandidate(path=tmp_path / "movie.mkv", size=5)]
+
+    def test_keeps_samples_without_other_videos(self, tmp_path: PosixPath) -> None:
+        (tmp_path / "Free.Samples.2012.mkv").write_bytes(b"movie")
+
+        candidates: List[VideoCandidate] = list(iter_video_candidates(tmp_path))
+
+        assert candidates == [
+            VideoCandidate(path=tmp_path / "Free.Samples.2012.mkv", size=5)
+        ]
+
+    def test_skips_small_videos(self, tmp_path: PosixPath, settings) -> None:
+        settings.VIDEO_MIN_SIZE = 2
+        (tmp_path / "small.mp4").write_bytes(b"1")
+        (tmp_path / "large.mp4").write_bytes(b"12")
+
+        assert [
+            candidate.path.name for candidate in iter_video_candidates(tmp_path)
+        ] == ["large.mp4"]
+
+
+class TestSelectVideos:
+    def test_probes_only_the_largest_videos(
+        self, mocker: MockerFixture, settings
+    ) -> None:
+        settings.MAIN_FEATURE_PROBE_COUNT = 2
+        durations: Dict[str, float] = {"movie.mkv": 6000.0, "extended.mkv": 7000.0}
+        get_duration = mocker.patch(
+            "panel.tasks.torrent._get_container_duration",
+            side_effect=lambda path: durations[path.name],
+        )
+        candidates: List[VideoCandidate] = [
+            VideoCandidate(path=Path("/movie/movie.mkv"), size=90),
+            VideoCandidate(path=Path("/movie/featurette.mkv"), size=10),
+            VideoCandidate(path=Path("/movie/extended.mkv"), size=80),
+        ]
+
+        selection = select_videos(candidates)
+
+        assert selection.main == candidates[2]
+        assert selection.skipped == [candidates[0], candidates[1]]
+        assert get_duration.call_count == 2
+
+    def test_keeps_configured_extras(self, mocker: MockerFixture, settings) -> None:
+        settings.VIDEO_EXTRA_PATTERN = r"(?i)featurette"
+        settings.MAIN_FEATURE_PROBE_COUNT = 1
+        get_duration = mocker.patch("panel.tasks.torrent._get_container_duration")
+        candidates: List[VideoCandidate] = [
+            VideoCandidate(path=Path("/movie/featurette.mkv"), size=10),
+            VideoCandidate(path=Path("/movie/movie.mkv"), size=90),
+            VideoCandidate(path=Path("/movie/sample.mkv"), size=5),
+        ]
+
+        selection = select_videos(candidates)
+
+        assert selection.main == candidates[1]
+        assert selection.extras == [candidates[0]]
+        assert selection.skipped == [candidates[2]]
+        get_duration.assert_not_called()
+
+
 class TestGetVideosFromFolder:
     def test_with_file(self, tmp_path) -> None:
         test_file = tmp_path / "testfile.mp4"
@@ -413,6 +494,7 @@ class TestCheckAndProcessTorrent:
         mocker.patch("panel.tasks.torrent.Client", MockClient)
         mocker.patch("shutil.move")
         mocker.patch("panel.tasks.torrent.process_videos_in_folder")
+        admit_downloads = mocker.patch("panel.tasks.torrent.admit_downloads.delay")
         mocker.patch.object(settings, "MEDIA_FOLDER", str(tmp_path))
         movie_torrent: MovieTorrent = MovieTorrentFactory(id=1)
         torrents: List[Dict[str, Any]] = MockClient().torrents(
@@ -426,6 +508,7 @@ class TestCheckAndProcessTorrent:
         assert movie_torrent.is_complete is True
         assert movie_torrent.movie_content.full_path == torrents[0]["content_path"]
         assert movie_torrent.movie_content.main_folder == torrents[0]["content_path"]
+        admit_downloads.assert_called_once()
 
 
 @pytest.mark.usefixtures("db")
@@ -577,6 +660,54 @@ class TestProcessVideosInFolder:
         assert movie_content.is_ready is True
         assert movie.duration == int(float(RAW_INFO["streams"][0]["duration"]))
 
+    def test_processes_only_the_main_feature(
+        self, mocker: MockerFixture, tmp_path: PosixPath, settings
+    ) -> None:
+        settings.MEDIA_FOLDER = str(tmp_path)
+        settings.MAIN_FEATURE_PROBE_COUNT = 1
+        mocker.patch("panel.tasks.torrent.fetch_subtitles.delay")
+        mocker.patch("os.chmod")
+        run = mocker.patch("panel.tasks.torrent.subprocess.run", autospec=True)
+        run.return_value = MockSubprocess(stdout=json.dumps(RAW_INFO).encode("UTF-8"))
+        process_videos = mocker.spy(panel.tasks.torrent, "_process_videos")
+        movie_content: MovieContent = MovieContentFactory(full_path=str(tmp_path))
+        MovieFactory.create(movie_content=[movie_content])
+        (tmp_path / "movie.mp4").write_bytes(b"movie")
+        (tmp_path / "behind the scenes.mp4").write_bytes(b"1")
+
+        process_videos_in_folder(movie_content.id)
+
+        process_videos.assert_called_once_with(
+            videos={tmp_path / "movie.mp4"},
+            delete_original=False,
+            movie_content_id=movie_content.id,
+        )
+        assert list(
+            MediaFile.objects.filter(is_skipped=True).values_list("name", flat=True)
+        ) == ["behind the scenes.mp4"]
+
+    def test_records_extras(
+        self, mocker: MockerFixture, tmp_path: PosixPath, settings
+    ) -> None:
+        settings.MEDIA_FOLDER = str(tmp_path)
+        settings.MAIN_FEATURE_PROBE_COUNT = 1
+        settings.VIDEO_EXTRA_PATTERN = r"(?i)extended"
+        mocker.patch("panel.tasks.torrent.fetch_subtitles.delay")
+        mocker.patch("os.chmod")
+        run = mocker.patch("panel.tasks.torrent.subprocess.run", autospec=True)
+        run.return_value = MockSubprocess(stdout=json.dumps(RAW_INFO).encode("UTF-8"))
+        movie_content: MovieContent = MovieContentFactory(full_path=str(tmp_path))
+        MovieFactory.create(movie_content=[movie_content])
+        (tmp_path / "movie.mp4").write_bytes(b"movie")
+        (tmp_path / "extended scene.mp4").write_bytes(b"1")
+
+        process_videos_in_folder(movie_content.id, delete_original=True)
+
+        extra: MediaFile = MediaFile.objects.get(is_extra=True)
+        assert extra.name == f"{_hash('extended scene.mp4')}.mp4"
+        assert extra.movie_content == movie_content
+        assert not (tmp_path / "extended scene.mp4").exists()
+
     def test_sub_functions_are_called(
         self, tmp_path: PosixPath, mocker: MockerFixture
     ) -> None:
@@ -585,9 +716,7 @@ class TestProcessVideosInFolder:
         mocker.patch("os.chmod")
         mocker.patch("panel.tasks.torrent.Client", MockClient)
         get_root_path = mocker.spy(panel.tasks.torrent, "_get_root_path")
-        get_videos_from_folder = mocker.spy(
-            panel.tasks.torrent, "get_videos_from_folder"
-        )
+        get_video_candidates = mocker.spy(panel.tasks.torrent, "get_video_candidates")
         process_videos = mocker.spy(panel.tasks.torrent, "_process_videos")
         run = mocker.patch("panel.tasks.torrent.subprocess.run", autospec=True)
         run.return_value = MockSubprocess(stdout=json.dumps(RAW_INFO).encode("UTF-8"))
@@ -604,8 +733,10 @@ class TestProcessVideosInFolder:
         )
 
         get_root_path.assert_called_once_with(movie_content_id=movie_content.id)
-        get_videos_from_folder.assert_called_once_with(root_path=str(tmp_path))
-        process_videos.assert_called_once_with(videos={video}, delete_original=True)
+        get_video_candidates.assert_called_once_with(root_path=str(tmp_path))
+        process_videos.assert_called_once_with(
+            videos={video}, delete_original=True, movie_content_id=movie_content.id
+        )
         os.chmod.assert_called_once_with(str((tmp_path / f"{hashed_title}.mp4")), 0o644)
         panel.tasks.torrent.fetch_subtitles.delay.assert_called_once_with(
             movie_content_id=movie_content.id,
@@ -664,6 +795,110 @@ class TestDownloadTorrent:
         panel.tasks.torrent.download_movie_info.delay.assert_called_once()
 
 
+@pytest.mark.usefixtures("db")
+class TestAdmitDownloads:
+    def test_queues_downloads_over_the_limit(
+        self, mocker: MockerFixture, settings
+    ) -> None:
+        settings.MAX_ACTIVE_DOWNLOADS = 1
+        mocker.patch("panel.tasks.torrent.Client", MockClient)
+        mocker.patch("panel.tasks.torrent.check_and_process_torrent.delay")
+        mocker.patch("panel.tasks.torrent.download_movie_info.delay")
+        contents: List[MovieContent] = [MovieContentFactory() for _ in range(3)]
+        for movie_content in contents:
+            MovieFactory.create(movie_content=[movie_content])
+
+        for movie_content in contents:
+            download_torrent(movie_content_id=movie_content.id)
+
+        torrents: List[MovieTorrent] = list(MovieTorrent.objects.order_by("id"))
+        assert [torrent.admitted_at is not None for torrent in torrents] == [
+            True,
+            False,
+            False,
+        ]
+        assert admit_downloads() == []
+
+        torrents[2].priority = 5
+        torrents[2].save()
+        torrents[0].is_complete = True
+        torrents[0].save()
+
+        assert admit_downloads() == [torrents[2].id]
+        panel.tasks.torrent.check_and_process_torrent.delay.assert_called_with(
+            torrents[2].id
+        )
+
+    def test_sets_qbittorrent_priority(self, mocker: MockerFixture) -> None:
+        mocker.patch("panel.tasks.torrent.Client", MockClient)
+        mocker.patch("panel.tasks.torrent.check_and_process_torrent.delay")
+        set_max_priority = mocker.spy(
+            panel.tasks.tests.mocks.MockClient, "set_max_priority"
+        )
+        movie_torrent: MovieTorrent = MovieTorrentFactory(id=1, priority=1)
+
+        assert admit_downloads() == [movie_torrent.id]
+        set_max_priority.assert_called_once_with([TORRENTS[0]["hash"]])
+
+    def test_releases_slots_of_lost_torrents(self, mocker: MockerFixture) -> None:
+        mocker.patch("panel.tasks.torrent.Client", MockClient)
+        mocker.patch("panel.tasks.torrent.check_and_process_torrent.delay")
+        lost: MovieTorrent = MovieTorrentFactory(
+            id=99, admitted_at=timezone.now() - timedelta(days=1)
+        )
+        queued: MovieTorrent = MovieTorrentFactory(id=1)
+
+        with override_settings(MAX_ACTIVE_DOWNLOADS=1):
+            assert admit_downloads() == [queued.id]
+
+        lost.refresh_from_db()
+        assert lost.error == "Torrent could not be found in qbittorrent."
+
+    def test_releases_the_slot_when_the_download_cannot_start(
+        self, mocker: MockerFixture
+    ) -> None:
+        mocker.patch("panel.tasks.torrent.Client", MockClient)
+        mocker.patch(
+            "panel.tasks.torrent._start_download", side_effect=Exception("offline")
+        )
+        movie_torrent: MovieTorrent = MovieTorrentFactory(id=1)
+
+        assert admit_downloads() == []
+
+        movie_torrent.refresh_from_db()
+        assert movie_torrent.admitted_at is not None
+        assert movie_torrent.error == "Exception('offline')"
+
+    def test_two_passes_claim_a_download_once(self) -> None:
+        torrents: List[MovieTorrent] = [MovieTorrentFactory() for _ in range(2)]
+        # Both passes read the queue before either of them claimed it.
+        first_read: List[MovieTorrent] = list(get_queued_downloads())
+        second_read: List[MovieTorrent] = list(get_queued_downloads())
+
+        first: List[MovieTorrent] = _claim_downloads(first_read)
+        second: List[MovieTorrent] = _claim_downloads(second_read)
+
+        assert [torrent.id for torrent in first] == [torrent.id for torrent in torrents]
+        assert second == []
+
+    def test_waits_for_another_admission(self, mocker: MockerFixture) -> None:
+        apply_async = mocker.patch("panel.tasks.torrent.admit_downloads.apply_async")
+        mocker.patch("panel.tasks.torrent.Client", MockClient)
+        start_download = mocker.patch("panel.tasks.torrent._start_download")
+        movie_torrent: MovieTorrent = MovieTorrentFactory(id=1)
+        cache.add(ADMISSION_LOCK_KEY, 1)
+
+        try:
+            assert admit_downloads() == []
+        finally:
+            cache.delete(ADMISSION_LOCK_KEY)
+
+        start_download.assert_not_called()
+        apply_async.assert_called_once_with(countdown=5)
+        movie_torrent.refresh_from_db()
+        assert movie_torrent.admitted_at is None
+
+
 class CreateFileTree:
     @staticmethod
     def setup_basic(tmp_path: PosixPath) -> PosixPath:
@@ -0,0 +1,149 @@
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import pytest
+from django.utils import timezone
+from pytest_mock import MockerFixture
+
+from panel.api.utils import AddMovieHandler
+from panel.models import TaskRun, TaskState
+from panel.tasks.tracing import (
+    _add_trace_headers,
+    _fail_task_run,
+    _finish_task_run,
+    _start_task_run,
+    correlation,
+    get_correlation_id,
+    get_task_runs,
+    remove_old_task_runs,
+    render_task_metrics,
+)
+
+
+def _get_task(retries: int = 0, **headers) -> Any:
+    return SimpleNamespace(
+        name="panel.tasks.torrent.check_and_process_torrent",
+        request=SimpleNamespace(
+            retries=retries,
+            eta=None,
+            delivery_info={"routing_key": "io"},
+            headers=headers,
+        ),
+    )
+
+
+def test_correlation_is_added_to_published_headers() -> None:
+    headers: Dict[str, Any] = {}
+    with correlation("abc") as correlation_id:
+        with correlation() as nested_id:
+            _add_trace_headers(headers=headers)
+
+    assert correlation_id == nested_id == "abc"
+    assert headers["correlation_id"] == "abc"
+    assert headers["published_at"] <= time.time()
+    assert get_correlation_id() is None
+
+    headers = {}
+    _add_trace_headers(headers=headers)
+    assert "correlation_id" not in headers
+
+
+@pytest.mark.usefixtures("db")
+def test_records_retried_task_attempts() -> None:
+    for attempt in range(2):
+        task: Any = _get_task(
+            retries=attempt, correlation_id="abc", published_at=time.time() - 5
+        )
+        _start_task_run(sender=task, task_id="xyz", task=task)
+        # Tasks published by the running task keep the correlation id.
+        assert get_correlation_id() == "abc"
+
+        state: str = TaskState.RETRY if attempt == 0 else TaskState.FAILURE
+        if state == TaskState.FAILURE:
+            _fail_task_run(sender=task, task_id="xyz", exception=ValueError("failed"))
+        _finish_task_run(sender=task, task_id="xyz", task=task, state=state)
+        assert get_correlation_id() is None
+
+    runs: List[TaskRun] = list(TaskRun.objects.order_by("attempt"))
+    assert [run.state for run in runs] == [TaskState.RETRY, TaskState.FAILURE]
+    assert runs[1].error == "ValueError('failed')"
+    for run in runs:
+        assert run.correlation_id == "abc"
+        assert run.queue == "io"
+        assert run.wait_seconds >= 5
+        assert run.duration is not None
+
+
+@pytest.mark.usefixtures("db")
+def test_eager_task_is_recorded() -> None:
+    remove_old_task_runs.apply(headers={"correlation_id": "abc"})
+
+    run: TaskRun = TaskRun.objects.get(name=remove_old_task_runs.name)
+    assert run.correlation_id == "abc"
+    assert run.state == TaskState.SUCCESS
+    assert run.wait_seconds is None
+
+
+@pytest.mark.usefixtures("db")
+def test_add_movie_handler_shares_correlation_id(mocker: MockerFixture) -> None:
+    seen: List[Optional[str]] = []
+    mocker.patch(
+        "panel.tasks.torrent.download_torrent.delay",
+        side_effect=lambda *args: seen.append(get_correlation_id()),
+    )
+
+    handler: AddMovieHandler = AddMovieHandler(
+        source="magnet:?xt=urn:btih:abc", imdb_id="tt0000001"
+    )
+    handler.handle()
+
+    assert seen == [handler.correlation_id]
+    assert handler.correlation_id
+    assert get_correlation_id() is None
+
+
+@pytest.mark.usefixtures("db")
+def test_get_task_runs_and_remove_old_ones(settings) -> None:
+    settings.TASK_RUN_RETENTION_DAYS = 30
+    now = timezone.now()
+    TaskRun.objects.create(task_id="1", name="a", correlation_id="abc", started_at=now)
+    TaskRun.objects.create(task_id="2", name="b", started_at=now)
+    TaskRun.objects.create(task_id="3", name="a", started_at=now - timedelta(days=31))
+
+    assert [run.task_id for run in get_task_runs(correlation_id="abc")] == ["1"]
+    assert [run.task_id for run in get_task_runs(correlation_id="2")] == ["2"]
+    assert [run.task_id for run in get_task_runs(name="a")] == ["1", "3"]
+
+    assert remove_old_task_runs() == 1
+    assert set(TaskRun.objects.values_list("task_id", flat=True)) == {"1", "2"}
+
+
+@pytest.mark.usefixtures("db")
+def test_render_task_metrics() -> None:
+    now = timezone.now()
+    for task_id, state, duration in [
+        ("1", TaskState.RETRY, 0.3),
+        ("1", TaskState.SUCCESS, 2.0),
+        ("2", TaskState.STARTED, None),
+    ]:
+        TaskRun.objects.create(
+            task_id=task_id,
+            attempt=TaskRun.objects.filter(task_id=task_id).count(),
+            name="a",
+            state=state,
+            duration=duration,
+            wait_seconds=1.0,
+            started_at=now,
+        )
+
+    lines: List[str] = render_task_metrics()
+
+    assert 'vigilio_task_runs_total{task="a",state="RETRY"} 1' in lines
+    assert 'vigilio_task_runs_total{task="a",state="STARTED"} 1' in lines
+    assert 'vigilio_task_retries_total{task="a"} 1' in lines
+    assert 'vigilio_task_duration_seconds_bucket{task="a",le="0.5"} 1' in lines
+    assert 'vigilio_task_duration_seconds_bucket{task="a",le="+Inf"} 2' in lines
+    assert 'vigilio_task_duration_seconds_count{task="a"} 2' in lines
+    assert 'vigilio_task_queue_wait_seconds_count{task="a"} 3' in lines
@@ -0,0 +1,174 @@
+import json
+import logging
+import threading
+import time
+from pathlib import Path, PosixPath
+from typing import Any, Dict, List, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+TMDB_URL: str = "https://api.themoviedb.org/3"
+RETRY_STATUSES: List[int] = [429, 500, 502, 503, 504]
+
+
+class RateLimiter:
+    def __init__(self, rate: float) -> None:
+        self.interval: float = 1.0 / rate if rate > 0 else 0.0
+        self._lock: threading.Lock = threading.Lock()
+        self._next_call: float = 0.0
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+
+        with self._lock:
+            now: float = time.monotonic()
+            delay: float = self._next_call - now
+            self._next_call = max(now, self._next_call) + self.interval
+
+        if delay > 0:
+            time.sleep(delay)
+
+
+class TMDBCache:
+    def __init__(self, folder: str, max_age: int) -> None:
+        self.folder: PosixPath = Path(folder)
+        self.max_age: int = max_age
+        self.hits: int = 0
+        self.misses: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def _path(self, key: str) -> PosixPath:
+        return self.folder / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path: PosixPath = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime <= self.max_age:
+                with open(str(path), "r") as f:
+                    result: Dict[str, Any] = json.load(f)
+                self._count(hit=True)
+                return result
+        except (OSError, json.decoder.JSONDecodeError):
+            pass
+
+        self._count(hit=False)
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        path: PosixPath = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp: PosixPath = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(str(temp), "w") as f:
+                json.dump(value, f)
+            temp.replace(path)
+        except OSError:
+            logger.exception(f"Could not write TMDB cache for {key}")
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @property
+    def hit_rate(self) -> float:
+        total: int = self.hits + self.misses
+        if not total:
+            return 0.0
+
+        return self.hits / total
+
+
+class TMDBClient:
+    def __init__(
+        self,
+        api_key: str,
+        cache: Optional[TMDBCache] = None,
+        rate: float = 0.0,
+        pool_size: int = 10,
+        timeout: int = 10,
+    ) -> None:
+        self.api_key: str = api_key
+        self.cache: Optional[TMDBCache] = cache
+        self.limiter: RateLimiter = RateLimiter(rate=rate)
+        self.timeout: int = timeout
+        self.session: requests.Session = self._create_session(pool_size=pool_size)
+
+    @staticmethod
+    def _create_session(pool_size: int) -> requests.Session:
+        retry: Retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=RETRY_STATUSES,
+            respect_retry_after_header=True,
+        )
+        adapter: HTTPAdapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        session: requests.Session = requests.Session()
+        session.mount("https://", adapter)
+
+        return session
+
+    def _request(self, path: str, **params: str) -> Dict[str, Any]:
+        self.limiter.wait()
+        response = self.session.get(
+            f"{TMDB_URL}{path}",
+            params={"api_key": self.api_key, "language": "en-US", **params},
+            timeout=self.timeout,
+        )
+
+        if response.status_code != 200:
+            raise Exception(
+                f"Moviedb API returned the status code {response.status_code}"
+            )
+
+        return json.loads(response.text)
+
+    def find_by_imdb_id(self, imdb_id: str, refresh: bool = False) -> Dict[str, Any]:
+        key: str = f"find_{imdb_id}"
+        if self.cache and not refresh:
+            cached: Optional[Dict[str, Any]] = self.cache.get(key)
+            if cached:
+                return cached
+
+        result: Dict[str, Any] = self._request(
+            f"/find/{imdb_id}", external_source="imdb_id"
+        )
+        if not any([value for value in result.values() if value]):
+            raise Exception("Moviedb API returned no results. Possible wrong IMDB ID")
+
+        if self.cache:
+            self.cache.set(key, result)
+
+        return result
+
+    def get_genres(self) -> List[Dict[str, Any]]:
+        return self._request("/genre/movie/list").get("genres", [])
+
+
+_CLIENT: Optional[TMDBClient] = None
+
+
+def get_tmdb_client(api_key: str) -> TMDBClient:
+    global _CLIENT
+    if _CLIENT and _CLIENT.api_key == api_key:
+        return _CLIENT
+
+    _CLIENT = TMDBClient(
+        api_key=api_key,
+        cache=TMDBCache(
+            folder=settings.TMDB_CACHE_FOLDER, max_age=settings.TMDB_CACHE_SECONDS
+        ),
+        rate=settings.TMDB_RATE_LIMIT,
+    )
+
+    return _CLIENT
@@ -1,25 +1,42 @@
 import json
 import logging
 import os
+import re
 import shutil
 import subprocess
 from dataclasses import dataclass
+from datetime import timedelta
 from pathlib import Path, PosixPath
-from typing import Any, Dict, List, Set, Optional
+from typing import Any, Dict, Iterator, List, Optional, Pattern, Set, Tuple
 
 import requests
 from django.conf import settings
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.utils import timezone
 from qbittorrent import Client
 
-from panel.models import MovieTorrent
+from panel.models import MovieTorrent, PipelineStageName
+from panel.tasks.file_index import index_folder, record_file
 from panel.tasks.inmemory import get_setting, get_setting_or_environment
 from panel.tasks.moviedb import download_movie_info
+from panel.tasks.pipeline import finish_stage, start_stage, track_stage
 from panel.tasks.subtitles import fetch_subtitles
 from stream.models import Movie, MovieContent
 from watch.celery import app
 
 logger = logging.getLogger(__name__)
 
+VIDEO_EXTENSIONS: Set[str] = {".mp4", ".mkv"}
+# qBittorrent states of torrents that will not finish without the user stepping in.
+FAILED_TORRENT_STATES: Set[str] = {"error", "missingFiles"}
+# A torrent that has just been sent may not be listed by qBittorrent yet.
+ADMISSION_GRACE_SECONDS: int = 60
+# Only one worker at a time counts the free download slots.
+ADMISSION_LOCK_KEY: str = "panel:admit-downloads:lock"
+ADMISSION_LOCK_SECONDS: int = 30
+ADMISSION_RETRY_SECONDS: int = 5
+
 
 @dataclass
 class VideoDetail:
@@ -80,34 +97,156 @@ def is_torrent_complete(movie_torrent_id: int) -> bool:
     return True
 
 
-def _get_videos_from_path(root: PosixPath) -> Set[PosixPath]:
-    suffixes: Set[str] = {".mp4", ".mkv"}
-    videos_raw: Set[PosixPath] = set()
+@dataclass
+class VideoCandidate:
+    path: PosixPath
+    size: int
 
-    def _check_folder(path: PosixPath) -> None:
-        for _content in path.iterdir():
-            if _content.is_dir():
-                _check_folder(_content)
 
-            if _content.suffix.lower() in suffixes:
-                videos_raw.add(_content)
+@dataclass
+class VideoRules:
+    exclude: Optional[Pattern[str]]
+    min_size: int
+    extensions: Set[str]
+
+    def is_excluded(self, name: str) -> bool:
+        return bool(self.exclude and self.exclude.search(name))
+
+
+def get_video_rules() -> VideoRules:
+    return VideoRules(
+        exclude=re.compile(settings.VIDEO_EXCLUDE_PATTERN)
+        if settings.VIDEO_EXCLUDE_PATTERN
+        else None,
+        min_size=settings.VIDEO_MIN_SIZE,
+        extensions=VIDEO_EXTENSIONS,
+    )
 
-    _check_folder(root)
 
-    return videos_raw
+def iter_video_candidates(
+    root: PosixPath, rules: Optional[VideoRules] = None
+) -> Iterator[VideoCandidate]:
+    """Walks the folder with scandir, the entry types come with the listing so only the
+    videos are stat'ed for their size. Videos matching the exclude pattern are only
+    returned when no other video was found, a movie can be named like a sample."""
+    rules = rules or get_video_rules()
+    excluded: List[VideoCandidate] = []
+    found: bool = False
+    folders: List[Tuple[str, bool]] = [(str(root), False)]
+    while folders:
+        folder, in_excluded = folders.pop()
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    folders.append(
+                        (entry.path, in_excluded or rules.is_excluded(entry.name))
+                    )
+                    continue
+
+                name, extension = os.path.splitext(entry.name)
+                if extension.lower() not in rules.extensions or not entry.is_file():
+                    continue
+
+                size: int = entry.stat().st_size
+                if size < rules.min_size:
+                    continue
+
+                candidate = VideoCandidate(path=Path(entry.path), size=size)
+                if in_excluded or rules.is_excluded(name):
+                    excluded.append(candidate)
+                else:
+                    found = True
+                    yield candidate
+
+    if not found:
+        yield from excluded
 
 
-def get_videos_from_folder(root_path: str) -> Set[PosixPath]:
-    videos_raw: Set[PosixPath] = set()
+def _get_videos_from_path(root: PosixPath) -> Set[PosixPath]:
+    return {candidate.path for candidate in iter_video_candidates(root)}
+
+
+def get_video_candidates(root_path: str) -> List[VideoCandidate]:
     root: PosixPath = Path(root_path)
     if root.is_file():
-        if root.suffix.lower() not in {".mp4", ".mkv"}:
+        if root.suffix.lower() not in VIDEO_EXTENSIONS:
             raise Exception(f"Given single file is not a video: {root_path}")
-        videos_raw.add(root)
-    else:
-        videos_raw.update(_get_videos_from_path(root))
+        return [VideoCandidate(path=root, size=root.stat().st_size)]
+
+    return list(iter_video_candidates(root))
+
+
+def get_videos_from_folder(root_path: str) -> Set[PosixPath]:
+    return {candidate.path for candidate in get_video_candidates(root_path)}
+
 
-    return videos_raw
+@dataclass
+class VideoSelection:
+    main: VideoCandidate
+    extras: List[VideoCandidate]
+    skipped: List[VideoCandidate]
+
+
+def _get_container_duration(video: PosixPath) -> float:
+    """Reads the duration from the container header without probing the streams."""
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_entries",
+            "format=duration",
+            "-print_format",
+            "json",
+            str(video),
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+
+    try:
+        return float(json.loads(result.stdout)["format"]["duration"])
+    except (json.decoder.JSONDecodeError, KeyError, TypeError, ValueError):
+        logger.warning(f"Could not get the duration of {str(video)}")
+        return 0.0
+
+
+def select_videos(candidates: List[VideoCandidate]) -> VideoSelection:
+    """The main feature is the longest of the MAIN_FEATURE_PROBE_COUNT largest videos,
+    the smaller ones are not probed. Videos matching VIDEO_EXTRA_PATTERN are kept as
+    extras, the rest are skipped."""
+    if not candidates:
+        raise ValueError("There are no videos to select from")
+
+    ranked: List[VideoCandidate] = sorted(
+        candidates, key=lambda candidate: candidate.size, reverse=True
+    )
+    probed: List[VideoCandidate] = ranked[: settings.MAIN_FEATURE_PROBE_COUNT]
+    main: VideoCandidate = ranked[0]
+    if len(probed) > 1:
+        main = max(
+            probed,
+            key=lambda candidate: (
+                _get_container_duration(candidate.path),
+                candidate.size,
+            ),
+        )
+
+    extra: Optional[Pattern[str]] = (
+        re.compile(settings.VIDEO_EXTRA_PATTERN)
+        if settings.VIDEO_EXTRA_PATTERN
+        else None
+    )
+    selection: VideoSelection = VideoSelection(main=main, extras=[], skipped=[])
+    for candidate in ranked:
+        if candidate is main:
+            continue
+        if extra and extra.search(candidate.path.name):
+            selection.extras.append(candidate)
+        else:
+            selection.skipped.append(candidate)
+
+    return selection
 
 
 def _get_video_raw_detail(video: Path) -> Dict[str, List[Dict[str, Any]]]:
@@ -185,16 +324,21 @@ def _create_and_write_to_meta_file(file_path: PosixPath) -> None:
 
 
 def _process_videos(
-    videos: Set[PosixPath], delete_original: bool = False
+    videos: Set[PosixPath],
+    delete_original: bool = False,
+    movie_content_id: Optional[int] = None,
 ) -> List[VideoDetail]:
     video_details: List[VideoDetail] = []
     for video in videos:
-        if video.suffix.lower() == ".mkv":
-            _convert_video_to_mp4(video)
-        elif video.suffix.lower() == ".mp4":
-            _copy_mp4_to_new_hash_mp4(video)
+        with track_stage(movie_content_id, PipelineStageName.REMUX) as stage:
+            stage.bytes_processed = video.stat().st_size
+            if video.suffix.lower() == ".mkv":
+                _convert_video_to_mp4(video)
+            elif video.suffix.lower() == ".mp4":
+                _copy_mp4_to_new_hash_mp4(video)
 
-        video_detail: VideoDetail = _get_video_detail(video)
+        with track_stage(movie_content_id, PipelineStageName.PROBE):
+            video_detail: VideoDetail = _get_video_detail(video)
 
         if delete_original:
             _create_and_write_to_meta_file(file_path=video)
@@ -285,15 +429,27 @@ def check_and_process_torrent(self, movie_torrent_id: int) -> None:
         logger.info(f"Download is complete for {movie_torrent_id}")
         return
 
+    if torrent_obj.error:
+        logger.info(f"Download of {movie_torrent_id} has failed: {torrent_obj.error}")
+        return
+
     if not is_torrent_complete(movie_torrent_id=movie_torrent_id):
         self.retry(countdown=15)
 
     torrent_obj.is_complete = True
     torrent_obj.save()
+    # The finished download frees a slot for the next torrent in the queue.
+    admit_downloads.delay()
 
     client: Client = get_qbittorrent_client()
     torrent: Dict[str, Any] = client.torrents(category=str(movie_torrent_id))[0]
-    root_path: str = _change_and_move_parent_folder(torrent["content_path"])
+    finish_stage(
+        movie_content_id=torrent_obj.movie_content_id,
+        stage=PipelineStageName.DOWNLOAD,
+        bytes_processed=torrent.get("total_size") or torrent.get("size", 0),
+    )
+    with track_stage(torrent_obj.movie_content_id, PipelineStageName.MOVE):
+        root_path: str = _change_and_move_parent_folder(torrent["content_path"])
 
     torrent_obj.movie_content.full_path = root_path
     torrent_obj.movie_content.main_folder = _get_relative_path(root_path)
@@ -348,30 +504,31 @@ def process_videos_in_folder(
 ) -> None:
     root_path: str = _get_root_path(movie_content_id=movie_content_id)
 
-    videos: Set[PosixPath] = get_videos_from_folder(root_path=root_path)
-    processed_videos: List[VideoDetail] = _process_videos(
-        videos=videos, delete_original=delete_original
-    )
-
-    video_detail: Optional[VideoDetail] = None
-
-    if not processed_videos:
+    candidates: List[VideoCandidate] = get_video_candidates(root_path=root_path)
+    if not candidates:
         logger.critical(
             f"No videos are returned to be processed for movie content {movie_content_id}"
         )
         raise Exception(
             f"No videos are returned to be processed for movie content {movie_content_id}"
         )
-    elif len(processed_videos) > 1:
-        duration: int = -1
 
-        for _video in processed_videos:
-            if _video.duration > duration:
-                duration = _video.duration
-                video_detail = _video
+    with track_stage(movie_content_id, PipelineStageName.SELECT) as stage:
+        selection: VideoSelection = select_videos(candidates)
+        stage.bytes_processed = selection.main.size
 
-    if not video_detail:
-        video_detail = processed_videos[0]
+    video_detail: VideoDetail = _process_videos(
+        videos={selection.main.path},
+        delete_original=delete_original,
+        movie_content_id=movie_content_id,
+    )[0]
+    extras: List[VideoDetail] = []
+    if selection.extras:
+        extras = _process_videos(
+            videos={extra.path for extra in selection.extras},
+            delete_original=delete_original,
+            movie_content_id=movie_content_id,
+        )
 
     movie_content: MovieContent = MovieContent.objects.get(id=movie_content_id)
     movie: Movie = movie_content.movie_set.first()
@@ -390,8 +547,19 @@ def process_videos_in_folder(
 
     movie_content.save()
     movie.save()
+    movie.refresh_summary()
 
     os.chmod(video_detail.full_path, 0o644)
+    index_folder(folder=root_path, movie_content=movie_content)
+    # The converted extras are only referenced by their media files.
+    for extra in extras:
+        record_file(extra.full_path, movie_content=movie_content, is_extra=True)
+    if selection.skipped:
+        logger.info(
+            f"Skipped {len(selection.skipped)} videos of movie content {movie_content_id}"
+        )
+    for skipped in selection.skipped:
+        record_file(str(skipped.path), movie_content=movie_content, is_skipped=True)
 
     fetch_subtitles.delay(
         movie_content_id=movie_content.id,
@@ -400,22 +568,23 @@ def process_videos_in_folder(
     )
 
 
-@app.task
-def download_torrent(movie_content_id: int) -> None:
-    logger.info("Torrent download process has started")
+def set_max_priority(client: Client, torrent_obj: MovieTorrent) -> None:
+    """Moves the torrent to the top of the qBittorrent queue."""
+    torrent: List[Dict[str, Any]] = client.torrents(category=str(torrent_obj.id))
+    if not torrent:
+        return
+
     try:
-        content: MovieContent = MovieContent.objects.get(id=movie_content_id)
-    except MovieContent.DoesNotExist:
-        logger.critical(f"MovieContent {movie_content_id} does not exist.")
-        raise
+        client.set_max_priority([torrent[0]["hash"]])
+    except Exception:
+        # qBittorrent rejects priorities when its own queueing is disabled.
+        logger.warning(f"Could not set the priority of {torrent_obj.id} in qbittorrent")
 
-    client: Client = get_qbittorrent_client()
-    torrent_obj: MovieTorrent = MovieTorrent.objects.create(
-        movie_content_id=movie_content_id,
-    )
+
+def _start_download(client: Client, torrent_obj: MovieTorrent) -> None:
     client.remove_category(str(torrent_obj.id))
     client.create_category(str(torrent_obj.id))
-    source: str = content.torrent_source
+    source: str = torrent_obj.movie_content.torrent_source
 
     if source.startswith("magnet"):
         client.download_from_link(source, category=str(torrent_obj.id))
@@ -428,8 +597,135 @@ def download_torrent(movie_content_id: int) -> None:
     torrent: List[Dict[str, Any]] = client.torrents(category=str(torrent_obj.id))
     if torrent:
         torrent_obj.name = torrent[0]["name"]
-        torrent_obj.save()
+    torrent_obj.save(update_fields=["name", "source"])
+    if torrent_obj.priority > 0:
+        set_max_priority(client, torrent_obj)
 
-    logger.info("Torrent downloading process successfully initiated.")
+    start_stage(
+        movie_content_id=torrent_obj.movie_content_id,
+        stage=PipelineStageName.DOWNLOAD,
+    )
+    logger.info(f"Torrent {torrent_obj.id} downloading process successfully initiated.")
     check_and_process_torrent.delay(torrent_obj.id)
+
+
+def get_active_downloads() -> "QuerySet[MovieTorrent]":
+    return MovieTorrent.objects.filter(
+        admitted_at__isnull=False,
+        is_complete=False,
+        error="",
+        movie_content__isnull=False,
+    )
+
+
+def get_queued_downloads() -> "QuerySet[MovieTorrent]":
+    return MovieTorrent.objects.filter(
+        admitted_at__isnull=True, movie_content__isnull=False
+    ).order_by("-priority", "created_at", "id")
+
+
+def release_downloads(torrent_ids: List[int], error: str) -> int:
+    """Frees the download slots of torrents that will not complete."""
+    released: List[MovieTorrent] = list(
+        get_active_downloads().filter(id__in=torrent_ids).only("movie_content_id")
+    )
+    for torrent_obj in released:
+        finish_stage(
+            movie_content_id=torrent_obj.movie_content_id,
+            stage=PipelineStageName.DOWNLOAD,
+            error=error,
+        )
+
+    return get_active_downloads().filter(id__in=torrent_ids).update(error=error)
+
+
+def _release_failed_downloads(torrents: Dict[str, Dict[str, Any]]) -> None:
+    """Active downloads that qBittorrent lost or gave up on hold a slot forever."""
+    admitted_before = timezone.now() - timedelta(seconds=ADMISSION_GRACE_SECONDS)
+    for torrent_id in (
+        get_active_downloads()
+        .filter(admitted_at__lt=admitted_before)
+        .values_list("id", flat=True)
+    ):
+        torrent: Optional[Dict[str, Any]] = torrents.get(str(torrent_id))
+        if torrent is None:
+            error: str = "Torrent could not be found in qbittorrent."
+        elif torrent.get("state") in FAILED_TORRENT_STATES:
+            error = f"Torrent failed in qbittorrent: {torrent['state']}"
+        else:
+            continue
+
+        logger.warning(f"Releasing the download slot of {torrent_id}. {error}")
+        release_downloads(torrent_ids=[torrent_id], error=error)
+
+
+def _claim_downloads(queued: List[MovieTorrent]) -> List[MovieTorrent]:
+    """Rows another worker has claimed since they were read are left to it."""
+    claimed: List[MovieTorrent] = []
+    for torrent_obj in queued:
+        admitted_at = timezone.now()
+        if MovieTorrent.objects.filter(
+            id=torrent_obj.id, admitted_at__isnull=True
+        ).update(admitted_at=admitted_at):
+            torrent_obj.admitted_at = admitted_at
+            claimed.append(torrent_obj)
+
+    return claimed
+
+
+@app.task
+def admit_downloads() -> List[int]:
+    """Sends the queued torrents with the highest priority to qBittorrent until
+    MAX_ACTIVE_DOWNLOADS torrents are downloading at the same time."""
+    if not get_queued_downloads().exists():
+        return []
+
+    client: Client = get_qbittorrent_client()
+    _release_failed_downloads(
+        {torrent.get("category"): torrent for torrent in client.torrents()}
+    )
+
+    # select_for_update does nothing on SQLite, workers that finish downloads at the
+    # same time would count the same free slots.
+    if not cache.add(ADMISSION_LOCK_KEY, 1, timeout=ADMISSION_LOCK_SECONDS):
+        admit_downloads.apply_async(countdown=ADMISSION_RETRY_SECONDS)
+        return []
+
+    try:
+        slots: int = settings.MAX_ACTIVE_DOWNLOADS - get_active_downloads().count()
+        claimed: List[MovieTorrent] = _claim_downloads(
+            list(
+                get_queued_downloads().select_related("movie_content")[: max(slots, 0)]
+            )
+        )
+    finally:
+        cache.delete(ADMISSION_LOCK_KEY)
+
+    # The slots are claimed, qBittorrent and the torrent file downloads are called
+    # without holding the lock.
+    admitted: List[int] = []
+    for torrent_obj in claimed:
+        try:
+            _start_download(client, torrent_obj)
+        except Exception as exc:
+            logger.exception(f"Could not start downloading {torrent_obj.id}")
+            release_downloads(torrent_ids=[torrent_obj.id], error=repr(exc))
+            continue
+        admitted.append(torrent_obj.id)
+
+    logger.info(f"{len(admitted)} downloads admitted")
+    return admitted
+
+
+@app.task
+def download_torrent(movie_content_id: int, priority: int = 0) -> None:
+    logger.info("Torrent download process has started")
+    try:
+        content: MovieContent = MovieContent.objects.get(id=movie_content_id)
+    except MovieContent.DoesNotExist:
+        logger.critical(f"MovieContent {movie_content_id} does not exist.")
+        raise
+
+    MovieTorrent.objects.create(movie_content_id=movie_content_id, priority=priority)
     download_movie_info.delay(movie_id=content.movie_set.first().id)
+    admit_downloads()
@@ -0,0 +1,180 @@
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from panel.tasks.torrent import get_qbittorrent_client
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY: str = "qbittorrent:snapshot"
+# Only one process at a time reads and writes the shared snapshot.
+SNAPSHOT_LOCK_KEY: str = "qbittorrent:snapshot:lock"
+SNAPSHOT_LOCK_SECONDS: int = 30
+# Revisions a client can fall behind before it gets the full list again.
+HISTORY_SIZE: int = 50
+
+Torrents = Dict[str, Dict[str, Any]]
+
+# The sync/maindata rid belongs to the login session, so every process keeps its own
+# client. The snapshot is shared through the cache and records the session that wrote
+# it last.
+_local: Dict[str, Any] = {"client": None, "rid": 0, "session": None}
+_lock: threading.Lock = threading.Lock()
+
+
+def _get_empty_snapshot() -> Dict[str, Any]:
+    return {
+        "revision": 0,
+        "torrents": {},
+        "history": [],
+        "synced_at": 0.0,
+        "writer": None,
+    }
+
+
+def get_snapshot() -> Dict[str, Any]:
+    return cache.get(SNAPSHOT_KEY) or _get_empty_snapshot()
+
+
+def _sync_main_data() -> Dict[str, Any]:
+    for attempt in range(2):
+        if _local["client"] is None:
+            _local["client"], _local["rid"] = get_qbittorrent_client(), 0
+            _local["session"] = uuid.uuid4().hex
+        try:
+            data: Dict[str, Any] = _local["client"].sync_main_data(rid=_local["rid"])
+        except Exception:
+            # The session may have expired, the next attempt logs in again.
+            _local["client"] = None
+            if attempt:
+                raise
+            continue
+
+        _local["rid"] = data.get("rid", 0)
+        return data
+
+
+def get_changes(torrents: Torrents, data: Dict[str, Any]) -> Tuple[Torrents, List[str]]:
+    """Fields that sync/maindata changed, compared to the snapshot torrents."""
+    changed: Torrents = {}
+    for info_hash, fields in (data.get("torrents") or {}).items():
+        current: Dict[str, Any] = torrents.get(info_hash, {})
+        difference: Dict[str, Any] = {
+            key: value for key, value in fields.items() if current.get(key) != value
+        }
+        if difference or info_hash not in torrents:
+            changed[info_hash] = difference
+
+    removed: List[str] = list(data.get("torrents_removed") or [])
+    if data.get("full_update"):
+        removed += [
+            info_hash
+            for info_hash in torrents
+            if info_hash not in (data.get("torrents") or {})
+        ]
+
+    return changed, [info_hash for info_hash in removed if info_hash in torrents]
+
+
+def sync_torrents() -> Dict[str, Any]:
+    """Refreshes the snapshot at most every TORRENT_SYNC_SECONDS, however many panel
+    pages are polling."""
+    snapshot: Dict[str, Any] = get_snapshot()
+    if _is_fresh(snapshot):
+        return snapshot
+
+    if not cache.add(SNAPSHOT_LOCK_KEY, 1, timeout=SNAPSHOT_LOCK_SECONDS):
+        # Another process is syncing, the snapshot will be fresh again shortly.
+        return snapshot
+
+    try:
+        with _lock:
+            return _update_snapshot()
+    finally:
+        cache.delete(SNAPSHOT_LOCK_KEY)
+
+
+def _is_fresh(snapshot: Dict[str, Any]) -> bool:
+    return time.time() - snapshot["synced_at"] < settings.TORRENT_SYNC_SECONDS
+
+
+def _update_snapshot() -> Dict[str, Any]:
+    # Read again under the lock, the snapshot may have been written meanwhile.
+    snapshot: Dict[str, Any] = get_snapshot()
+    if _is_fresh(snapshot):
+        return snapshot
+
+    if snapshot.get("writer") != _local["session"]:
+        # The deltas of this session miss what other sessions wrote meanwhile, e.g. a
+        # state that changed and changed back.
+        _local["rid"] = 0
+    data: Dict[str, Any] = _sync_main_data()
+    changed, removed = get_changes(snapshot["torrents"], data)
+    snapshot["synced_at"] = time.time()
+    snapshot["writer"] = _local["session"]
+    if changed or removed:
+        for info_hash, fields in changed.items():
+            snapshot["torrents"].setdefault(info_hash, {}).update(fields)
+        for info_hash in removed:
+            snapshot["torrents"].pop(info_hash)
+
+        snapshot["revision"] += 1
+        snapshot["history"] = snapshot["history"][-(HISTORY_SIZE - 1) :] + [
+            {"revision": snapshot["revision"], "torrents": changed, "removed": removed}
+        ]
+
+    cache.set(SNAPSHOT_KEY, snapshot, timeout=None)
+    return snapshot
+
+
+def get_torrent_list(snapshot: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {**fields, "hash": info_hash}
+        for info_hash, fields in sorted(
+            snapshot["torrents"].items(), key=lambda item: item[1].get("added_on", 0)
+        )
+    ]
+
+
+def get_torrent_delta(snapshot: Dict[str, Any], rid: int) -> Dict[str, Any]:
+    """Same layout as sync/maindata: only the fields that changed after revision rid."""
+    history: List[Dict[str, Any]] = snapshot["history"]
+    is_known: bool = rid == snapshot["revision"] or bool(
+        history and history[0]["revision"] <= rid + 1
+    )
+    if 0 <= rid <= snapshot["revision"] and is_known:
+        torrents: Torrents = {}
+        removed: List[str] = []
+        for revision in history:
+            if revision["revision"] <= rid:
+                continue
+            for info_hash, fields in revision["torrents"].items():
+                torrents.setdefault(info_hash, {}).update(fields)
+            for info_hash in revision["removed"]:
+                torrents.pop(info_hash, None)
+                removed.append(info_hash)
+
+        return {
+            "rid": snapshot["revision"],
+            "full_update": False,
+            "torrents": torrents,
+            "torrents_removed": [
+                info_hash for info_hash in removed if info_hash not in torrents
+            ],
+        }
+
+    return {
+        "rid": snapshot["revision"],
+        "full_update": True,
+        "torrents": snapshot["torrents"],
+        "torrents_removed": [],
+    }
+
+
+def get_info_hashes(snapshot: Optional[Dict[str, Any]] = None) -> List[str]:
+    return list((snapshot or sync_torrents())["torrents"])
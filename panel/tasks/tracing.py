@@ -0,0 +1,307 @@
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from celery.signals import (
+    before_task_publish,
+    task_failure,
+    task_postrun,
+    task_prerun,
+    task_retry,
+)
+from django.conf import settings
+from django.db.models import Count, Q, QuerySet, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from panel.models import TaskRun, TaskState
+from panel.tasks.events import publish_event
+from watch.celery import app
+from watch.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+CORRELATION_HEADER: str = "correlation_id"
+PUBLISHED_HEADER: str = "published_at"
+TASK_BUCKETS: List[float] = [0.1, 0.5, 1, 5, 15, 30, 60, 300, 900, 1800, 3600]
+
+_local: threading.local = threading.local()
+
+
+def get_correlation_id() -> Optional[str]:
+    return getattr(_local, "correlation_id", None)
+
+
+def set_correlation_id(correlation_id: Optional[str]) -> None:
+    _local.correlation_id = correlation_id or None
+
+
+@contextmanager
+def correlation(correlation_id: Optional[str] = None) -> Iterator[str]:
+    """Every task published inside the block, and the tasks they publish, share the id."""
+    previous: Optional[str] = get_correlation_id()
+    correlation_id = correlation_id or previous or uuid.uuid4().hex
+    set_correlation_id(correlation_id)
+    try:
+        yield correlation_id
+    finally:
+        set_correlation_id(previous)
+
+
+def _get_header(request: Any, name: str) -> Any:
+    # Custom headers are set as request attributes by the worker, eager tasks keep
+    # them in request.headers.
+    return getattr(request, name, None) or (
+        getattr(request, "headers", None) or {}
+    ).get(name)
+
+
+def get_wait_seconds(request: Any, started_at: datetime) -> Optional[float]:
+    """Seconds between publishing, or the eta of a countdown, and the start."""
+    published_at: Any = _get_header(request, PUBLISHED_HEADER)
+    if not published_at:
+        return None
+
+    ready_at: datetime = datetime.fromtimestamp(float(published_at), tz=timezone.utc)
+    eta: Any = getattr(request, "eta", None)
+    if isinstance(eta, str):
+        eta = parse_datetime(eta)
+    if eta and timezone.is_aware(eta) and eta > ready_at:
+        ready_at = eta
+
+    return max((started_at - ready_at).total_seconds(), 0.0)
+
+
+def _get_attempt(task: Any) -> int:
+    return task.request.retries or 0
+
+
+@before_task_publish.connect
+def _add_trace_headers(headers: Optional[Dict[str, Any]] = None, **kwargs) -> None:
+    if headers is None:
+        return
+
+    correlation_id: Optional[str] = get_correlation_id()
+    if correlation_id and not headers.get(CORRELATION_HEADER):
+        headers[CORRELATION_HEADER] = correlation_id
+    # Retries are published again, the wait starts over.
+    headers[PUBLISHED_HEADER] = time.time()
+
+
+@task_prerun.connect
+def _start_task_run(
+    sender: Any = None, task_id: str = "", task: Any = None, **kwargs
+) -> None:
+    task = task or sender
+    if not getattr(task, "is_traced", True):
+        return
+
+    request: Any = task.request
+    correlation_id: str = _get_header(request, CORRELATION_HEADER) or ""
+    # Tasks published by this task inherit the correlation id.
+    set_correlation_id(correlation_id)
+
+    started_at: datetime = timezone.now()
+    try:
+        TaskRun.objects.update_or_create(
+            task_id=task_id,
+            attempt=_get_attempt(task),
+            defaults={
+                "name": task.name,
+                "correlation_id": correlation_id,
+                "queue": (request.delivery_info or {}).get("routing_key") or "",
+                "state": TaskState.STARTED,
+                "wait_seconds": get_wait_seconds(request, started_at),
+                "started_at": started_at,
+            },
+        )
+    except Exception:
+        logger.exception(f"Could not record the start of {task.name}")
+
+
+def _update_task_run(task_id: str, attempt: int, **values) -> None:
+    try:
+        TaskRun.objects.filter(task_id=task_id, attempt=attempt).update(**values)
+    except Exception:
+        logger.exception(f"Could not record task {task_id}")
+
+
+@task_postrun.connect
+def _finish_task_run(
+    sender: Any = None,
+    task_id: str = "",
+    task: Any = None,
+    state: Optional[str] = None,
+    **kwargs,
+) -> None:
+    task = task or sender
+    set_correlation_id(None)
+    if not getattr(task, "is_traced", True):
+        return
+
+    run: Optional[TaskRun] = (
+        TaskRun.objects.filter(task_id=task_id, attempt=_get_attempt(task))
+        .only("started_at")
+        .first()
+    )
+    if not run:
+        return
+
+    finished_at: datetime = timezone.now()
+    _update_task_run(
+        task_id=task_id,
+        attempt=_get_attempt(task),
+        state=state if state in TaskState.values else TaskState.SUCCESS,
+        finished_at=finished_at,
+        duration=(finished_at - run.started_at).total_seconds(),
+    )
+
+
+@task_retry.connect
+def _retry_task_run(
+    sender: Any = None, request: Any = None, reason: Any = None, **kwargs
+) -> None:
+    _update_task_run(
+        task_id=request.id, attempt=request.retries or 0, error=str(reason)
+    )
+
+
+@task_failure.connect
+def _fail_task_run(
+    sender: Any = None, task_id: str = "", exception: Any = None, **kwargs
+) -> None:
+    _update_task_run(
+        task_id=task_id, attempt=_get_attempt(sender), error=repr(exception)
+    )
+    publish_event(
+        "failure",
+        {
+            "task_id": task_id,
+            "name": getattr(sender, "name", ""),
+            "message": repr(exception),
+        },
+    )
+
+
+@app.task
+def remove_old_task_runs() -> int:
+    removed, _ = TaskRun.objects.filter(
+        started_at__lt=timezone.now() - timedelta(days=settings.TASK_RUN_RETENTION_DAYS)
+    ).delete()
+
+    return removed
+
+
+def get_task_runs(
+    correlation_id: Optional[str] = None,
+    name: Optional[str] = None,
+    state: Optional[str] = None,
+) -> "QuerySet[TaskRun]":
+    runs: "QuerySet[TaskRun]" = TaskRun.objects.order_by("-started_at", "-attempt")
+    if correlation_id:
+        runs = runs.filter(Q(correlation_id=correlation_id) | Q(task_id=correlation_id))
+    if name:
+        runs = runs.filter(name__icontains=name)
+    if state:
+        runs = runs.filter(state=state)
+
+    return runs
+
+
+def get_task_run_dict(run: TaskRun) -> Dict[str, Any]:
+    return {
+        "task_id": run.task_id,
+        "name": run.name,
+        "attempt": run.attempt,
+        "correlation_id": run.correlation_id,
+        "queue": run.queue,
+        "state": run.state,
+        "wait_seconds": run.wait_seconds,
+        "started_at": run.started_at.isoformat(),
+        "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+        "duration": run.duration,
+        "error": run.error,
+    }
+
+
+def _get_histogram(
+    name: str, documentation: str, field: str, rows: List[Dict[str, Any]]
+) -> Histogram:
+    histogram: Histogram = Histogram(
+        name, documentation, labels=("task",), buckets=TASK_BUCKETS
+    )
+    for row in rows:
+        if not row[f"{field}_count"]:
+            continue
+        histogram.set(
+            (row["name"],),
+            cumulative=[
+                row[f"{field}_le_{index}"] for index in range(len(TASK_BUCKETS))
+            ]
+            + [row[f"{field}_count"]],
+            total=float(row[f"{field}_sum"]),
+        )
+
+    return histogram
+
+
+def render_task_metrics() -> List[str]:
+    """Task runs are recorded by every celery worker, so they are read from the
+    database instead of the memory of the process that serves /metrics."""
+    aggregates: Dict[str, Any] = {}
+    for field in ("duration", "wait_seconds"):
+        aggregates[f"{field}_count"] = Count(
+            "id", filter=Q(**{f"{field}__isnull": False})
+        )
+        aggregates[f"{field}_sum"] = Sum(field)
+        for index, bucket in enumerate(TASK_BUCKETS):
+            aggregates[f"{field}_le_{index}"] = Count(
+                "id", filter=Q(**{f"{field}__lte": bucket})
+            )
+
+    try:
+        rows: List[Dict[str, Any]] = list(
+            TaskRun.objects.order_by().values("name").annotate(**aggregates)
+        )
+        states: List[Dict[str, Any]] = list(
+            TaskRun.objects.order_by()
+            .values("name", "state")
+            .annotate(count=Count("id"))
+        )
+    except Exception:
+        logger.exception("Could not read the task runs")
+        return []
+
+    runs: Counter = Counter(
+        "vigilio_task_runs_total",
+        "Celery task attempts by their last state.",
+        labels=("task", "state"),
+    )
+    retries: Counter = Counter(
+        "vigilio_task_retries_total", "Celery task retries.", labels=("task",)
+    )
+    for row in states:
+        runs.inc(row["name"], row["state"], amount=row["count"])
+        if row["state"] == TaskState.RETRY:
+            retries.inc(row["name"], amount=row["count"])
+
+    return (
+        runs.render()
+        + retries.render()
+        + _get_histogram(
+            "vigilio_task_duration_seconds",
+            "Celery task run time.",
+            "duration",
+            rows,
+        ).render()
+        + _get_histogram(
+            "vigilio_task_queue_wait_seconds",
+            "Seconds between publishing a celery task and a worker starting it.",
+            "wait_seconds",
+            rows,
+        ).render()
+    )
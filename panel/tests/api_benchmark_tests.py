@@ -0,0 +1,70 @@
+from typing import List
+
+import pytest
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+
+from panel.benchmarks.api import (
+    EndpointResult,
+    find_query_growth,
+    measure_endpoint,
+    seed_database,
+)
+from stream.models import Movie, MovieContent, MovieSubtitle, UserMovieHistory
+
+
+@pytest.mark.usefixtures("db")
+class TestSeedDatabase:
+    def test_creates_linked_rows(self) -> None:
+        users: List[User] = seed_database(
+            movies=5, users=2, histories_per_user=3, batch_size=2
+        )
+
+        assert Movie.objects.filter(is_playable=True).count() == 5
+        assert MovieContent.objects.count() == 10
+        assert MovieSubtitle.objects.count() == 20
+        assert all(movie.movie_content.count() == 2 for movie in Movie.objects.all())
+        assert all(
+            content.movie_subtitle.count() == 2
+            for content in MovieContent.objects.all()
+        )
+        assert (
+            Movie.objects.filter(moviedb_category__isnull=False).distinct().count() == 5
+        )
+        assert len(users) == 2
+        assert UserMovieHistory.objects.filter(user=users[0]).count() == 3
+
+
+@pytest.mark.usefixtures("db")
+class TestMeasureEndpoint:
+    def test_measures_cold_and_warm_requests(self, mocker) -> None:
+        def _get(url: str) -> HttpResponse:
+            Movie.objects.count()
+            return HttpResponse(b"movies")
+
+        client = mocker.Mock()
+        client.get.side_effect = _get
+
+        result: EndpointResult = measure_endpoint(
+            client, name="/api/movies", url="/api/movies", movies=0, repeat=3
+        )
+
+        assert client.get.call_count == 4
+        assert result.status_code == 200
+        assert result.response_bytes == 6
+        assert result.cold_queries == 1
+        assert result.warm_queries == 1
+        assert len(result.warm_seconds) == 3
+        assert result.to_dict()["warm_seconds_p50"] is not None
+
+
+class TestFindQueryGrowth:
+    def test_finds_growing_endpoints(self) -> None:
+        results: List[EndpointResult] = [
+            EndpointResult(name="/api/movies", movies=1000, cold_queries=4),
+            EndpointResult(name="/api/movies", movies=10000, cold_queries=4),
+            EndpointResult(name="watch", movies=1000, cold_queries=5),
+            EndpointResult(name="watch", movies=10000, cold_queries=7),
+        ]
+
+        assert find_query_growth(results) == ["watch"]
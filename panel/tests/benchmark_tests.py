@@ -0,0 +1,127 @@
+import shutil
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from panel.benchmarks.fixtures import (
+    MediaFixture,
+    generate_fixture,
+    get_ffmpeg_command,
+    write_srt,
+)
+from panel.benchmarks.ingest import (
+    FakeQBittorrent,
+    StageResult,
+    measure,
+    run_fixture,
+    summarize,
+)
+
+STAGES: List[str] = ["discover", "move", "process_videos", "hash", "subtitles"]
+
+
+@pytest.fixture
+def source(tmp_path: Path) -> Path:
+    root: Path = tmp_path / "fixtures" / "Sintel"
+    (root / "subtitles").mkdir(parents=True)
+    (root / "Sintel.mp4").write_bytes(b"\x01" * 65536 * 3)
+    write_srt(root / "subtitles" / "eng-0.srt", cues=10)
+
+    return root
+
+
+class TestFixtures:
+    def test_write_srt(self, tmp_path: Path) -> None:
+        write_srt(tmp_path / "eng.srt", cues=2)
+
+        assert (tmp_path / "eng.srt").read_text() == (
+            "1\n00:00:00,000 --> 00:00:01,500\nSubtitle line number 1\n\n"
+            "2\n00:00:02,000 --> 00:00:03,500\nSubtitle line number 2\n\n"
+        )
+
+    def test_ffmpeg_command_maps_every_stream(self, tmp_path: Path) -> None:
+        fixture: MediaFixture = MediaFixture(
+            name="test",
+            container="mkv",
+            width=640,
+            height=360,
+            duration=1,
+            audio_streams=2,
+            subtitle_streams=1,
+        )
+
+        command: List[str] = get_ffmpeg_command(fixture, output=tmp_path / "test.mkv")
+
+        assert command.count("-map") == 4
+        assert "testsrc2=size=640x360:rate=24:duration=1" in command
+        assert command[command.index("-c:s") + 1] == "srt"
+        assert command[-1] == str(tmp_path / "test.mkv")
+
+
+class TestIngestBenchmark:
+    def test_measure(self) -> None:
+        with measure("fixture", "stage") as result:
+            time.sleep(0.01)
+
+        assert result.wall_seconds >= 0.01
+        assert result.cpu_user_seconds >= 0
+
+    def test_fake_qbittorrent(self, source: Path) -> None:
+        torrent = FakeQBittorrent(content_path=str(source)).torrents(category="1")[0]
+
+        assert torrent["progress"] == 1
+        assert (
+            torrent["total_size"]
+            == 65536 * 3 + (source / "subtitles" / "eng-0.srt").stat().st_size
+        )
+
+    def test_run_fixture(self, mocker, source: Path, tmp_path: Path) -> None:
+        mocker.patch("panel.tasks.torrent._get_video_raw_detail", return_value={})
+
+        results: List[StageResult] = run_fixture(
+            source=source, work=tmp_path / "work", name="Sintel", run=0
+        )
+
+        assert [result.stage for result in results] == STAGES
+        assert results[2].input_bytes == 65536 * 3
+        assert results[2].output_bytes == 65536 * 3
+        assert results[3].input_bytes == 65536 * 2
+        assert results[4].output_bytes > 0
+        assert not (tmp_path / "work").exists()
+        assert source.is_dir()
+
+    def test_summarize(self) -> None:
+        results: List[StageResult] = [
+            StageResult(fixture="Sintel", stage="hash", run=run, wall_seconds=seconds)
+            for run, seconds in enumerate([0.3, 0.1, 0.2])
+        ]
+
+        summary = summarize(results)["Sintel"]["hash"]
+
+        assert summary["runs"] == 3
+        assert summary["wall_seconds_p50"] == 0.2
+        assert summary["wall_seconds_max"] == 0.3
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is needed")
+    def test_generated_fixture_runs(self, tmp_path: Path) -> None:
+        fixture: MediaFixture = MediaFixture(
+            name="tiny",
+            container="mkv",
+            width=320,
+            height=240,
+            duration=1,
+            subtitle_streams=1,
+            depth=1,
+            srt_files=1,
+            srt_cues=5,
+        )
+        source: Path = generate_fixture(fixture, folder=tmp_path / "fixtures")
+
+        results: List[StageResult] = run_fixture(
+            source=source, work=tmp_path / "work", name="tiny", run=0
+        )
+
+        assert [result.stage for result in results] == STAGES
+        assert results[2].output_bytes > 0
@@ -0,0 +1,45 @@
+from typing import Dict
+from unittest.mock import MagicMock
+
+import pytest
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+
+from panel.management.commands.load_test import (
+    LoadTestResult,
+    create_session_cookies,
+    run_load,
+)
+
+
+@pytest.mark.usefixtures("db")
+def test_create_session_cookies(user: User) -> None:
+    cookies: Dict[str, str] = create_session_cookies(user=user)
+
+    session: SessionStore = SessionStore(
+        session_key=cookies[settings.SESSION_COOKIE_NAME]
+    )
+    assert session[SESSION_KEY] == str(user.pk)
+    assert len(cookies[settings.CSRF_COOKIE_NAME]) == 32
+
+
+def test_run_load_counts_errors() -> None:
+    responses = iter([200, 500, 200, 200])
+
+    def _send(session) -> MagicMock:
+        return MagicMock(status_code=next(responses))
+
+    result: LoadTestResult = run_load(
+        name="test",
+        send=_send,
+        cookies={settings.CSRF_COOKIE_NAME: "token"},
+        total=4,
+        concurrency=1,
+    )
+
+    assert len(result.latencies) == 3
+    assert result.errors == 1
+    assert result.throughput > 0
+    assert result.summary().startswith("test: 3 requests, 1 errors")
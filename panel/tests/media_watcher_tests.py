@@ -0,0 +1,148 @@
+from pathlib import PosixPath
+from typing import List, Set
+
+import pytest
+from django.conf import settings
+from pytest_mock import MockerFixture
+
+from panel.media_watcher import (
+    InotifySource,
+    MediaFolderWatcher,
+    PollingSource,
+    _get_dirty_paths,
+    apply_changes,
+)
+from panel.models import MediaFile
+from stream.models import MovieContent
+from stream.tests.factories import MovieContentFactory
+
+
+@pytest.fixture
+def movie_content(tmp_path: PosixPath) -> MovieContent:
+    folder: PosixPath = tmp_path / "abc"
+    (folder / "vtt_subtitles").mkdir(parents=True)
+    (folder / "abc.mp4").write_bytes(b"video")
+
+    return MovieContentFactory(
+        main_folder="abc", full_path=str(folder / "abc.mp4"), is_ready=True
+    )
+
+
+def test_get_dirty_paths(tmp_path: PosixPath) -> None:
+    paths: Set[str] = {
+        str(tmp_path / "abc" / "vtt_subtitles" / "eng1.vtt"),
+        str(tmp_path / "abc" / "vtt_subtitles"),
+        str(tmp_path / "def" / "video.mp4"),
+        "/somewhere/else",
+    }
+
+    assert _get_dirty_paths(media_folder=tmp_path, paths=paths) == {
+        tmp_path / "abc" / "vtt_subtitles",
+        tmp_path / "def" / "video.mp4",
+    }
+    assert _get_dirty_paths(
+        media_folder=tmp_path, paths={str(tmp_path), str(tmp_path / "abc")}
+    ) == {tmp_path}
+
+
+@pytest.mark.usefixtures("db")
+class TestApplyChanges:
+    def test_registers_new_subtitles(
+        self, tmp_path: PosixPath, movie_content: MovieContent
+    ) -> None:
+        subtitle: PosixPath = tmp_path / "abc" / "vtt_subtitles" / "ger1.vtt"
+        subtitle.write_text("WEBVTT")
+
+        apply_changes(media_folder=str(tmp_path), paths={str(subtitle)})
+
+        assert movie_content.movie_subtitle.count() == 1
+        assert movie_content.movie_subtitle.first().lang_three == "ger"
+        assert MediaFile.objects.get(full_path=str(subtitle)).movie_content_id == (
+            movie_content.id
+        )
+
+    def test_flags_missing_video(
+        self, tmp_path: PosixPath, movie_content: MovieContent
+    ) -> None:
+        video: PosixPath = tmp_path / "abc" / "abc.mp4"
+        apply_changes(media_folder=str(tmp_path), paths={str(video)})
+        assert MediaFile.objects.filter(full_path=str(video)).exists()
+
+        video.unlink()
+        apply_changes(media_folder=str(tmp_path), paths={str(video)})
+
+        movie_content.refresh_from_db()
+        assert movie_content.is_ready is False
+        assert not MediaFile.objects.filter(full_path=str(video)).exists()
+
+    def test_rescans_on_overflow(
+        self, tmp_path: PosixPath, movie_content: MovieContent, mocker: MockerFixture
+    ) -> None:
+        mocker.patch.object(settings, "MEDIA_FOLDER", str(tmp_path))
+
+        apply_changes(media_folder=str(tmp_path), paths={str(tmp_path)})
+
+        assert MediaFile.objects.filter(movie_content=movie_content).count() == 3
+
+
+def test_polling_source_detects_changes(tmp_path: PosixPath) -> None:
+    source: PollingSource = PollingSource(root=str(tmp_path), interval=0)
+    (tmp_path / "new.mp4").touch()
+
+    assert str(tmp_path / "new.mp4") in source.read(timeout=0)
+    assert source.read(timeout=0) == set()
+
+
+def test_polling_source_scans_every_interval(
+    tmp_path: PosixPath, mocker: MockerFixture
+) -> None:
+    clock: List[float] = [100.0]
+    mocker.patch("panel.media_watcher.time.monotonic", lambda: clock[0])
+    sleep = mocker.patch(
+        "panel.media_watcher.time.sleep",
+        side_effect=lambda seconds: clock.__setitem__(0, clock[0] + seconds),
+    )
+    scan = mocker.spy(PollingSource, "_snapshot")
+    source: PollingSource = PollingSource(root=str(tmp_path), interval=60)
+    (tmp_path / "new.mp4").touch()
+
+    for _ in range(29):
+        assert source.read(timeout=2) == set()
+    assert str(tmp_path / "new.mp4") in source.read(timeout=2)
+
+    assert scan.call_count == 2
+    assert [call.args[0] for call in sleep.call_args_list] == [2] * 30
+
+
+def test_inotify_source_detects_changes(tmp_path: PosixPath) -> None:
+    (tmp_path / "abc").mkdir()
+    try:
+        source: InotifySource = InotifySource(root=str(tmp_path))
+    except OSError:
+        pytest.skip("inotify is not available")
+
+    (tmp_path / "abc" / "movie.mp4").write_bytes(b"video")
+    (tmp_path / "new").mkdir()
+    changed: Set[str] = source.read(timeout=1)
+    (tmp_path / "new" / "eng1.vtt").touch()
+    changed.update(source.read(timeout=1))
+    source.close()
+
+    assert {
+        str(tmp_path / "abc" / "movie.mp4"),
+        str(tmp_path / "new"),
+        str(tmp_path / "new" / "eng1.vtt"),
+    }.issubset(changed)
+
+
+def test_watcher_coalesces_events(tmp_path: PosixPath, mocker: MockerFixture) -> None:
+    watcher: MediaFolderWatcher = MediaFolderWatcher(
+        media_folder=str(tmp_path), use_polling=True
+    )
+    watcher.source = mocker.Mock()
+    watcher.source.read.side_effect = [{"a"}, {"b"}, set(), {"c"}]
+    flush = mocker.patch.object(watcher, "flush")
+
+    watcher.run(iterations=4)
+
+    assert [call.args[0] for call in flush.call_args_list] == [{"a", "b"}, {"c"}]
@@ -23,5 +23,6 @@ urlpatterns = [
     path("history/", views.user_history, name="user_history"),
     path("settings/", views.settings, name="settings"),
     path("initial-setup/", views.initial_setup, name="initial_setup"),
+    path("events/", views.events, name="events"),
     path("design/", include("panel.design_pages.urls"), name="design"),
 ]
@@ -1,10 +1,11 @@
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from django.core.handlers.wsgi import WSGIRequest
 from django.db.models import QuerySet
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import render
+from django.views.decorators.http import require_safe
 
 from panel.api.utils import is_qbittorrent_running, is_redis_online, is_celery_running
 from panel.decorators import (
@@ -14,6 +15,7 @@ from panel.decorators import (
     demo_or_login_required,
 )
 from panel.handlers import get_installation_status
+from panel.tasks.event_stream import EventStream, open_event_stream
 from stream.models import Movie
 
 logger = logging.getLogger(__name__)
@@ -97,3 +99,25 @@ def settings(request: WSGIRequest) -> HttpResponse:
 @demo_or_login_required
 def initial_setup(request: WSGIRequest) -> HttpResponse:
     return render(request, "panel/initial_setup.html")
+
+
+@require_safe
+@demo_or_login_required
+def events(request: WSGIRequest) -> HttpResponse:
+    # EventSource sends the id of the last torrent event when it reconnects.
+    rid: Optional[str] = request.headers.get("Last-Event-ID") or request.GET.get("rid")
+    stream: Optional[EventStream] = open_event_stream(
+        rid=int(rid) if rid and rid.isdigit() else None
+    )
+    if stream is None:
+        # EventSource gives up on an error status and the page polls instead.
+        return HttpResponse(status=503)
+
+    response: StreamingHttpResponse = StreamingHttpResponse(
+        stream, content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # nginx would otherwise buffer the stream.
+    response["X-Accel-Buffering"] = "no"
+
+    return response
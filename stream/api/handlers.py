@@ -3,7 +3,6 @@ from typing import Dict, Optional
 
 from django.contrib.auth.models import User
 from django.db.models import QuerySet, Q
-from rest_framework.exceptions import APIException
 
 from stream.api.serializers import SaveCurrentSecond
 from stream.models import UserMovieHistory, Movie
@@ -18,8 +17,7 @@ class UserMovieHistoryHandler:
             return (
                 UserMovieHistory.objects.filter(user=user)
                 .filter(is_watched=False)
-                .filter(movie__is_ready=True)
-                .filter(movie__movie_content__is_ready=True)
+                .filter(movie__is_playable=True)
                 .filter(movie__id=history_id)
                 .all()
             )
@@ -27,10 +25,8 @@ class UserMovieHistoryHandler:
         return (
             UserMovieHistory.objects.filter(user=user)
             .filter(is_watched=False)
-            .filter(movie__is_ready=True)
-            .filter(movie__movie_content__is_ready=True)
+            .filter(movie__is_playable=True)
             .order_by("-updated_at")
-            .distinct()
             .all()
         )
 
@@ -42,21 +38,13 @@ class MoviesHandler:
             return Movie.objects.filter(id=movie_id).all()
         elif query is not None:
             return (
-                Movie.objects.filter(movie_content__is_ready=True)
-                .filter(is_ready=True)
+                Movie.objects.filter(is_playable=True)
                 .filter(Q(title__contains=query) | Q(description__contains=query))
-                .distinct()
                 .order_by("-id")
                 .all()
             )
 
-        return (
-            Movie.objects.filter(movie_content__is_ready=True)
-            .filter(is_ready=True)
-            .distinct()
-            .order_by("-id")
-            .all()
-        )
+        return Movie.objects.filter(is_playable=True).order_by("-id").all()
 
 
 class SaveCurrentSecondHandler:
@@ -77,26 +65,15 @@ class SaveCurrentSecondHandler:
     def save_regular_user(
         save_current_second: SaveCurrentSecond, user: User, is_watched: bool
     ) -> None:
-        try:
-            user_history: UserMovieHistory = UserMovieHistory.objects.get(
-                user=user, movie=Movie.objects.get(id=save_current_second.movie_id)
-            )
-        except UserMovieHistory.DoesNotExist:
-            user_history: UserMovieHistory = UserMovieHistory.objects.create(
-                user=user, movie=Movie.objects.get(id=save_current_second.movie_id)
-            )
-        except UserMovieHistory.MultipleObjectsReturned:
-            logger.exception(
-                f"Multiple user movie history for user: {user.id} movie: {save_current_second.movie_id}"
-            )
-            raise APIException(
-                f"Multiple user movie history for user: {user.id} movie: {save_current_second.movie_id}"
-            )
-
-        user_history.current_second = save_current_second.current_second
-        user_history.remaining_seconds = save_current_second.remaining_seconds
-        user_history.is_watched = is_watched
-        user_history.save()
+        UserMovieHistory.objects.update_or_create(
+            user=user,
+            movie_id=save_current_second.movie_id,
+            defaults={
+                "current_second": save_current_second.current_second,
+                "remaining_seconds": save_current_second.remaining_seconds,
+                "is_watched": is_watched,
+            },
+        )
 
     @staticmethod
     def check_is_watched(save_current_second: SaveCurrentSecond) -> bool:
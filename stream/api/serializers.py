@@ -5,6 +5,8 @@ from typing import Dict, Any
 from django.db.models import QuerySet
 from rest_framework import serializers
 
+from stream.handlers import _get_image_url
+
 from stream.models import (
     MovieSubtitle,
     MovieDBCategory,
@@ -76,7 +78,15 @@ class MovieSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Movie
-        exclude = ("media_info_raw",)
+        exclude = ("media_info_raw", "local_images")
+
+    def to_representation(self, instance: Movie) -> Dict[str, Any]:
+        data: Dict[str, Any] = super().to_representation(instance)
+        for field in instance.local_images:
+            if field in data:
+                data[field] = _get_image_url(movie=instance, field=field)
+
+        return data
 
     def get_my_list(self, data) -> Dict[str, Any]:
         if hasattr(self, "user"):
@@ -91,6 +101,12 @@ class MovieSerializer(serializers.ModelSerializer):
         return my_list.data
 
 
+class CatalogMovieSerializer(MovieSerializer):
+    """Shared by every user, my_list is merged in by stream.api.utils.merge_my_list."""
+
+    my_list = None
+
+
 class CategoriesWithMoviesSerializer(serializers.ModelSerializer):
     movies = serializers.SerializerMethodField(source="get_movies")
 
@@ -104,12 +120,9 @@ class CategoriesWithMoviesSerializer(serializers.ModelSerializer):
         exclude = ()
 
     def get_movies(self, obj):
-        movies: QuerySet[Movie] = (
-            Movie.objects.filter(moviedb_category__moviedb_id=obj.moviedb_id)
-            .filter(is_ready=True)
-            .filter(movie_content__is_ready=True)
-            .distinct()
-        )
+        movies: QuerySet[Movie] = Movie.objects.filter(
+            moviedb_category__moviedb_id=obj.moviedb_id
+        ).filter(is_playable=True)
         if hasattr(self, "user"):
             return MovieSerializer(
                 movies,
@@ -117,11 +130,7 @@ class CategoriesWithMoviesSerializer(serializers.ModelSerializer):
                 many=True,
             ).data
 
-        return MovieSerializer(
-            movies,
-            user=self.user,
-            many=True,
-        ).data
+        return CatalogMovieSerializer(movies, many=True).data
 
 
 class UserMovieHistorySerializer(serializers.ModelSerializer):
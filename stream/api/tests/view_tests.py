@@ -22,7 +22,10 @@ def movie_content() -> MovieContent:
 
 @pytest.fixture
 def movie(movie_content: MovieContent) -> Movie:
-    return MovieFactory.create(movie_content=[movie_content], is_ready=True)
+    movie: Movie = MovieFactory.create(movie_content=[movie_content], is_ready=True)
+    movie.refresh_summary()
+
+    return movie
 
 
 @pytest.fixture
@@ -1,6 +1,26 @@
+from typing import Any, Dict, Iterable, List
+
+from django.contrib.auth.models import User
 from django.urls import reverse
 
+from stream.api.serializers import MyListSerializer
+from stream.models import MyList
+
 
 def _get_relative_path_to_watch(pk: int = 1) -> str:
     url: str = reverse("stream:watch", kwargs={"movie_id": pk})
     return url.replace(str(pk), "")
+
+
+def get_my_list(user: User, movie_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    return {
+        item.movie_id: MyListSerializer(item).data
+        for item in MyList.objects.filter(user=user, movie_id__in=list(movie_ids))
+    }
+
+
+def merge_my_list(
+    movies: List[Dict[str, Any]], my_list: Dict[int, Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Cached catalog movies are shared, the user's list is added to a copy."""
+    return [{**movie, "my_list": my_list.get(movie["id"])} for movie in movies]
@@ -1,5 +1,5 @@
 import logging
-from typing import Dict
+from typing import Any, Dict, List, Optional
 
 from django.db.models import QuerySet
 from rest_framework import status
@@ -15,14 +15,15 @@ from stream.api.handlers import (
     MoviesHandler,
 )
 from stream.api.serializers import (
-    MovieSerializer,
+    CatalogMovieSerializer,
     SaveCurrentSecondSerializer,
     UserMovieHistorySerializer,
     CategoriesWithMoviesSerializer,
     MoviesEndpointSerializer,
 )
-from stream.api.utils import _get_relative_path_to_watch
+from stream.api.utils import _get_relative_path_to_watch, get_my_list, merge_my_list
 from stream.api.validators import SaveCurrentSecondValidator
+from stream.cache import get_or_build
 from stream.models import Movie, UserMovieHistory, MovieDBCategory
 
 logger = logging.getLogger(__name__)
@@ -59,16 +60,26 @@ class MoviesEndpoint(GenericAPIView):
     verbose_request_logging = True
 
     def get(self, request: Request) -> Response:
-        movies: QuerySet[Movie] = self.handler_class().handle(
-            movie_id=request.query_params.get("id", None),
-            query=request.query_params.get("query", None),
+        movie_id: Optional[str] = request.query_params.get("id", None)
+        query: Optional[str] = request.query_params.get("query", None)
+
+        def _build() -> List[Dict[str, Any]]:
+            movies: QuerySet[Movie] = self.handler_class().handle(
+                movie_id=movie_id, query=query
+            )
+            return CatalogMovieSerializer(movies, many=True).data
+
+        movies: List[Dict[str, Any]] = get_or_build(
+            "movies", _build, movie_id=movie_id, query=query
         )
 
-        serialized_movies = MovieSerializer(movies, user=request.user, many=True)
+        my_list: Dict[int, Dict[str, Any]] = get_my_list(
+            user=request.user, movie_ids=[movie["id"] for movie in movies]
+        )
 
         return Response(
             {
-                "movies": serialized_movies.data,
+                "movies": merge_my_list(movies=movies, my_list=my_list),
                 "relative_watch_path": _get_relative_path_to_watch(),
             },
             status=status.HTTP_200_OK,
@@ -119,20 +130,40 @@ class CategoriesEndpoint(GenericAPIView):
     verbose_request_logging = True
 
     def get(self, request: Request) -> Response:
-        if request.query_params.get("id", None) is None:
-            categories: QuerySet[MovieDBCategory] = MovieDBCategory.objects.all()
-        else:
-            categories: QuerySet[MovieDBCategory] = MovieDBCategory.objects.filter(
-                moviedb_id=request.query_params.get("id")
-            ).all()
+        category_id: Optional[str] = request.query_params.get("id", None)
 
-        serialized_locations = self.get_serializer(
-            categories, user=request.user, many=True
+        def _build() -> List[Dict[str, Any]]:
+            if category_id is None:
+                categories: QuerySet[MovieDBCategory] = MovieDBCategory.objects.all()
+            else:
+                categories: QuerySet[MovieDBCategory] = MovieDBCategory.objects.filter(
+                    moviedb_id=category_id
+                ).all()
+
+            return self.get_serializer(categories, many=True).data
+
+        categories: List[Dict[str, Any]] = get_or_build(
+            "categories", _build, category_id=category_id
+        )
+
+        my_list: Dict[int, Dict[str, Any]] = get_my_list(
+            user=request.user,
+            movie_ids={
+                movie["id"] for category in categories for movie in category["movies"]
+            },
         )
 
         return Response(
             {
-                "categories": serialized_locations.data,
+                "categories": [
+                    {
+                        **category,
+                        "movies": merge_my_list(
+                            movies=category["movies"], my_list=my_list
+                        ),
+                    }
+                    for category in categories
+                ],
                 "relative_watch_path": _get_relative_path_to_watch(),
             },
             status=status.HTTP_200_OK,
@@ -0,0 +1,48 @@
+import hashlib
+import logging
+import time
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY: str = "catalog:version"
+
+
+def _get_initial_version() -> int:
+    # Entries of an evicted version must not be served again, so a lost version key
+    # starts over from the clock instead of 1.
+    return int(time.time() * 1000)
+
+
+def get_catalog_version() -> int:
+    version: Optional[int] = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, _get_initial_version(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY, 0)
+
+    return version
+
+
+def bump_catalog_version() -> None:
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOG_VERSION_KEY, _get_initial_version(), timeout=None)
+
+
+def get_catalog_key(name: str, **params: Any) -> str:
+    digest: str = hashlib.md5(repr(sorted(params.items())).encode()).hexdigest()
+    return f"catalog:{get_catalog_version()}:{name}:{digest}"
+
+
+def get_or_build(name: str, build: Callable[[], Any], **params: Any) -> Any:
+    key: str = get_catalog_key(name, **params)
+    data: Any = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, timeout=settings.CATALOG_CACHE_SECONDS)
+
+    return data
@@ -1,6 +1,13 @@
 import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 from django.conf import settings
+from django.contrib.auth.models import User
+
+from panel.tasks.tests.iso_639 import iso_639_2_to_1
+from stream.cache import get_or_build
+from stream.models import Movie, MovieContent, UserMovieHistory
 
 
 def _get_relative_path(full_path: str) -> str:
@@ -25,6 +32,14 @@ def _get_url(full_path: str, relative_path: str = "") -> str:
         )
 
 
+def _get_image_url(movie: Movie, field: str) -> Optional[str]:
+    relative_path: Optional[str] = movie.local_images.get(field)
+    if not relative_path:
+        return getattr(movie, field)
+
+    return _get_url(full_path=relative_path, relative_path=relative_path)
+
+
 def _get_quality_string(resolution_width: int) -> str:
     if resolution_width > 2000:
         return "4K"
@@ -34,3 +49,59 @@ def _get_quality_string(resolution_width: int) -> str:
         return "HDTV"
     else:
         return "UNK"
+
+
+def _get_watch_media(movie: Movie) -> Dict[str, List[Dict[str, str]]]:
+    movie_contents: List[MovieContent] = list(
+        movie.movie_content.filter(is_ready=True).prefetch_related("movie_subtitle")
+    )
+
+    return {
+        "video_details": [
+            {
+                "url": _get_url(
+                    full_path=movie_content.full_path,
+                    relative_path=movie_content.relative_path,
+                ),
+                "is_ready": movie_content.is_ready,
+                "quality": _get_quality_string(movie_content.resolution_width),
+                "suffix": movie_content.file_extension.replace(".", "")
+                if movie_content.file_extension is not None
+                else "",
+            }
+            for movie_content in movie_contents
+        ],
+        "subtitles": [
+            {
+                "url": _get_url(
+                    full_path=sub.full_path, relative_path=sub.relative_path
+                ),
+                "name": Path(sub.file_name).stem,
+                "language": iso_639_2_to_1.get(sub.lang_three, "en"),
+            }
+            for movie_content in movie_contents
+            for sub in movie_content.movie_subtitle.all()
+        ],
+    }
+
+
+def get_watch_context(movie: Movie, user: User) -> Optional[Dict[str, Any]]:
+    """Videos and subtitles are cached until the catalog version changes."""
+    media: Dict[str, List[Dict[str, str]]] = get_or_build(
+        "watch", lambda: _get_watch_media(movie=movie), movie_id=movie.id
+    )
+    if not media["video_details"]:
+        return None
+
+    user_history: Optional[UserMovieHistory] = UserMovieHistory.objects.filter(
+        user=user, movie=movie
+    ).first()
+
+    return {
+        **media,
+        "poster": _get_image_url(movie=movie, field="backdrop_path_big"),
+        "movie": movie,
+        "start_from": 0
+        if user_history is None or user_history.is_watched
+        else user_history.current_second,
+    }
@@ -0,0 +1,171 @@
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import IO, Optional, Pattern, Tuple
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import (
+    FileResponse,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseNotFound,
+    HttpResponseNotModified,
+)
+from django.utils.http import http_date, parse_http_date_safe
+
+RANGE: Pattern = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeFile:
+    """Reads at most length bytes from start.
+
+    fileno is kept so that gunicorn can still sendfile the range, it starts from the
+    current offset and stops at Content-Length.
+    """
+
+    def __init__(self, file: IO[bytes], start: int, length: int) -> None:
+        file.seek(start)
+        self.file: IO[bytes] = file
+        self.remaining: int = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+
+        data: bytes = self.file.read(size)
+        self.remaining -= len(data)
+
+        return data
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def get_media_path(path: str) -> Optional[Path]:
+    if not settings.MEDIA_FOLDER:
+        return None
+
+    root: Path = Path(settings.MEDIA_FOLDER).resolve()
+    full_path: Path = (root / path).resolve()
+    if root not in full_path.parents or not full_path.is_file():
+        return None
+
+    return full_path
+
+
+def get_etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive byte range of the Range header, None means the whole file.
+
+    Multiple ranges are answered with the whole file. Raises ValueError when the
+    range is outside of the file.
+    """
+    match: Optional[re.Match] = RANGE.match(header.strip()) if header else None
+    if not match or match.groups() == ("", ""):
+        return None
+
+    start, end = match.groups()
+    if not start:
+        suffix: int = int(end)
+        if suffix == 0:
+            raise ValueError(f"Range {header} is empty.")
+
+        return max(size - suffix, 0), size - 1
+
+    if end and int(end) < int(start):
+        return None
+
+    if int(start) >= size:
+        raise ValueError(f"Range {header} starts after the end of the file.")
+
+    return int(start), min(int(end), size - 1) if end else size - 1
+
+
+def is_range_valid(if_range: Optional[str], etag: str, modified: float) -> bool:
+    """A range of a changed file would be merged into the wrong content."""
+    if not if_range:
+        return True
+
+    if if_range.startswith(('"', "W/")):
+        return if_range == etag
+
+    return parse_http_date_safe(if_range) == int(modified)
+
+
+def _delegate(full_path: Path) -> Optional[HttpResponse]:
+    if settings.MEDIA_SERVE_MODE == "x-accel":
+        relative_path: str = str(
+            full_path.relative_to(Path(settings.MEDIA_FOLDER).resolve())
+        )
+        response: HttpResponse = HttpResponse()
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX + quote(
+            relative_path
+        )
+    elif settings.MEDIA_SERVE_MODE == "x-sendfile":
+        response = HttpResponse()
+        response["X-Sendfile"] = str(full_path)
+    else:
+        return None
+
+    # The proxy fills in the type, length and range headers.
+    del response["Content-Type"]
+    return response
+
+
+def serve_media(request: HttpRequest, path: str) -> HttpResponse:
+    full_path: Optional[Path] = get_media_path(path)
+    if full_path is None:
+        return HttpResponseNotFound("File could not be found.")
+
+    delegated: Optional[HttpResponse] = _delegate(full_path)
+    if delegated is not None:
+        return delegated
+
+    stat: os.stat_result = full_path.stat()
+    etag: str = get_etag(stat)
+    if request.headers.get("If-None-Match") == etag:
+        response: HttpResponse = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
+    try:
+        byte_range: Optional[Tuple[int, int]] = (
+            parse_range(request.headers.get("Range"), stat.st_size)
+            if is_range_valid(request.headers.get("If-Range"), etag, stat.st_mtime)
+            else None
+        )
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{stat.st_size}"
+        return response
+
+    content_type: str = (
+        mimetypes.guess_type(str(full_path))[0] or "application/octet-stream"
+    )
+    file: IO[bytes] = open(full_path, "rb")
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+        response["Content-Length"] = str(stat.st_size)
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            RangeFile(file, start=start, length=end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+
+    return response
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.1 on 2026-10-19 10:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stream", "0005_add_language_field_to_subtitles"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="movie",
+            name="local_images",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
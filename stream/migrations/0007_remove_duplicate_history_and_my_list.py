@@ -0,0 +1,40 @@
+# Generated by Django 3.2.1 on 2026-10-19 16:30
+
+from django.db import migrations
+
+
+def remove_duplicates(apps, schema_editor):
+    UserMovieHistory = apps.get_model("stream", "UserMovieHistory")
+    MyList = apps.get_model("stream", "MyList")
+
+    # The most recently updated history of a movie is the one the player resumes from.
+    seen = set()
+    duplicates = []
+    for history in UserMovieHistory.objects.order_by("-updated_at", "-id").only(
+        "id", "user_id", "movie_id"
+    ):
+        key = (history.user_id, history.movie_id)
+        if key in seen:
+            duplicates.append(history.id)
+        seen.add(key)
+    UserMovieHistory.objects.filter(id__in=duplicates).delete()
+
+    seen = set()
+    duplicates = []
+    for item in MyList.objects.order_by("id").only("id", "user_id", "movie_id"):
+        key = (item.user_id, item.movie_id)
+        if key in seen:
+            duplicates.append(item.id)
+        seen.add(key)
+    MyList.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stream", "0006_add_local_images_to_movie"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 3.2.1 on 2026-10-19 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stream", "0007_remove_duplicate_history_and_my_list"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="movie",
+            name="imdb_id",
+            field=models.CharField(db_index=True, max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(
+                condition=models.Q(is_ready=True),
+                fields=["-id"],
+                name="movie_ready_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="moviecontent",
+            index=models.Index(
+                condition=models.Q(is_ready=True),
+                fields=["id"],
+                name="movie_content_ready_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usermoviehistory",
+            index=models.Index(
+                condition=models.Q(is_watched=False),
+                fields=["user", "-updated_at"],
+                name="history_unwatched_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="mylist",
+            constraint=models.UniqueConstraint(
+                fields=("user", "movie"), name="unique_my_list"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="usermoviehistory",
+            constraint=models.UniqueConstraint(
+                fields=("user", "movie"), name="unique_user_movie_history"
+            ),
+        ),
+    ]
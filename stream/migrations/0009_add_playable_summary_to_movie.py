@@ -0,0 +1,80 @@
+# Generated by Django 3.2.1 on 2026-10-19 18:10
+
+from django.db import migrations, models
+
+
+def fill_summaries(apps, schema_editor):
+    Movie = apps.get_model("stream", "Movie")
+
+    for movie in Movie.objects.prefetch_related(
+        "movie_content", "movie_content__movie_subtitle"
+    ):
+        contents = [
+            content for content in movie.movie_content.all() if content.is_ready
+        ]
+        best = max(
+            contents,
+            key=lambda content: (content.resolution_height, content.resolution_width),
+            default=None,
+        )
+        movie.is_playable = movie.is_ready and bool(contents)
+        movie.max_resolution_width = best.resolution_width if best else 0
+        movie.max_resolution_height = best.resolution_height if best else 0
+        movie.subtitle_languages = sorted(
+            {
+                subtitle.lang_three
+                for content in contents
+                for subtitle in content.movie_subtitle.all()
+            }
+        )
+        movie.save(
+            update_fields=[
+                "is_playable",
+                "max_resolution_width",
+                "max_resolution_height",
+                "subtitle_languages",
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stream", "0008_add_streaming_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="movie",
+            name="is_playable",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="max_resolution_width",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="max_resolution_height",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="subtitle_languages",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RemoveIndex(
+            model_name="movie",
+            name="movie_ready_idx",
+        ),
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(
+                condition=models.Q(is_playable=True),
+                fields=["-id"],
+                name="movie_playable_idx",
+            ),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,11 @@
 import logging
+from typing import Iterable, List, Set
 
 from django.contrib.auth.models import User
 from django.db import models
 
+from stream.cache import bump_catalog_version
+
 logger = logging.getLogger(__name__)
 
 
@@ -57,9 +60,18 @@ class MovieContent(CoreModel):
     def create_with_torrent(cls, torrent_source: str) -> "MovieContent":
         return MovieContent.objects.create(torrent_source=torrent_source)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                name="movie_content_ready_idx",
+                condition=models.Q(is_ready=True),
+            ),
+        ]
+
 
 class Movie(CoreModel):
-    imdb_id = models.CharField(max_length=10)
+    imdb_id = models.CharField(max_length=10, db_index=True)
     title = models.CharField(max_length=120, null=False, blank=True)
     description = models.TextField(null=True, blank=True)
     movie_content = models.ManyToManyField("stream.MovieContent")
@@ -69,6 +81,7 @@ class Movie(CoreModel):
     poster_path_small = models.CharField(max_length=255, null=True, blank=True)
     backdrop_path_big = models.CharField(max_length=255, null=True, blank=True)
     backdrop_path_small = models.CharField(max_length=255, null=True, blank=True)
+    local_images = models.JSONField(default=dict, blank=True)
     duration = models.IntegerField(default=0)
     media_info_raw = models.JSONField(default=dict, blank=True)
     imdb_score = models.FloatField(default=0.0)
@@ -76,11 +89,64 @@ class Movie(CoreModel):
     release_date = models.DateField(null=True, blank=True)
     is_adult = models.BooleanField(default=False)
     is_ready = models.BooleanField(default=False)
+    # Kept in sync with the contents by refresh_summary, listings filter on it
+    # instead of joining movie_content.
+    is_playable = models.BooleanField(default=False)
+    max_resolution_width = models.IntegerField(default=0)
+    max_resolution_height = models.IntegerField(default=0)
+    subtitle_languages = models.JSONField(default=list, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return f"{self.id}: {self.title}"
 
+    def refresh_summary(self) -> None:
+        contents: List[MovieContent] = list(
+            self.movie_content.filter(is_ready=True).prefetch_related("movie_subtitle")
+        )
+        best: MovieContent = max(
+            contents,
+            key=lambda content: (content.resolution_height, content.resolution_width),
+            default=MovieContent(),
+        )
+        languages: Set[str] = {
+            subtitle.lang_three
+            for content in contents
+            for subtitle in content.movie_subtitle.all()
+        }
+
+        self.is_playable = self.is_ready and bool(contents)
+        self.max_resolution_width = best.resolution_width
+        self.max_resolution_height = best.resolution_height
+        self.subtitle_languages = sorted(languages)
+        self.save(
+            update_fields=[
+                "is_playable",
+                "max_resolution_width",
+                "max_resolution_height",
+                "subtitle_languages",
+            ]
+        )
+        bump_catalog_version()
+
+    @classmethod
+    def refresh_summaries(cls, movie_content_ids: Iterable[int]) -> None:
+        for movie in cls.objects.filter(
+            movie_content__id__in=list(movie_content_ids)
+        ).distinct():
+            movie.refresh_summary()
+
+    class Meta:
+        # Partial indexes, boolean filters are compiled to a bare column on SQLite
+        # which a regular index on the column cannot serve.
+        indexes = [
+            models.Index(
+                fields=["-id"],
+                name="movie_playable_idx",
+                condition=models.Q(is_playable=True),
+            ),
+        ]
+
 
 class MyList(CoreModel):
     movie = models.ForeignKey(
@@ -91,6 +157,11 @@ class MyList(CoreModel):
     def __str__(self) -> str:
         return f"{self.id} - {self.user.username} - {self.movie.title}"
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "movie"], name="unique_my_list"),
+        ]
+
 
 class UserMovieHistory(CoreModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -104,3 +175,17 @@ class UserMovieHistory(CoreModel):
 
     def __str__(self) -> str:
         return f"{self.id} - {self.user.username} - {self.movie.title}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "movie"], name="unique_user_movie_history"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-updated_at"],
+                name="history_unwatched_idx",
+                condition=models.Q(is_watched=False),
+            ),
+        ]
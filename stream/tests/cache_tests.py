@@ -0,0 +1,74 @@
+from typing import Any, Dict, List
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from stream.api.utils import get_my_list, merge_my_list
+from stream.cache import (
+    CATALOG_VERSION_KEY,
+    bump_catalog_version,
+    get_catalog_version,
+    get_or_build,
+)
+from stream.models import Movie, MyList
+from stream.tests.factories import MovieFactory
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> None:
+    cache.clear()
+
+
+class TestCatalogCache:
+    def test_get_or_build_caches_until_version_bump(self, mocker) -> None:
+        build = mocker.Mock(side_effect=[["first"], ["second"]])
+
+        assert get_or_build("movies", build, query=None) == ["first"]
+        assert get_or_build("movies", build, query=None) == ["first"]
+
+        bump_catalog_version()
+
+        assert get_or_build("movies", build, query=None) == ["second"]
+        assert build.call_count == 2
+
+    def test_params_are_part_of_the_key(self, mocker) -> None:
+        build = mocker.Mock(side_effect=[["sintel"], ["tears"]])
+
+        assert get_or_build("movies", build, query="sintel") == ["sintel"]
+        assert get_or_build("movies", build, query="tears") == ["tears"]
+
+    def test_lost_version_does_not_start_over(self) -> None:
+        cache.set(CATALOG_VERSION_KEY, 5, timeout=None)
+        assert get_catalog_version() == 5
+
+        cache.delete(CATALOG_VERSION_KEY)
+
+        assert get_catalog_version() > 5
+
+    @pytest.mark.usefixtures("db")
+    def test_refresh_summary_bumps_version(self) -> None:
+        movie: Movie = MovieFactory()
+        version: int = get_catalog_version()
+
+        movie.refresh_summary()
+
+        assert get_catalog_version() == version + 1
+
+
+@pytest.mark.usefixtures("db")
+class TestMergeMyList:
+    def test_adds_the_users_list_to_a_copy(self, user: User) -> None:
+        listed: Movie = MovieFactory()
+        other: Movie = MovieFactory()
+        MyList.objects.create(user=user, movie=listed)
+        movies: List[Dict[str, Any]] = [{"id": listed.id}, {"id": other.id}]
+
+        merged: List[Dict[str, Any]] = merge_my_list(
+            movies=movies,
+            my_list=get_my_list(user=user, movie_ids=[listed.id, other.id]),
+        )
+
+        assert "created_at" in merged[0]["my_list"]
+        assert merged[1]["my_list"] is None
+        assert movies == [{"id": listed.id}, {"id": other.id}]
@@ -0,0 +1,76 @@
+from typing import Any, Dict, Optional
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from stream.handlers import get_watch_context
+from stream.models import Movie, UserMovieHistory
+from stream.tests.factories import (
+    MovieContentFactory,
+    MovieFactory,
+    MovieSubtitleFactory,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> None:
+    cache.clear()
+
+
+@pytest.fixture
+def movie() -> Movie:
+    return MovieFactory(
+        movie_content=[
+            MovieContentFactory(
+                is_ready=True,
+                full_path=f"/media/{index}/video.mp4",
+                relative_path=f"{index}/video.mp4",
+                file_name="video.mp4",
+                file_extension=".mp4",
+                resolution_width=1920,
+                movie_subtitle=[
+                    MovieSubtitleFactory(
+                        full_path=f"/media/{index}/{lang}.vtt",
+                        relative_path=f"{index}/{lang}.vtt",
+                        file_name=f"{lang}.vtt",
+                        lang_three=lang,
+                    )
+                    for lang in ("eng", "tur")
+                ],
+            )
+            for index in range(3)
+        ],
+        is_ready=True,
+    )
+
+
+@pytest.mark.usefixtures("db")
+class TestGetWatchContext:
+    def test_builds_videos_and_subtitles(self, movie: Movie, user: User) -> None:
+        UserMovieHistory.objects.create(user=user, movie=movie, current_second=42)
+
+        context: Optional[Dict[str, Any]] = get_watch_context(movie=movie, user=user)
+
+        assert len(context["video_details"]) == 3
+        assert context["video_details"][0]["quality"] == "HD"
+        assert context["video_details"][0]["suffix"] == "mp4"
+        assert len(context["subtitles"]) == 6
+        assert {sub["language"] for sub in context["subtitles"]} == {"en", "tr"}
+        assert context["start_from"] == 42
+
+    def test_query_count_does_not_grow_with_contents(
+        self, movie: Movie, user: User, django_assert_num_queries
+    ) -> None:
+        # Contents, subtitles and the history.
+        with django_assert_num_queries(3):
+            get_watch_context(movie=movie, user=user)
+
+        # Only the history once the videos and subtitles are cached.
+        with django_assert_num_queries(1):
+            get_watch_context(movie=movie, user=user)
+
+    def test_returns_none_without_ready_contents(self, user: User) -> None:
+        movie: Movie = MovieFactory(movie_content=[MovieContentFactory()])
+
+        assert get_watch_context(movie=movie, user=user) is None
@@ -0,0 +1,125 @@
+from pathlib import Path
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils.http import http_date
+
+from stream.media import get_etag, parse_range, serve_media
+
+CONTENT: bytes = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def media_folder(tmp_path: Path, settings) -> Path:
+    settings.MEDIA_FOLDER = str(tmp_path)
+    settings.MEDIA_SERVE_MODE = "django"
+    (tmp_path / "movie").mkdir()
+    (tmp_path / "movie" / "video.mp4").write_bytes(CONTENT)
+
+    return tmp_path
+
+
+def _get(path: str = "movie/video.mp4", **headers) -> HttpResponse:
+    return serve_media(
+        request=RequestFactory().get(f"/downloads/{path}", **headers), path=path
+    )
+
+
+def _body(response: HttpResponse) -> bytes:
+    body: bytes = b"".join(response.streaming_content)
+    response.file_to_stream.close()
+
+    return body
+
+
+class TestParseRange:
+    @pytest.mark.parametrize(
+        "header, expected",
+        [
+            (None, None),
+            ("bytes=0-99", (0, 99)),
+            ("bytes=100-", (100, 1023)),
+            ("bytes=-24", (1000, 1023)),
+            ("bytes=-5000", (0, 1023)),
+            ("bytes=1000-5000", (1000, 1023)),
+            ("bytes=0-10,20-30", None),
+            ("bytes=10-5", None),
+            ("items=0-10", None),
+        ],
+    )
+    def test_parses_single_ranges(self, header, expected) -> None:
+        assert parse_range(header, 1024) == expected
+
+    @pytest.mark.parametrize("header", ["bytes=1024-", "bytes=-0"])
+    def test_raises_for_unsatisfiable_ranges(self, header: str) -> None:
+        with pytest.raises(ValueError):
+            parse_range(header, 1024)
+
+
+class TestServeMedia:
+    def test_serves_the_whole_file(self, media_folder: Path) -> None:
+        response: HttpResponse = _get()
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "video/mp4"
+        assert response["Content-Length"] == "1024"
+        assert response["Accept-Ranges"] == "bytes"
+        assert _body(response) == CONTENT
+
+    def test_serves_a_range(self, media_folder: Path) -> None:
+        response: HttpResponse = _get(HTTP_RANGE="bytes=100-199")
+
+        assert response.status_code == 206
+        assert response["Content-Range"] == "bytes 100-199/1024"
+        assert response["Content-Length"] == "100"
+        assert _body(response) == CONTENT[100:200]
+
+    def test_unsatisfiable_range(self, media_folder: Path) -> None:
+        response: HttpResponse = _get(HTTP_RANGE="bytes=2000-")
+
+        assert response.status_code == 416
+        assert response["Content-Range"] == "bytes */1024"
+
+    def test_if_range(self, media_folder: Path) -> None:
+        stat = (media_folder / "movie" / "video.mp4").stat()
+
+        matching: HttpResponse = _get(
+            HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=get_etag(stat)
+        )
+        by_date: HttpResponse = _get(
+            HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=http_date(stat.st_mtime)
+        )
+        changed: HttpResponse = _get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"changed"')
+
+        assert matching.status_code == 206
+        assert by_date.status_code == 206
+        assert changed.status_code == 200
+        for response in (matching, by_date, changed):
+            response.file_to_stream.close()
+
+    def test_if_none_match(self, media_folder: Path) -> None:
+        etag: str = get_etag((media_folder / "movie" / "video.mp4").stat())
+
+        assert _get(HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    @pytest.mark.parametrize("path", ["../outside.mp4", "movie/missing.mp4", "movie"])
+    def test_only_files_in_media_folder(self, media_folder: Path, path: str) -> None:
+        (media_folder.parent / "outside.mp4").write_bytes(CONTENT)
+
+        assert _get(path=path).status_code == 404
+
+    def test_delegates_to_nginx(self, media_folder: Path, settings) -> None:
+        settings.MEDIA_SERVE_MODE = "x-accel"
+
+        response: HttpResponse = _get()
+
+        assert response["X-Accel-Redirect"] == "/protected-downloads/movie/video.mp4"
+        assert "Content-Type" not in response
+
+    def test_delegates_to_sendfile(self, media_folder: Path, settings) -> None:
+        settings.MEDIA_SERVE_MODE = "x-sendfile"
+
+        response: HttpResponse = _get()
+
+        assert response["X-Sendfile"] == str(media_folder / "movie" / "video.mp4")
@@ -0,0 +1,61 @@
+import pytest
+
+from stream.models import Movie, MovieContent
+from stream.tests.factories import (
+    MovieContentFactory,
+    MovieFactory,
+    MovieSubtitleFactory,
+)
+
+
+@pytest.mark.usefixtures("db")
+class TestMovieSummary:
+    def test_refresh_summary_uses_the_best_ready_content(self) -> None:
+        low: MovieContent = MovieContentFactory(
+            is_ready=True,
+            resolution_width=1280,
+            resolution_height=720,
+            movie_subtitle=[MovieSubtitleFactory(lang_three="tur")],
+        )
+        high: MovieContent = MovieContentFactory(
+            is_ready=True,
+            resolution_width=1920,
+            resolution_height=1080,
+            movie_subtitle=[MovieSubtitleFactory(lang_three="eng")],
+        )
+        not_ready: MovieContent = MovieContentFactory(
+            resolution_width=3840,
+            resolution_height=2160,
+            movie_subtitle=[MovieSubtitleFactory(lang_three="ger")],
+        )
+        movie: Movie = MovieFactory(movie_content=[low, high, not_ready], is_ready=True)
+
+        movie.refresh_summary()
+        movie.refresh_from_db()
+
+        assert movie.is_playable is True
+        assert movie.max_resolution_width == 1920
+        assert movie.max_resolution_height == 1080
+        assert movie.subtitle_languages == ["eng", "tur"]
+
+    def test_movie_without_info_is_not_playable(self) -> None:
+        movie: Movie = MovieFactory(movie_content=[MovieContentFactory(is_ready=True)])
+
+        movie.refresh_summary()
+
+        assert movie.is_playable is False
+
+    def test_refresh_summaries_clears_lost_contents(self) -> None:
+        movie_content: MovieContent = MovieContentFactory(
+            is_ready=True, resolution_width=1920, resolution_height=1080
+        )
+        movie: Movie = MovieFactory(movie_content=[movie_content], is_ready=True)
+        movie.refresh_summary()
+
+        MovieContent.objects.filter(id=movie_content.id).update(is_ready=False)
+        Movie.refresh_summaries(movie_content_ids=[movie_content.id])
+        movie.refresh_from_db()
+
+        assert movie.is_playable is False
+        assert movie.max_resolution_height == 0
+        assert movie.subtitle_languages == []
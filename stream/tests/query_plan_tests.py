@@ -0,0 +1,73 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection
+
+from stream.api.handlers import (
+    MoviesHandler,
+    SaveCurrentSecondHandler,
+    UserMovieHistoryHandler,
+)
+from stream.api.serializers import SaveCurrentSecond
+from stream.models import Movie, MyList, UserMovieHistory
+from stream.tests.factories import MovieFactory
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="Query plans are checked on SQLite"
+)
+
+
+@pytest.mark.usefixtures("db")
+class TestQueryPlans:
+    def test_catalog_uses_playable_index(self) -> None:
+        plan: str = MoviesHandler.handle(movie_id=None, query=None).explain()
+
+        assert "USING INDEX movie_playable_idx" in plan
+        assert "TEMP B-TREE FOR ORDER BY" not in plan
+
+    def test_continue_watching_uses_unwatched_index(self, user: User) -> None:
+        plan: str = UserMovieHistoryHandler.handle(history_id=None, user=user).explain()
+
+        assert "USING INDEX history_unwatched_idx" in plan
+        assert "TEMP B-TREE FOR ORDER BY" not in plan
+
+    def test_imdb_id_lookup_uses_index(self) -> None:
+        plan: str = Movie.objects.filter(imdb_id="tt0111161").explain()
+
+        assert "SEARCH stream_movie USING INDEX stream_movie_imdb_id" in plan
+
+    def test_history_lookup_uses_unique_index(self, user: User) -> None:
+        plan: str = UserMovieHistory.objects.filter(user=user, movie_id=1).explain()
+
+        assert "(user_id=? AND movie_id=?)" in plan
+
+
+@pytest.mark.usefixtures("db")
+class TestUniqueUserMovie:
+    def test_history_is_unique(self, user: User) -> None:
+        movie: Movie = MovieFactory()
+        UserMovieHistory.objects.create(user=user, movie=movie)
+
+        with pytest.raises(IntegrityError):
+            UserMovieHistory.objects.create(user=user, movie=movie)
+
+    def test_my_list_is_unique(self, user: User) -> None:
+        movie: Movie = MovieFactory()
+        MyList.objects.create(user=user, movie=movie)
+
+        with pytest.raises(IntegrityError):
+            MyList.objects.create(user=user, movie=movie)
+
+    def test_save_current_second_updates_history(self, user: User) -> None:
+        movie: Movie = MovieFactory()
+
+        for second in (10, 20):
+            SaveCurrentSecondHandler.save_regular_user(
+                save_current_second=SaveCurrentSecond(
+                    movie_id=movie.id, current_second=second, remaining_seconds=100
+                ),
+                user=user,
+                is_watched=False,
+            )
+
+        history: UserMovieHistory = UserMovieHistory.objects.get(user=user, movie=movie)
+        assert history.current_second == 20
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+import pytest
+from django.http import HttpResponse
+from django.test import Client
+from django.urls import reverse
+
+
+@pytest.fixture
+def media_folder(tmp_path: Path, settings) -> Path:
+    settings.MEDIA_FOLDER = str(tmp_path)
+    settings.MEDIA_SERVE_MODE = "django"
+    (tmp_path / "movie").mkdir()
+    (tmp_path / "movie" / "video.mp4").write_bytes(b"video")
+
+    return tmp_path
+
+
+def _get_media_url() -> str:
+    return reverse("stream:media", kwargs={"path": "movie/video.mp4"})
+
+
+@pytest.mark.usefixtures("db", "media_folder")
+class TestMediaView:
+    def test_requires_login(self, client: Client) -> None:
+        response: HttpResponse = client.get(_get_media_url())
+
+        assert response.status_code == 302
+        assert "login" in response["Location"]
+
+    def test_serves_logged_in_users(self, user_client: Client) -> None:
+        response: HttpResponse = user_client.get(
+            _get_media_url(), HTTP_RANGE="bytes=1-3"
+        )
+
+        assert response.status_code == 206
+        assert b"".join(response.streaming_content) == b"ide"
+
+    def test_only_reads(self, user_client: Client) -> None:
+        assert user_client.post(_get_media_url()).status_code == 405
@@ -10,4 +10,5 @@ urlpatterns = [
     path("api/", include("stream.api.urls"), name="stream_api"),
     path("watch/<int:movie_id>", views.watch, name="watch"),
     path("search", views.search, name="search"),
+    path("downloads/<path:path>", views.media, name="media"),
 ]
@@ -0,0 +1,330 @@
+import bisect
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import redis
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+METRICS_KEY: str = "vigilio:metrics"
+# Every process adds its numbers to the shared totals at most this often.
+FLUSH_SECONDS: float = 1.0
+
+DURATION_BUCKETS: List[float] = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+COUNT_BUCKETS: List[float] = [0, 1, 2, 5, 10, 20, 50, 100, 200, 500]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+
+    pairs: str = ",".join(
+        f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)
+    )
+    return f"{{{pairs}}}"
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _get_worker_label(worker: Optional[str]) -> Tuple[Tuple[str, ...], LabelValues]:
+    return (("worker",), (worker,)) if worker else ((), ())
+
+
+def _get_field(labels: LabelValues, *suffix: Any) -> str:
+    return json.dumps(list(labels) + list(suffix))
+
+
+def _parse_field(field: bytes) -> Tuple[LabelValues, Any]:
+    values: List[Any] = json.loads(field)
+    return tuple(values[:-1]), values[-1]
+
+
+class Counter:
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.labels: Tuple[str, ...] = tuple(labels)
+        self.values: Dict[LabelValues, float] = {}
+        # Not yet added to the shared totals.
+        self.pending: Dict[LabelValues, float] = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+            self.pending[labels] = self.pending.get(labels, 0) + amount
+
+    def take_pending(self) -> Dict[str, float]:
+        with self.lock:
+            pending, self.pending = self.pending, {}
+
+        return {_get_field(labels): amount for labels, amount in pending.items()}
+
+    def load(self, fields: Dict[bytes, bytes]) -> "Counter":
+        counter: Counter = Counter(self.name, self.documentation, self.labels)
+        for field, value in fields.items():
+            counter.values[tuple(json.loads(field))] = _parse_number(value)
+
+        return counter
+
+    def render(self, worker: Optional[str] = None) -> List[str]:
+        lines: List[str] = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        names, prefix = _get_worker_label(worker)
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                label_text: str = _format_labels(names + self.labels, prefix + labels)
+                lines.append(f"{self.name}{label_text} {_format_number(value)}")
+
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS,
+    ) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.labels: Tuple[str, ...] = tuple(labels)
+        self.buckets: List[float] = sorted(buckets) + [float("inf")]
+        # Bucket counts are kept per bucket and summed up when rendered.
+        self.counts: Dict[LabelValues, List[int]] = {}
+        self.sums: Dict[LabelValues, float] = {}
+        # Not yet added to the shared totals, field -> amount.
+        self.pending: Dict[str, float] = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index: int = bisect.bisect_left(self.buckets, value)
+        bucket: str = _get_field(labels, index)
+        total: str = _get_field(labels, "sum")
+        with self.lock:
+            counts: List[int] = self.counts.setdefault(labels, [0] * len(self.buckets))
+            counts[index] += 1
+            self.sums[labels] = self.sums.get(labels, 0.0) + value
+            self.pending[bucket] = self.pending.get(bucket, 0) + 1
+            self.pending[total] = self.pending.get(total, 0.0) + value
+
+    def take_pending(self) -> Dict[str, float]:
+        with self.lock:
+            pending, self.pending = self.pending, {}
+
+        return pending
+
+    def load(self, fields: Dict[bytes, bytes]) -> "Histogram":
+        histogram: Histogram = Histogram(
+            self.name, self.documentation, self.labels, self.buckets[:-1]
+        )
+        for field, value in fields.items():
+            labels, suffix = _parse_field(field)
+            if suffix == "sum":
+                histogram.sums[labels] = _parse_number(value)
+            elif 0 <= suffix < len(histogram.buckets):
+                histogram.counts.setdefault(labels, [0] * len(histogram.buckets))[
+                    suffix
+                ] = int(_parse_number(value))
+        for labels in histogram.counts:
+            histogram.sums.setdefault(labels, 0.0)
+
+        return histogram
+
+    def set(self, labels: LabelValues, cumulative: List[int], total: float) -> None:
+        """Fills the histogram from counts that were aggregated elsewhere, e.g. SQL."""
+        with self.lock:
+            self.counts[labels] = [
+                count - previous
+                for count, previous in zip(cumulative, [0] + cumulative[:-1])
+            ]
+            self.sums[labels] = total
+
+    def render(self, worker: Optional[str] = None) -> List[str]:
+        lines: List[str] = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        names, prefix = _get_worker_label(worker)
+        names += self.labels
+        with self.lock:
+            for labels, counts in sorted(self.counts.items()):
+                total: int = 0
+                for bucket, count in zip(self.buckets, counts):
+                    total += count
+                    values: LabelValues = prefix + labels + (_format_number(bucket),)
+                    lines.append(
+                        f"{self.name}_bucket{_format_labels(names + ('le',), values)} "
+                        f"{total}"
+                    )
+                label_text: str = _format_labels(names, prefix + labels)
+                lines.append(f"{self.name}_sum{label_text} {self.sums[labels]!r}")
+                lines.append(f"{self.name}_count{label_text} {total}")
+
+        return lines
+
+
+def _parse_number(value: bytes) -> float:
+    number: float = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def get_redis_connection() -> Optional[redis.Redis]:
+    from panel.tasks.inmemory import get_redis
+
+    return get_redis()
+
+
+class Registry:
+    """Request metrics are counted in the memory of every process and added to totals
+    in Redis, so that any gunicorn worker answers /metrics with the same series."""
+
+    def __init__(
+        self,
+        get_connection: Callable[[], Optional[redis.Redis]] = get_redis_connection,
+    ) -> None:
+        self.metrics: Dict[str, object] = {}
+        # Collectors render metrics that are shared by every process, e.g. from the
+        # database, so they are not labelled with the worker.
+        self.collectors: List[Callable[[], List[str]]] = []
+        self.lock: threading.Lock = threading.Lock()
+        self._get_connection: Callable[[], Optional[redis.Redis]] = get_connection
+        self._connection: Optional[redis.Redis] = None
+        self._flushed_at: float = 0.0
+        self._flush_lock: threading.Lock = threading.Lock()
+
+    def get_connection(self) -> Optional[redis.Redis]:
+        if self._connection is None:
+            self._connection = self._get_connection()
+
+        return self._connection
+
+    def flush(self, force: bool = False) -> bool:
+        """Adds the numbers counted since the last flush to the shared totals."""
+        if not force and time.monotonic() - self._flushed_at < FLUSH_SECONDS:
+            return True
+        if not self._flush_lock.acquire(blocking=force):
+            return True
+
+        try:
+            self._flushed_at = time.monotonic()
+            with self.lock:
+                metrics: List[Any] = list(self.metrics.values())
+            # Without Redis the numbers are only kept in this process.
+            pending: List[Tuple[str, Dict[str, float]]] = [
+                (metric.name, metric.take_pending()) for metric in metrics
+            ]
+            connection: Optional[redis.Redis] = self.get_connection()
+            if connection is None:
+                return False
+
+            pipeline = connection.pipeline(transaction=False)
+            for name, fields in pending:
+                for field, amount in fields.items():
+                    pipeline.hincrbyfloat(f"{METRICS_KEY}:{name}", field, amount)
+            pipeline.execute()
+        except redis.exceptions.RedisError:
+            logger.warning("Could not add the request metrics to Redis")
+            self._connection = None
+            return False
+        finally:
+            self._flush_lock.release()
+
+        return True
+
+    def _render_shared(self, connection: redis.Redis, metrics: List[Any]) -> List[str]:
+        pipeline = connection.pipeline(transaction=False)
+        for metric in metrics:
+            pipeline.hgetall(f"{METRICS_KEY}:{metric.name}")
+
+        lines: List[str] = []
+        for metric, fields in zip(metrics, pipeline.execute()):
+            lines += metric.load(fields).render()
+
+        return lines
+
+    def register_collector(self, collector: Callable[[], List[str]]) -> None:
+        with self.lock:
+            if collector not in self.collectors:
+                self.collectors.append(collector)
+
+    def counter(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ) -> Counter:
+        with self.lock:
+            return self.metrics.setdefault(name, Counter(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS,
+    ) -> Histogram:
+        with self.lock:
+            return self.metrics.setdefault(
+                name, Histogram(name, documentation, labels, buckets)
+            )
+
+    def render(self) -> str:
+        """The shared totals, or without Redis the numbers of this process under its
+        worker label."""
+        lines: List[str] = []
+        with self.lock:
+            metrics: List[object] = list(self.metrics.values())
+            collectors: List[Callable[[], List[str]]] = list(self.collectors)
+        try:
+            if not self.flush(force=True):
+                raise redis.exceptions.ConnectionError("Redis is not available.")
+            lines += self._render_shared(self.get_connection(), metrics)
+        except redis.exceptions.RedisError:
+            worker: str = f"{socket.gethostname()}:{os.getpid()}"
+            for metric in metrics:
+                lines += metric.render(worker)
+        for collector in collectors:
+            lines += collector()
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY: Registry = Registry()
+
+
+def is_metrics_allowed(request: HttpRequest) -> bool:
+    token: str = settings.METRICS_TOKEN
+    if token and request.headers.get("Authorization") == f"Bearer {token}":
+        return True
+
+    return bool(request.user and request.user.is_staff)
+
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    if not is_metrics_allowed(request):
+        return HttpResponseForbidden("Metrics are only available to staff users.")
+
+    return HttpResponse(
+        REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,217 @@
+import logging
+import threading
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from functools import partial, wraps
+from typing import Any, Callable, List, Optional, Tuple
+
+import redis
+import requests
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+from watch.metrics import COUNT_BUCKETS, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+REQUESTS = REGISTRY.counter(
+    "vigilio_requests_total",
+    "Requests answered by instrumented views.",
+    ["view", "method", "status"],
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "vigilio_request_duration_seconds", "Wall time of a request.", ["view"]
+)
+QUERIES = REGISTRY.histogram(
+    "vigilio_request_queries",
+    "Database queries of a request.",
+    ["view"],
+    buckets=COUNT_BUCKETS,
+)
+QUERY_SECONDS = REGISTRY.histogram(
+    "vigilio_request_query_duration_seconds",
+    "Time a request spent in database queries.",
+    ["view"],
+)
+REDIS_CALLS = REGISTRY.counter(
+    "vigilio_request_redis_calls_total", "Redis commands sent by requests.", ["view"]
+)
+HTTP_CALLS = REGISTRY.counter(
+    "vigilio_request_http_calls_total",
+    "Outgoing HTTP requests sent by requests.",
+    ["view"],
+)
+BUDGETS = REGISTRY.counter(
+    "vigilio_request_budget_exceeded_total",
+    "Requests over their time or query budget.",
+    ["view", "budget"],
+)
+
+_local: threading.local = threading.local()
+
+
+@dataclass
+class RequestStats:
+    queries: List[Tuple[float, str]] = field(default_factory=list)
+    redis_calls: int = 0
+    redis_seconds: float = 0.0
+    http_calls: int = 0
+    http_seconds: float = 0.0
+
+    @property
+    def query_seconds(self) -> float:
+        return sum(seconds for seconds, _ in self.queries)
+
+    def get_top_queries(self, count: int = 5) -> List[Tuple[float, str]]:
+        return sorted(self.queries, key=lambda query: query[0], reverse=True)[:count]
+
+
+def get_request_stats() -> Optional[RequestStats]:
+    return getattr(_local, "stats", None)
+
+
+def _record_redis(stats: RequestStats, seconds: float) -> None:
+    stats.redis_calls += 1
+    stats.redis_seconds += seconds
+
+
+def _record_http(stats: RequestStats, seconds: float) -> None:
+    stats.http_calls += 1
+    stats.http_seconds += seconds
+
+
+def _track(func: Callable, record: Callable[[RequestStats, float], None]) -> Callable:
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        stats: Optional[RequestStats] = get_request_stats()
+        if stats is None:
+            return func(*args, **kwargs)
+
+        started: float = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(stats, time.perf_counter() - started)
+
+    wrapper.is_tracked = True
+    return wrapper
+
+
+def install_call_tracking() -> None:
+    """Redis commands and outgoing HTTP requests are counted while a request of an
+    instrumented view is running on the thread."""
+    if not getattr(redis.Redis.execute_command, "is_tracked", False):
+        redis.Redis.execute_command = _track(redis.Redis.execute_command, _record_redis)
+
+    if not getattr(requests.Session.send, "is_tracked", False):
+        requests.Session.send = _track(requests.Session.send, _record_http)
+
+
+def _record_query(stats: RequestStats, execute, sql, params, many, context) -> Any:
+    started: float = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries.append((time.perf_counter() - started, sql))
+
+
+def _get_view_attribute(view_func: Callable, name: str, default: Any) -> Any:
+    # DRF keeps the view class in cls, django class based views in view_class.
+    view_class: Any = getattr(view_func, "cls", None) or getattr(
+        view_func, "view_class", None
+    )
+
+    return getattr(view_class, name, getattr(view_func, name, default))
+
+
+class PerformanceMiddleware:
+    """Instruments the views that set verbose_request_logging = True.
+
+    A view can set time_budget (seconds) and query_budget to override
+    SLOW_REQUEST_SECONDS and REQUEST_QUERY_BUDGET. Requests over a budget are logged
+    with their slowest queries.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response: Callable[[HttpRequest], HttpResponse] = get_response
+        install_call_tracking()
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        started: float = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                request.performance_stack = stack
+                response: HttpResponse = self.get_response(request)
+        finally:
+            _local.stats = None
+
+        stats: Optional[RequestStats] = getattr(request, "performance_stats", None)
+        if stats is not None:
+            self._record(request, response, stats, time.perf_counter() - started)
+
+        return response
+
+    def process_view(
+        self, request: HttpRequest, view_func: Callable, view_args, view_kwargs
+    ):
+        if not _get_view_attribute(view_func, "verbose_request_logging", False):
+            return None
+
+        stats: RequestStats = RequestStats()
+        request.performance_stats = stats
+        request.performance_budgets = (
+            _get_view_attribute(
+                view_func, "time_budget", settings.SLOW_REQUEST_SECONDS
+            ),
+            _get_view_attribute(
+                view_func, "query_budget", settings.REQUEST_QUERY_BUDGET
+            ),
+        )
+        _local.stats = stats
+        for connection in connections.all():
+            request.performance_stack.enter_context(
+                connection.execute_wrapper(partial(_record_query, stats))
+            )
+
+        return None
+
+    def _record(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        stats: RequestStats,
+        seconds: float,
+    ) -> None:
+        view: str = request.resolver_match.view_name if request.resolver_match else ""
+        REQUESTS.inc(view, request.method, str(response.status_code))
+        REQUEST_SECONDS.observe(seconds, view)
+        QUERIES.observe(len(stats.queries), view)
+        QUERY_SECONDS.observe(stats.query_seconds, view)
+        REDIS_CALLS.inc(view, amount=stats.redis_calls)
+        HTTP_CALLS.inc(view, amount=stats.http_calls)
+        REGISTRY.flush()
+
+        time_budget, query_budget = request.performance_budgets
+        exceeded: List[str] = []
+        if seconds > time_budget:
+            exceeded.append("time")
+        if len(stats.queries) > query_budget:
+            exceeded.append("queries")
+        if not exceeded:
+            return
+
+        for budget in exceeded:
+            BUDGETS.inc(view, budget)
+        top_queries: str = "\n".join(
+            f"  {query_seconds * 1000:.1f} ms {sql}"
+            for query_seconds, sql in stats.get_top_queries()
+        )
+        logger.warning(
+            f"Slow request {request.method} {request.path} ({view}): "
+            f"{seconds:.3f} s, {len(stats.queries)} queries in {stats.query_seconds:.3f} s, "
+            f"{stats.redis_calls} redis calls in {stats.redis_seconds:.3f} s, "
+            f"{stats.http_calls} http calls in {stats.http_seconds:.3f} s. "
+            f"Slowest queries:\n{top_queries}"
+        )
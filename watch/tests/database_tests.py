@@ -0,0 +1,91 @@
+from pathlib import Path
+from typing import Any, Dict, List, Type
+from unittest.mock import MagicMock
+
+import pytest
+from django.db import models
+
+from panel.management.commands.copy_database import get_models_in_order
+from panel.models import MovieTorrent
+from stream.models import Movie, MovieContent
+from watch.database import (
+    SQLITE_TIMEOUT,
+    configure_sqlite,
+    get_database_config,
+    parse_database_url,
+)
+
+
+def test_defaults_to_sqlite() -> None:
+    config: Dict[str, Any] = get_database_config(
+        url=None, default_sqlite=Path("/app/db.sqlite3")
+    )
+
+    assert config == {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": "/app/db.sqlite3",
+        "OPTIONS": {"timeout": SQLITE_TIMEOUT},
+    }
+
+
+def test_parses_postgres_url() -> None:
+    config: Dict[str, Any] = parse_database_url(
+        "postgres://vigilio:p%40ss@db:5433/vigilio?sslmode=require", conn_max_age=30
+    )
+
+    assert config == {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": "vigilio",
+        "USER": "vigilio",
+        "PASSWORD": "p@ss",
+        "HOST": "db",
+        "PORT": 5433,
+        "CONN_MAX_AGE": 30,
+        "OPTIONS": {"sslmode": "require"},
+    }
+
+
+def test_parses_pgbouncer_options() -> None:
+    config: Dict[str, Any] = parse_database_url(
+        "postgresql://vigilio@pgbouncer/vigilio?pgbouncer=true&conn_max_age=0"
+    )
+
+    assert config["DISABLE_SERVER_SIDE_CURSORS"] is True
+    assert config["CONN_MAX_AGE"] == 0
+    assert config["OPTIONS"] == {}
+
+
+def test_parses_sqlite_url() -> None:
+    assert (
+        parse_database_url("sqlite:////data/vigilio.db")["NAME"] == "/data/vigilio.db"
+    )
+
+
+def test_raises_on_unknown_scheme() -> None:
+    with pytest.raises(ValueError):
+        parse_database_url("mysql://localhost/vigilio")
+
+
+def test_configure_sqlite_enables_wal() -> None:
+    connection = MagicMock(vendor="sqlite")
+    cursor = connection.cursor.return_value.__enter__.return_value
+
+    configure_sqlite(sender=None, connection=connection)
+
+    cursor.execute.assert_any_call("PRAGMA journal_mode=WAL;")
+
+
+def test_configure_sqlite_ignores_other_databases() -> None:
+    connection = MagicMock(vendor="postgresql")
+
+    configure_sqlite(sender=None, connection=connection)
+
+    connection.cursor.assert_not_called()
+
+
+def test_models_are_ordered_by_references() -> None:
+    ordered: List[Type[models.Model]] = get_models_in_order()
+
+    assert ordered.index(MovieContent) < ordered.index(MovieTorrent)
+    assert ordered.index(MovieContent) < ordered.index(Movie.movie_content.through)
+    assert ordered.index(Movie) < ordered.index(Movie.movie_content.through)
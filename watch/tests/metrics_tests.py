@@ -0,0 +1,187 @@
+from typing import Any, Callable, Dict, List
+from unittest.mock import MagicMock
+
+import pytest
+import redis
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from watch.metrics import Counter, Histogram, Registry, metrics
+
+
+class FakePipeline:
+    def __init__(self, hashes: Dict[str, Dict[bytes, bytes]]) -> None:
+        self.hashes: Dict[str, Dict[bytes, bytes]] = hashes
+        self.commands: List[Callable[[], Any]] = []
+
+    def hincrbyfloat(self, key: str, field: str, amount: float) -> None:
+        def command() -> float:
+            fields: Dict[bytes, bytes] = self.hashes.setdefault(key, {})
+            value: float = float(fields.get(field.encode(), b"0")) + amount
+            fields[field.encode()] = repr(value).encode()
+            return value
+
+        self.commands.append(command)
+
+    def hgetall(self, key: str) -> None:
+        self.commands.append(lambda: dict(self.hashes.get(key, {})))
+
+    def execute(self) -> List[Any]:
+        return [command() for command in self.commands]
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.hashes: Dict[str, Dict[bytes, bytes]] = {}
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self.hashes)
+
+
+def _without_worker(text: str) -> str:
+    return text.replace('worker="w",', "").replace('{worker="w"}', "")
+
+
+class TestMetrics:
+    def test_counter(self) -> None:
+        counter: Counter = Counter("requests_total", "Requests.", ["view"])
+
+        counter.inc("movies")
+        counter.inc("movies", amount=2)
+
+        assert counter.render("w") == [
+            "# HELP requests_total Requests.",
+            "# TYPE requests_total counter",
+            'requests_total{worker="w",view="movies"} 3',
+        ]
+
+    def test_histogram_buckets_are_cumulative(self) -> None:
+        histogram: Histogram = Histogram("seconds", "Time.", ["view"], buckets=[0.1, 1])
+
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value, "movies")
+
+        assert [_without_worker(line) for line in histogram.render("w")[2:]] == [
+            'seconds_bucket{view="movies",le="0.1"} 2',
+            'seconds_bucket{view="movies",le="1"} 3',
+            'seconds_bucket{view="movies",le="+Inf"} 4',
+            'seconds_sum{view="movies"} 2.65',
+            'seconds_count{view="movies"} 4',
+        ]
+
+    def test_label_values_are_escaped(self) -> None:
+        counter: Counter = Counter("total", "Total.", ["path"])
+
+        counter.inc('a"b\\c')
+
+        assert counter.render("w")[-1] == 'total{worker="w",path="a\\"b\\\\c"} 1'
+
+    def test_registry_returns_the_same_metric(self) -> None:
+        registry: Registry = Registry()
+
+        first: Counter = registry.counter("total", "Total.")
+        first.inc()
+
+        assert registry.counter("total", "Total.") is first
+        assert "total{worker=" in registry.render()
+
+    def test_collectors_are_rendered_without_worker(self) -> None:
+        registry: Registry = Registry()
+        histogram: Histogram = Histogram("seconds", "Time.", ["task"], buckets=[1])
+        histogram.set(("a",), cumulative=[2, 3], total=4.5)
+
+        registry.register_collector(histogram.render)
+        registry.register_collector(histogram.render)
+
+        assert registry.render().splitlines()[2:] == [
+            'seconds_bucket{task="a",le="1"} 2',
+            'seconds_bucket{task="a",le="+Inf"} 3',
+            'seconds_sum{task="a"} 4.5',
+            'seconds_count{task="a"} 3',
+        ]
+
+
+class TestSharedMetrics:
+    def _get_worker(self, connection: Any) -> Registry:
+        registry: Registry = Registry(get_connection=lambda: connection)
+        registry.counter("requests_total", "Requests.", ["view"])
+        registry.histogram("seconds", "Time.", ["view"], buckets=[1])
+
+        return registry
+
+    def test_every_worker_renders_the_totals(self) -> None:
+        connection: FakeRedis = FakeRedis()
+        first: Registry = self._get_worker(connection)
+        second: Registry = self._get_worker(connection)
+
+        first.counter("requests_total", "Requests.").inc("movies")
+        first.histogram("seconds", "Time.").observe(0.5, "movies")
+        first.flush()
+        second.counter("requests_total", "Requests.").inc("movies", amount=2)
+        second.histogram("seconds", "Time.").observe(2, "movies")
+
+        # Rendering adds the numbers of the worker that answers.
+        text: str = second.render()
+        assert first.render() == text
+        assert text.splitlines() == [
+            "# HELP requests_total Requests.",
+            "# TYPE requests_total counter",
+            'requests_total{view="movies"} 3',
+            "# HELP seconds Time.",
+            "# TYPE seconds histogram",
+            'seconds_bucket{view="movies",le="1"} 1',
+            'seconds_bucket{view="movies",le="+Inf"} 2',
+            'seconds_sum{view="movies"} 2.5',
+            'seconds_count{view="movies"} 2',
+        ]
+
+    def test_flushes_at_most_every_second(self) -> None:
+        connection: FakeRedis = FakeRedis()
+        registry: Registry = self._get_worker(connection)
+        counter: Counter = registry.counter("requests_total", "Requests.")
+
+        counter.inc("movies")
+        registry.flush()
+        counter.inc("movies")
+        registry.flush()
+
+        assert connection.hashes["vigilio:metrics:requests_total"] == {
+            b'["movies"]': b"1.0"
+        }
+
+    def test_falls_back_to_the_worker_without_redis(self) -> None:
+        connection: FakeRedis = FakeRedis()
+        connection.pipeline = MagicMock(side_effect=redis.exceptions.ConnectionError)
+        registry: Registry = self._get_worker(connection)
+
+        registry.counter("requests_total", "Requests.").inc("movies")
+
+        assert 'requests_total{worker="' in registry.render()
+
+
+@pytest.mark.usefixtures("db")
+class TestMetricsView:
+    def test_blocks_anonymous_users(self, settings) -> None:
+        settings.METRICS_TOKEN = ""
+        request = RequestFactory().get("/metrics")
+        request.user = AnonymousUser()
+
+        assert metrics(request).status_code == 403
+
+    def test_allows_staff_users(self, user: User) -> None:
+        user.is_staff = True
+        request = RequestFactory().get("/metrics")
+        request.user = user
+
+        response: HttpResponse = metrics(request)
+
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+
+    def test_allows_token(self, settings) -> None:
+        settings.METRICS_TOKEN = "secret"
+        request = RequestFactory().get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        request.user = AnonymousUser()
+
+        assert metrics(request).status_code == 200
@@ -0,0 +1,97 @@
+import logging
+from typing import Callable
+
+import pytest
+from django.http import HttpRequest, HttpResponse
+from django.test import RequestFactory
+from django.urls import ResolverMatch
+
+from stream.models import Movie
+from watch import middleware
+from watch.middleware import (
+    PerformanceMiddleware,
+    RequestStats,
+    _track,
+    get_request_stats,
+)
+
+
+class InstrumentedView:
+    verbose_request_logging = True
+    query_budget = 1
+
+
+def _view(request: HttpRequest) -> HttpResponse:
+    return HttpResponse()
+
+
+def _instrumented_view() -> Callable:
+    def view(request: HttpRequest) -> HttpResponse:
+        return HttpResponse()
+
+    view.cls = InstrumentedView
+    return view
+
+
+def _run(view: Callable, queries: int = 0) -> HttpRequest:
+    request: HttpRequest = RequestFactory().get("/api/movies")
+    request.resolver_match = ResolverMatch(view, (), {}, url_name="movies_api")
+
+    def get_response(request: HttpRequest) -> HttpResponse:
+        performance_middleware.process_view(request, view, (), {})
+        for _ in range(queries):
+            Movie.objects.count()
+        return view(request)
+
+    performance_middleware: PerformanceMiddleware = PerformanceMiddleware(get_response)
+    performance_middleware(request)
+
+    return request
+
+
+@pytest.mark.usefixtures("db")
+class TestPerformanceMiddleware:
+    def test_skips_views_without_flag(self) -> None:
+        request: HttpRequest = _run(_view, queries=1)
+
+        assert not hasattr(request, "performance_stats")
+
+    def test_records_queries_of_flagged_views(self) -> None:
+        request: HttpRequest = _run(_instrumented_view(), queries=1)
+
+        assert len(request.performance_stats.queries) == 1
+        assert "COUNT(*)" in request.performance_stats.queries[0][1]
+        assert get_request_stats() is None
+
+    def test_logs_requests_over_budget(self, caplog) -> None:
+        before: float = middleware.BUDGETS.values.get(("movies_api", "queries"), 0)
+
+        with caplog.at_level(logging.WARNING, logger="watch.middleware"):
+            _run(_instrumented_view(), queries=2)
+
+        assert "Slow request GET /api/movies (movies_api)" in caplog.text
+        assert "Slowest queries" in caplog.text
+        assert middleware.BUDGETS.values[("movies_api", "queries")] == before + 1
+
+    def test_counts_requests(self) -> None:
+        before: float = middleware.REQUESTS.values.get(("movies_api", "GET", "200"), 0)
+
+        _run(_instrumented_view())
+
+        assert middleware.REQUESTS.values[("movies_api", "GET", "200")] == before + 1
+
+
+class TestTrack:
+    def test_counts_calls_during_instrumented_requests(self) -> None:
+        tracked: Callable = _track(lambda: "result", middleware._record_redis)
+        stats: RequestStats = RequestStats()
+
+        assert tracked() == "result"
+
+        middleware._local.stats = stats
+        try:
+            assert tracked() == "result"
+        finally:
+            middleware._local.stats = None
+
+        assert stats.redis_calls == 1
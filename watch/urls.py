@@ -17,11 +17,14 @@ from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
 
+from watch.metrics import metrics
+
 urlpatterns = [
     path("", include("stream.urls"), name="stream"),
     path("panel/", include("panel.urls"), name="panel"),
     path("accounts/login/", auth_views.LoginView.as_view(), name="login"),
     path("accounts/logout/", auth_views.LogoutView.as_view(), name="logout"),
     path("admin/", admin.site.urls),
+    path("metrics", metrics, name="metrics"),
     path("convert/", include("lazysignup.urls")),
 ]